@@ -0,0 +1,67 @@
+"""Benchmark the JSON API on catalog-sized lists: streamed responses against building the whole list, and projection.
+
+For each catalog size, /api/v1/movies is read to its end, chunk by chunk as a client would, and its time and peak
+Python memory are compared with building the same list in memory and serialising it at once, as jsonify would.
+The full list is then read again with only the ids, to show what projection saves. Run from the MovieWebApp
+directory:
+
+    python -m benchmarks.bench_api [movies ...]
+"""
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.catalog import write_synthetic_catalog
+from movie import create_app
+import movie.adapters.repository as repo
+import movie.api.services as services
+
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def measure(read):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = read()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def streamed(client, url):
+    def read():
+        response = client.get(url, buffered=False)
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+        return size
+    return read
+
+
+def built_in_memory():
+    movie_ids = services.get_movie_ids({}, repo.repo_instance)
+    fields = services.DEFAULT_MOVIE_FIELDS
+    movies = list(services.iter_movies(movie_ids, fields, 0, None, repo.repo_instance))
+    return len(json.dumps({'number_of_movies': len(movie_ids), 'fields': fields, 'movies': movies}))
+
+
+def main(sizes):
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_path:
+            write_synthetic_catalog(data_path, size)
+            app = create_app({'TESTING': True, 'TEST_DATA_PATH': data_path, 'CATALOG_SNAPSHOT': data_path + '/none'})
+        client = app.test_client()
+
+        for name, read in (('streamed', streamed(client, '/api/v1/movies')),
+                           ('built in memory', built_in_memory),
+                           ('streamed, ids only', streamed(client, '/api/v1/movies?fields=id'))):
+            length, elapsed, peak = measure(read)
+            print(f'{size:>8} movies, {name:<19} {length / 1e6:7.2f} MB in {elapsed * 1e3:8.1f} ms, '
+                  f'peak memory {peak / 1e6:7.2f} MB')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,55 @@
+"""Benchmark name autocompletion: p50 and p99 latency of PrefixIndex.suggest on millions of names.
+
+Names are the bundled actor names with a copy number appended, weighted at random. Prefixes of one to three
+characters are served from the precomputed cache; longer prefixes bisect the sorted keys. Run from the MovieWebApp
+directory:
+
+    python -m benchmarks.bench_autocomplete [names]
+"""
+import random
+import sys
+import time
+
+from benchmarks.catalog import bundled_rows
+from movie.adapters.prefix_index import PrefixIndex
+
+
+DEFAULT_NAMES = 2000000
+QUERIES = 2000
+
+
+def synthetic_names(count: int):
+    actors = sorted({actor.strip() for row in bundled_rows()[1] for actor in row[5].split(',')})
+    for i in range(count):
+        yield f'{actors[i % len(actors)]} {i // len(actors)}'
+
+
+def percentile(sorted_values, fraction: float):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def main(count: int):
+    random.seed(235)
+    index = PrefixIndex()
+    start = time.perf_counter()
+    names = list()
+    for name in synthetic_names(count):
+        index.add(name, random.randrange(1, 50))
+        names.append(name)
+    index.precompute()
+    print(f'Indexed {count} names in {time.perf_counter() - start:.1f} s')
+
+    for length in (1, 2, 3, 5, 8):
+        latencies = list()
+        for _ in range(QUERIES):
+            prefix = random.choice(names)[:length]
+            start = time.perf_counter()
+            index.suggest(prefix)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f'{length}-character prefixes: p50 {percentile(latencies, 0.5) * 1e6:.1f} us, '
+              f'p99 {percentile(latencies, 0.99) * 1e6:.1f} us')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NAMES)
@@ -0,0 +1,60 @@
+"""Benchmark response sizes and latencies of the movies pages with and without gzip compression.
+
+Each page is requested repeatedly through the test client over the bundled data, once accepting only the identity
+encoding and once accepting gzip, and the body sizes and median latencies are reported, followed by the sizes of
+the static files as sent after the build step. Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_compression [requests per page]
+"""
+import gzip
+import os
+import statistics
+import sys
+import time
+
+from benchmarks.catalog import BUNDLED_DATA_PATH
+from movie import create_app
+from movie.utilities.static_assets import TEXT_ASSET_EXTENSIONS, collect_static_assets
+
+
+DEFAULT_REQUESTS = 100
+PAGES = (
+    '/movies_by_year?release_year=2014',
+    '/movies_by_genre?genre=Action',
+    '/movies_by_genre?genre=Action&page_size=100',
+    '/movies_by_actor?actor=Chris+Pratt',
+    '/top?limit=100',
+    '/search?q=love',
+    '/autocomplete?q=a&limit=50',
+)
+
+
+def measure(client, page, encoding, number_of_requests):
+    latencies = list()
+    for _ in range(number_of_requests):
+        start = time.perf_counter()
+        response = client.get(page, headers={'Accept-Encoding': encoding})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, page
+    return len(response.data), statistics.median(latencies)
+
+
+def main(number_of_requests):
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': BUNDLED_DATA_PATH, 'WTF_CSRF_ENABLED': False})
+    client = app.test_client()
+
+    for page in PAGES:
+        identity_size, identity_latency = measure(client, page, 'identity', number_of_requests)
+        gzip_size, gzip_latency = measure(client, page, 'gzip', number_of_requests)
+        print(f'{page:<46} {identity_size:>7} -> {gzip_size:>6} bytes ({gzip_size / identity_size:5.1%}), '
+              f'median {identity_latency * 1e3:6.2f} -> {gzip_latency * 1e3:6.2f} ms')
+
+    for name in collect_static_assets(app.static_folder):
+        with open(os.path.join(app.static_folder, name), 'rb') as infile:
+            data = infile.read()
+        sent = len(gzip.compress(data, 9)) if name.endswith(TEXT_ASSET_EXTENSIONS) else len(data)
+        print(f'/static/{name:<38} {len(data):>7} -> {sent:>7} bytes')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REQUESTS)
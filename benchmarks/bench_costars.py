@@ -0,0 +1,63 @@
+"""Benchmark degrees-of-separation queries on co-star graphs of up to millions of edges.
+
+Casts are drawn at random, with a few actors appearing far more often than most, so that the graph is one large
+component like a real catalog's. Reports the time to build the CSR arrays and the latency of shortest-path queries
+between random pairs of actors. Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_costars [movies ...]
+"""
+import random
+import statistics
+import sys
+import time
+
+from movie.adapters.costar_graph import CoStarGraph
+
+
+DEFAULT_SIZES = (10000, 100000, 500000)
+CAST_SIZE = 4
+QUERIES = 200
+
+
+def build_graph(number_of_movies: int, seed: int = 235):
+    generator = random.Random(seed)
+    number_of_actors = 2 * number_of_movies
+    graph = CoStarGraph()
+    for movie_id in range(1, number_of_movies + 1):
+        # Each cast has one lead drawn with paretovariate, which favours low actor numbers (the prolific actors),
+        # and a supporting cast drawn uniformly.
+        cast = {min(int(generator.paretovariate(1.0)), number_of_actors)}
+        cast.update(generator.randint(1, number_of_actors) for _ in range(CAST_SIZE - 1))
+        graph.add_movie(movie_id, [f'Actor {actor}' for actor in cast])
+    return graph
+
+
+def main(sizes):
+    for size in sizes:
+        graph = build_graph(size)
+        start = time.perf_counter()
+        graph.build()
+        build_time = time.perf_counter() - start
+
+        names = [f'Actor {actor}' for actor in range(1, 2 * size) if f'Actor {actor}' in graph]
+        generator = random.Random(size)
+        latencies = list()
+        lengths = list()
+        for _ in range(QUERIES):
+            name, other_name = generator.sample(names, 2)
+            start = time.perf_counter()
+            path = graph.shortest_path(name, other_name)
+            latencies.append(time.perf_counter() - start)
+            if path is not None:
+                lengths.append(len(path))
+
+        latencies.sort()
+        print(f'{size:>8} movies, {len(graph):>8} actors, {graph.number_of_edges:>8} edges: '
+              f'build {build_time * 1e3:8.1f} ms, query p50 {statistics.median(latencies) * 1e3:7.2f} ms, '
+              f'p99 {latencies[int(0.99 * len(latencies))] * 1e3:7.2f} ms, '
+              f'mean degrees {statistics.mean(lengths) if lengths else 0:.2f}, '
+              f'{QUERIES - len(lengths)} unlinked pairs')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,51 @@
+"""Benchmark multi-facet filtering: MemoryRepository.get_movie_ids_by_filters versus a scan of Movie objects.
+
+Selective queries start from a short posting list, so their latency should stay flat as the catalog grows. Run from
+the MovieWebApp directory:
+
+    python -m benchmarks.bench_facets [movies ...]
+"""
+import sys
+import timeit
+
+from benchmarks.catalog import build_synthetic_repository
+
+
+DEFAULT_SIZES = (10000, 100000, 300000)
+QUERIES = {
+    'genre + actor': dict(genres=['Sci-Fi'], actors=['Chris Pratt']),
+    'genres + director + years': dict(genres=['Action', 'Adventure'], director='Ridley Scott',
+                                      year_range=(2010, 2016)),
+    'genre + year + runtime': dict(genres=['Horror'], year_range=(2012, 2012), runtime_range=(None, 100)),
+    'runtime only': dict(runtime_range=(150, None)),
+}
+
+
+def scan(repo, genres=(), actors=(), director=None, year_range=None, runtime_range=None):
+    year_low, year_high = year_range or (None, None)
+    runtime_low, runtime_high = runtime_range or (None, None)
+    return [movie.id for movie in repo.get_movies
+            if set(genres) <= {genre.genre_name for genre in movie.genres}
+            and set(actors) <= {actor.actor_full_name for actor in movie.actors}
+            and (director is None or movie.director.director_full_name == director)
+            and (year_low is None or movie.release_year >= year_low)
+            and (year_high is None or movie.release_year <= year_high)
+            and (runtime_low is None or movie.runtime_minutes >= runtime_low)
+            and (runtime_high is None or movie.runtime_minutes <= runtime_high)]
+
+
+def main(sizes):
+    for size in sizes:
+        repo = build_synthetic_repository(size)
+        for label, query in QUERIES.items():
+            movie_ids = repo.get_movie_ids_by_filters(**query)
+            assert movie_ids == scan(repo, **query)
+
+            scan_time = timeit.timeit(lambda: scan(repo, **query), number=1)
+            filter_time = timeit.timeit(lambda: repo.get_movie_ids_by_filters(**query), number=100) / 100
+            print(f'{size:>8} movies, {label:<26}: scan {scan_time * 1e3:9.2f} ms, '
+                  f'filters {filter_time * 1e3:8.3f} ms, {len(movie_ids)} matches')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,54 @@
+"""Benchmark page throughput with the template fragment cache on and off, route by route.
+
+Each route is requested repeatedly through the test client over the bundled data, first with the fragment cache
+turned off and then with it on, and the requests per second and the cache's hit rate are reported. Run from the
+MovieWebApp directory:
+
+    python -m benchmarks.bench_fragment_cache [requests per route]
+"""
+import sys
+import time
+
+from benchmarks.catalog import BUNDLED_DATA_PATH
+from movie import create_app
+
+
+DEFAULT_REQUESTS = 200
+ROUTES = (
+    '/movies_by_year',
+    '/movies_by_year?year=2014&view_comments_for=1',
+    '/movies_by_genre?genre=Action',
+    '/movies_by_genre?genre=Action&page_size=25',
+    '/movies_by_actor?actor=Chris+Pratt',
+    '/top?limit=50',
+    '/director/Ridley Scott',
+    '/search?q=galaxy',
+)
+
+
+def requests_per_second(client, route, number_of_requests):
+    start = time.perf_counter()
+    for _ in range(number_of_requests):
+        response = client.get(route)
+        assert response.status_code == 200, route
+    return number_of_requests / (time.perf_counter() - start)
+
+
+def main(number_of_requests):
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': BUNDLED_DATA_PATH, 'WTF_CSRF_ENABLED': False})
+    client = app.test_client()
+    cache = app.jinja_env.fragment_cache
+
+    for route in ROUTES:
+        app.jinja_env.fragment_cache = None
+        off = requests_per_second(client, route, number_of_requests)
+
+        app.jinja_env.fragment_cache = cache
+        cache.clear()
+        on = requests_per_second(client, route, number_of_requests)
+        print(f'{route:<48} off {off:7.1f} req/s, on {on:7.1f} req/s ({on / off:4.2f}x), '
+              f'hit rate {cache.hit_rate:.2f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REQUESTS)
@@ -0,0 +1,45 @@
+"""Benchmark catalog ingestion: the in-process loader versus chunked parsing in a process pool.
+
+Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_ingest [rows [workers ...]]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.catalog import write_synthetic_catalog
+from movie.adapters.memory_repository import MemoryRepository, load_movies_and_ids, \
+    load_movies_and_ids_in_parallel, DEFAULT_INGEST_CHUNK_SIZE
+
+
+DEFAULT_ROWS = 200000
+DEFAULT_WORKERS = (2, 4, 8)
+
+
+def time_load(load):
+    repo = MemoryRepository()
+    start = time.perf_counter()
+    load(repo)
+    return time.perf_counter() - start, repo.get_number_of_movies()
+
+
+def main(rows, worker_counts):
+    with tempfile.TemporaryDirectory() as data_path:
+        write_synthetic_catalog(data_path, rows)
+        size = os.path.getsize(os.path.join(data_path, 'moviefile.csv'))
+        print(f'{rows} rows, {size / 2 ** 20:.1f} MB')
+
+        baseline, count = time_load(lambda repo: load_movies_and_ids(data_path, repo))
+        print(f'{"in-process":>12} {baseline:>8.2f} s  {count} movies')
+
+        for workers in worker_counts:
+            elapsed, count = time_load(lambda repo: load_movies_and_ids_in_parallel(
+                data_path, repo, workers, DEFAULT_INGEST_CHUNK_SIZE))
+            print(f'{workers:>4} workers {elapsed:>8.2f} s  {count} movies  {baseline / elapsed:.2f}x')
+
+
+if __name__ == '__main__':
+    arguments = [int(arg) for arg in sys.argv[1:]]
+    main(arguments[0] if arguments else DEFAULT_ROWS, arguments[1:] or DEFAULT_WORKERS)
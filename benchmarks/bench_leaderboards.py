@@ -0,0 +1,56 @@
+"""Benchmark leaderboards: serving a prebuilt ranking versus sorting the candidate movies on every request.
+
+Serving slices a ranking built when the catalog loads, so it should take the same time however large the catalog or
+genre. Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_leaderboards [movies ...]
+"""
+import sys
+import time
+import timeit
+
+from benchmarks.catalog import build_synthetic_repository
+from movie.adapters.repository import LEADERBOARD_METRICS
+
+
+DEFAULT_SIZES = (10000, 100000, 300000)
+TOP = 10
+LEADERBOARDS = {
+    'overall': dict(),
+    'genre': dict(genre='Drama'),
+    'year': dict(year=2016),
+}
+
+
+def sort_on_request(repo, genre=None, year=None):
+    if genre is not None:
+        movie_ids = repo.get_movie_ids_by_genre(genre)
+    elif year is not None:
+        movie_ids = repo.get_movie_ids_by_release_year_range(year, year)
+    else:
+        movie_ids = range(1, repo.get_number_of_movies() + 1)
+    ratings = [(repo.get_movie_metric(movie_id, 'rating'), movie_id) for movie_id in movie_ids]
+    ratings = [(rating, movie_id) for rating, movie_id in ratings if rating is not None]
+    ratings.sort(key=lambda pair: (-pair[0], pair[1]))
+    return [movie_id for _, movie_id in ratings[:TOP]]
+
+
+def main(sizes):
+    for size in sizes:
+        repo = build_synthetic_repository(size)
+        start = time.perf_counter()
+        repo.build_leaderboards()
+        build_time = time.perf_counter() - start
+        print(f'{size:>8} movies: built {len(LEADERBOARD_METRICS)} metrics in {build_time * 1e3:.1f} ms')
+
+        for label, group in LEADERBOARDS.items():
+            served = [movie_id for movie_id, _ in repo.get_leaderboard('rating', limit=TOP, **group)]
+            assert served == sort_on_request(repo, **group)
+
+            sort_time = timeit.timeit(lambda: sort_on_request(repo, **group), number=3) / 3
+            serve_time = timeit.timeit(lambda: repo.get_leaderboard('rating', limit=TOP, **group), number=1000) / 1000
+            print(f'{size:>8} movies, {label:<8}: sort {sort_time * 1e3:9.2f} ms, served {serve_time * 1e3:8.4f} ms')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,65 @@
+"""Benchmark name lookups in MemoryRepository: linear list scans versus the name indexes.
+
+Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_lookups [size ...]
+"""
+import sys
+import timeit
+
+from movie.adapters.memory_repository import MemoryRepository
+from movie.domain.model import User, Actor, Director, Genre
+
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+LOOKUPS = 200
+
+
+def build_repository(size: int) -> MemoryRepository:
+    repo = MemoryRepository()
+    for i in range(size):
+        repo.add_user(User(f'user{i}', 'password'))
+        repo.add_actor(Actor(f'Actor {i}'))
+        repo.add_director(Director(f'Director {i}'))
+        repo.add_genre(Genre(f'Genre {i}'))
+    return repo
+
+
+def scan_lookups(repo: MemoryRepository, names):
+    # The lookups as they were written before the indexes: a scan of the entity list per call.
+    for username, actor_name, director_name, genre_name in names:
+        next((user for user in repo._users if user.username == username), None)
+        next((actor for actor in repo._actors if actor.actor_full_name == actor_name), None)
+        next((director for director in repo._directors if director.director_full_name == director_name), None)
+        next((genre for genre in repo._genres if genre.genre_name == genre_name), None)
+
+
+def index_lookups(repo: MemoryRepository, names):
+    for username, actor_name, director_name, genre_name in names:
+        repo.get_user(username)
+        repo.get_actor(actor_name)
+        repo.get_director(director_name)
+        repo.get_genre(genre_name)
+
+
+def main(sizes):
+    print(f'{"entities":>10} {"scan us/lookup":>16} {"index us/lookup":>16} {"speedup":>10}')
+    for size in sizes:
+        repo = build_repository(size)
+
+        # Spread the looked-up names over the whole list, so the scan pays its average cost.
+        step = max(size // LOOKUPS, 1)
+        names = [(f'user{i}', f'Actor {i}', f'Director {i}', f'Genre {i}') for i in range(0, size, step)]
+
+        # Scans get expensive quickly, so fewer of them are timed at the larger sizes. Names from the middle of
+        # the lists cost a scan its average of n/2 comparisons.
+        scan_count = max(1, LOOKUPS * 1000 // size)
+        scan_names = names[len(names) // 2:][:scan_count]
+        scan = timeit.timeit(lambda: scan_lookups(repo, scan_names), number=1) / (len(scan_names) * 4)
+        index = timeit.timeit(lambda: index_lookups(repo, names), number=10) / (len(names) * 4 * 10)
+
+        print(f'{size:>10} {scan * 1e6:>16.2f} {index * 1e6:>16.3f} {scan / index:>9.0f}x')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
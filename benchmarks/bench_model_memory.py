@@ -0,0 +1,64 @@
+"""Benchmark the memory cost of the domain model classes, in bytes per entity.
+
+Strings and shared entities are created before measuring, so the figures are the overhead of the objects themselves
+and of their collections. Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_model_memory [count]
+"""
+import sys
+import tracemalloc
+
+from movie.domain.model import Movie, Actor, Director, Genre, User, Review
+
+
+DEFAULT_COUNT = 100000
+
+
+def measure(create, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [create(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Discount the list holding the objects.
+    return (after - before - sys.getsizeof(objects)) / count
+
+
+def main(count):
+    names = [f'Name {i}' for i in range(count)]
+    actors = [Actor(name) for name in names[:4]]
+    genres = [Genre(name) for name in names[:3]]
+    director = Director(names[0])
+    user = User('dbowie', '1234567890')
+
+    def cast_movie(i):
+        movie = Movie(names[i], 2016)
+        movie.id = i + 1
+        movie.description = names[i]
+        movie.runtime_minutes = 100
+        movie.director = director
+        for actor in actors:
+            movie.add_actor(actor)
+        for genre in genres:
+            movie.add_genre(genre)
+        return movie
+
+    movie = cast_movie(0)
+    cases = [
+        ('Movie, bare', lambda i: Movie(names[i], 2016)),
+        ('Movie, cast and genres', cast_movie),
+        ('Actor', lambda i: Actor(names[i])),
+        ('Director', lambda i: Director(names[i])),
+        ('Genre', lambda i: Genre(names[i])),
+        ('User', lambda i: User(names[i], names[i])),
+        ('Review', lambda i: Review(movie, names[i], 5, user)),
+    ]
+
+    print(f'{"entity":>24} {"bytes":>8}')
+    for label, create in cases:
+        print(f'{label:>24} {measure(create, count):>8.0f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT)
@@ -0,0 +1,56 @@
+"""Benchmark numeric filtering: vectorised masks over MovieTable versus a scan of Movie objects.
+
+The filter is "rating >= 7, runtime < 100, year 2010-2015". Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_movie_table [movies [table rows ...]]
+"""
+import sys
+import timeit
+
+import numpy as np
+
+from benchmarks.catalog import build_synthetic_repository
+from movie.adapters.movie_table import MovieTable
+
+
+DEFAULT_MOVIES = 100000
+DEFAULT_TABLE_ROWS = (1000000, 10000000)
+CONDITIONS = [('rating', '>=', 7), ('runtime', '<', 100), ('year', 'between', (2010, 2015))]
+
+
+def scan(repo):
+    return [movie.id for movie in repo.get_movies
+            if movie.runtime_minutes < 100 and 2010 <= movie.release_year <= 2015
+            and (repo.get_movie_metric(movie.id, 'rating') or 0) >= 7]
+
+
+def tiled_table(table: MovieTable, rows: int):
+    # A table of rows rows, made by repeating the columns of table.
+    tiled = MovieTable(capacity=rows)
+    repeats = -(-rows // len(table))
+    for name in table.columns:
+        tiled._columns[name][:] = np.tile(table.column(name), repeats)[:rows]
+    tiled._columns['id'][:] = np.arange(1, rows + 1)
+    tiled._size = rows
+    return tiled
+
+
+def main(movies, table_rows):
+    repo = build_synthetic_repository(movies)
+    table = repo.movie_table
+    assert scan(repo) == table.filter(CONDITIONS).tolist()
+
+    scan_time = timeit.timeit(lambda: scan(repo), number=3) / 3
+    mask_time = timeit.timeit(lambda: table.filter(CONDITIONS), number=20) / 20
+    print(f'{movies} movies: object scan {scan_time * 1e3:.2f} ms, vectorised {mask_time * 1e3:.3f} ms '
+          f'({scan_time / mask_time:.0f}x), {len(table.filter(CONDITIONS))} matches')
+
+    for rows in table_rows:
+        tiled = tiled_table(table, rows)
+        mask_time = timeit.timeit(lambda: tiled.filter(CONDITIONS), number=10) / 10
+        print(f'{rows} rows: vectorised {mask_time * 1e3:.3f} ms')
+
+
+if __name__ == '__main__':
+    arguments = [int(arg) for arg in sys.argv[1:]]
+    main(arguments[0] if arguments else DEFAULT_MOVIES, arguments[1:] or DEFAULT_TABLE_ROWS)
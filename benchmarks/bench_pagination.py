@@ -0,0 +1,43 @@
+"""Benchmark genre listing pages: offset pagination over a copied id list versus keyset pagination with cursors.
+
+Offset pages copy the whole posting list and slice it, so every page costs as much as the largest genre; keyset pages
+bisect to the cursor, so deep pages cost the same as the first. Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_pagination [movies ...]
+"""
+import sys
+import timeit
+
+from benchmarks.catalog import build_synthetic_repository
+from movie.movies import services
+
+
+DEFAULT_SIZES = (10000, 100000, 300000)
+PAGE_SIZE = 10
+GENRE = 'Drama'
+
+
+def offset_page(repo, offset):
+    movie_ids = list(repo.get_movie_ids_by_genre(GENRE))
+    return movie_ids[offset:offset + PAGE_SIZE], len(movie_ids)
+
+
+def main(sizes):
+    for size in sizes:
+        repo = build_synthetic_repository(size)
+        movie_ids = repo.get_movie_ids_by_genre(GENRE)
+        for label, offset in (('first page', 0), ('middle page', len(movie_ids) // 2),
+                              ('last page', len(movie_ids) - PAGE_SIZE)):
+            cursor = services.encode_cursor(after=movie_ids[offset - 1]) if offset > 0 else None
+            page = services.get_movie_ids_page('genre', GENRE, cursor, PAGE_SIZE, repo)
+            assert page['movie_ids'] == offset_page(repo, offset)[0]
+
+            offset_time = timeit.timeit(lambda: offset_page(repo, offset), number=100) / 100
+            keyset_time = timeit.timeit(lambda: services.get_movie_ids_page('genre', GENRE, cursor, PAGE_SIZE, repo),
+                                        number=100) / 100
+            print(f'{size:>8} movies, {label:<12}: offset {offset_time * 1e3:8.3f} ms, '
+                  f'keyset {keyset_time * 1e3:8.3f} ms, {len(movie_ids)} {GENRE} movies')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
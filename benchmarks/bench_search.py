@@ -0,0 +1,59 @@
+"""Benchmark full-text search: p50 and p99 query latency of SearchIndex on a synthetic catalog.
+
+Queries are single words, pairs of words and quoted phrases drawn from the bundled descriptions. Run from the
+MovieWebApp directory:
+
+    python -m benchmarks.bench_search [movies]
+"""
+import random
+import sys
+import time
+
+from benchmarks.catalog import bundled_rows, synthetic_rows
+from movie.adapters.search_index import SearchIndex, tokenise
+
+
+DEFAULT_MOVIES = 1000000
+QUERIES = 300
+
+
+def sample_queries(count: int):
+    random.seed(235)
+    descriptions = [tokenise(row[3]) for row in bundled_rows()[1]]
+    descriptions = [tokens for tokens in descriptions if len(tokens) >= 3]
+    queries = list()
+    for i in range(count):
+        tokens = random.choice(descriptions)
+        start = random.randrange(len(tokens) - 2)
+        if i % 3 == 0:
+            queries.append(tokens[start])
+        elif i % 3 == 1:
+            queries.append(f'{tokens[start]} {random.choice(random.choice(descriptions))}')
+        else:
+            queries.append(f'"{tokens[start]} {tokens[start + 1]}"')
+    return queries
+
+
+def percentile(sorted_values, fraction: float):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def main(movies: int):
+    index = SearchIndex()
+    start = time.perf_counter()
+    for row in synthetic_rows(movies):
+        index.add(int(row[0]), row[1], row[3])
+    print(f'Indexed {movies} movies in {time.perf_counter() - start:.1f} s')
+
+    for label, offset in (('first page', 0), ('tenth page', 90)):
+        latencies = list()
+        for query in sample_queries(QUERIES):
+            start = time.perf_counter()
+            index.search(query, offset, 10)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f'{label}: p50 {percentile(latencies, 0.5) * 1e3:.2f} ms, p99 {percentile(latencies, 0.99) * 1e3:.2f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MOVIES)
@@ -0,0 +1,75 @@
+"""Benchmark similar-movie lookups: the MinHash LSH index against exact Jaccard similarity over the whole catalog.
+
+For every movie of the bundled data, the exact answer ranks all other movies by the Jaccard similarity of their
+genres, actors and director. Recall is the share of the movies at or above a similarity floor that the index finds;
+the index only ever compares a movie with the candidates sharing one of its LSH buckets. Run from the MovieWebApp
+directory:
+
+    python -m benchmarks.bench_similarity [bands rows ...]
+"""
+import statistics
+import sys
+import time
+
+from benchmarks.catalog import BUNDLED_DATA_PATH
+from movie.adapters.memory_repository import MemoryRepository, movie_features, populate
+from movie.adapters.similarity_index import SimilarityIndex
+
+
+DEFAULT_SETTINGS = ((32, 3), (24, 2), (16, 4))
+FLOORS = (0.2, 0.3, 0.5)
+
+
+def exact_similarities(features, movie_id):
+    own = features[movie_id]
+    return {other_id: len(own & other) / len(own | other) for other_id, other in features.items()
+            if other_id != movie_id and own & other}
+
+
+def main(settings):
+    repo = MemoryRepository()
+    populate(BUNDLED_DATA_PATH, repo)
+    movies = repo.get_movies
+    features = {movie.id: set(movie_features(movie)) for movie in movies}
+
+    start = time.perf_counter()
+    exact = {movie.id: exact_similarities(features, movie.id) for movie in movies}
+    exact_time = (time.perf_counter() - start) / len(movies)
+
+    for bands, rows in settings:
+        index = SimilarityIndex(bands, rows)
+        start = time.perf_counter()
+        for movie in movies:
+            index.add(movie.id, movie_features(movie))
+        index.build()
+        build_time = time.perf_counter() - start
+
+        found = dict()
+        latencies = list()
+        candidates = list()
+        for movie in movies:
+            start = time.perf_counter()
+            similar = index.similar(movie.id, len(movies))
+            latencies.append(time.perf_counter() - start)
+            found[movie.id] = {movie_id for movie_id, _ in similar}
+            candidates.append(len(similar))
+
+        recalls = list()
+        for floor in FLOORS:
+            wanted = [{movie_id for movie_id, similarity in exact[movie.id].items() if similarity >= floor}
+                      for movie in movies]
+            hits = sum(len(expected & found[movie.id]) for expected, movie in zip(wanted, movies))
+            total = sum(len(expected) for expected in wanted)
+            recalls.append(f'recall at {floor} {hits / total if total else 1:.3f}')
+
+        latencies.sort()
+        print(f'{bands} bands x {rows} rows: build {build_time * 1e3:.1f} ms, '
+              f'{statistics.mean(candidates):.1f} candidates per movie, '
+              f'query p50 {statistics.median(latencies) * 1e3:.3f} ms, '
+              f'p99 {latencies[int(0.99 * len(latencies))] * 1e3:.3f} ms (exact {exact_time * 1e3:.3f} ms), '
+              + ', '.join(recalls))
+
+
+if __name__ == '__main__':
+    arguments = [int(arg) for arg in sys.argv[1:]]
+    main(list(zip(arguments[::2], arguments[1::2])) or DEFAULT_SETTINGS)
@@ -0,0 +1,48 @@
+"""Benchmark startup: populating the repository from CSV versus loading a catalog snapshot.
+
+Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_snapshot [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.catalog import BUNDLED_DATA_PATH, write_synthetic_catalog
+from movie.adapters import snapshot
+from movie.adapters.memory_repository import MemoryRepository, populate
+
+
+DEFAULT_ROWS = 1000000
+
+
+def compare(label: str, data_path: str, snapshot_path: str):
+    start = time.perf_counter()
+    repo = MemoryRepository()
+    populate(data_path, repo)
+    csv_time = time.perf_counter() - start
+
+    snapshot.write_snapshot(repo, data_path, snapshot_path)
+
+    start = time.perf_counter()
+    restored = snapshot.read_snapshot(data_path, snapshot_path)
+    snapshot_time = time.perf_counter() - start
+    assert restored.get_number_of_movies() == repo.get_number_of_movies()
+
+    size = os.path.getsize(snapshot_path) / 2 ** 20
+    print(f'{label:>22} {csv_time:>10.2f} s {snapshot_time:>10.2f} s {csv_time / snapshot_time:>8.1f}x {size:>8.1f} MB')
+
+
+def main(rows):
+    print(f'{"catalog":>22} {"CSV":>12} {"snapshot":>12} {"speedup":>9} {"file":>11}')
+    with tempfile.TemporaryDirectory() as directory:
+        compare('bundled (1000 rows)', BUNDLED_DATA_PATH, os.path.join(directory, 'bundled.snapshot'))
+
+        data_path = os.path.join(directory, 'generated')
+        write_synthetic_catalog(data_path, rows)
+        compare(f'generated ({rows} rows)', data_path, os.path.join(directory, 'generated.snapshot'))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
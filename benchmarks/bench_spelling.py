@@ -0,0 +1,64 @@
+"""Benchmark spelling correction of names: SpellingIndex lookups versus comparing the query with every name.
+
+Queries are names with two random edits. Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_spelling [names]
+"""
+import random
+import string
+import sys
+import time
+
+from benchmarks.bench_autocomplete import synthetic_names
+from movie.adapters.spelling_index import SpellingIndex, edit_distance
+
+
+DEFAULT_NAMES = 200000
+QUERIES = 200
+
+
+def misspell(name: str, edits: int = 2):
+    for _ in range(edits):
+        i = random.randrange(len(name))
+        edit = random.choice(('insert', 'delete', 'substitute'))
+        if edit == 'insert':
+            name = name[:i] + random.choice(string.ascii_lowercase) + name[i:]
+        elif edit == 'delete':
+            name = name[:i] + name[i + 1:]
+        else:
+            name = name[:i] + random.choice(string.ascii_lowercase) + name[i + 1:]
+    return name
+
+
+def scan(names, term: str, max_distance: int = 2):
+    # Spelling correction without an index: an edit distance computation per name.
+    term = term.casefold()
+    return sorted((name, distance) for name in names
+                  for distance in [edit_distance(term, name.casefold(), max_distance)] if distance <= max_distance)
+
+
+def main(count: int):
+    random.seed(235)
+    names = list(synthetic_names(count))
+    index = SpellingIndex()
+    start = time.perf_counter()
+    for name in names:
+        index.add(name)
+    print(f'Indexed {count} names in {time.perf_counter() - start:.1f} s')
+
+    queries = [misspell(random.choice(names)) for _ in range(QUERIES)]
+    start = time.perf_counter()
+    for query in queries[:10]:
+        assert scan(names, query) == sorted(index.lookup(query))
+    scan_time = (time.perf_counter() - start) / 10
+
+    start = time.perf_counter()
+    for query in queries:
+        index.lookup(query)
+    lookup_time = (time.perf_counter() - start) / len(queries)
+    print(f'scan {scan_time * 1e3:.1f} ms per query, index {lookup_time * 1e3:.2f} ms per query '
+          f'({scan_time / lookup_time:.0f}x)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NAMES)
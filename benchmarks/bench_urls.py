@@ -0,0 +1,62 @@
+"""Benchmark the URL building of one listing page: url_for for every name and movie versus the cached URL layer.
+
+Each page links every genre in the navigation, the actor page links every actor, and each listed movie gets two
+links. Before, all of those were built with url_for on every request; now the name maps are built once per
+application and movie links come from builders. Run from the MovieWebApp directory:
+
+    python -m benchmarks.bench_urls [movies ...]
+"""
+import sys
+import tempfile
+import timeit
+
+from flask import url_for
+
+from benchmarks.catalog import write_synthetic_catalog
+from movie import create_app
+import movie.adapters.repository as repo
+import movie.utilities.utilities as utilities
+
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+MOVIES_PER_PAGE = 10
+
+
+def url_for_everything(movie_ids):
+    genre_urls = {genre.genre_name: url_for('movies_bp.movies_by_genre', genre=genre.genre_name)
+                  for genre in repo.repo_instance.get_genres()}
+    actor_urls = {actor.actor_full_name: url_for('home_bp.movies_by_actor', actor=actor.actor_full_name)
+                  for actor in repo.repo_instance.get_actors()}
+    movie_urls = [(url_for('movies_bp.movies_by_genre', genre='Drama', page_size=MOVIES_PER_PAGE,
+                           view_comments_for=movie_id),
+                   url_for('movies_bp.review_on_movie', movie=movie_id)) for movie_id in movie_ids]
+    return genre_urls, actor_urls, movie_urls
+
+
+def cached_url_layer(movie_ids):
+    genre_urls = utilities.get_genres_and_urls()
+    actor_urls = utilities.get_actors_and_urls()
+    view_review_url = utilities.get_url_builder('movies_bp.movies_by_genre', 'view_comments_for', genre='Drama',
+                                                page_size=MOVIES_PER_PAGE)
+    add_review_url = utilities.get_url_builder('movies_bp.review_on_movie', 'movie')
+    movie_urls = [(view_review_url(movie_id), add_review_url(movie_id)) for movie_id in movie_ids]
+    return genre_urls, actor_urls, movie_urls
+
+
+def main(sizes):
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_path:
+            write_synthetic_catalog(data_path, size)
+            app = create_app({'TESTING': True, 'TEST_DATA_PATH': data_path, 'CATALOG_SNAPSHOT': data_path + '/none'})
+
+        movie_ids = list(range(1, MOVIES_PER_PAGE + 1))
+        with app.test_request_context():
+            assert url_for_everything(movie_ids) == cached_url_layer(movie_ids)
+            before = timeit.timeit(lambda: url_for_everything(movie_ids), number=5) / 5
+            after = timeit.timeit(lambda: cached_url_layer(movie_ids), number=1000) / 1000
+        print(f'{size:>8} movies, {len(repo.repo_instance.get_actors()):>7} actors: '
+              f'url_for per request {before * 1e3:9.3f} ms, cached {after * 1e3:7.4f} ms')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
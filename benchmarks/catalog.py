@@ -0,0 +1,52 @@
+"""Synthetic catalogs for the benchmarks, generated by repeating the bundled moviefile.csv.
+
+Each repetition of the bundled rows gets its own titles and people, so entity counts grow with the catalog.
+"""
+import csv
+import os
+import shutil
+
+from movie.adapters import memory_repository
+from movie.adapters.memory_repository import MemoryRepository
+
+
+BUNDLED_DATA_PATH = os.path.join('movie', 'adapters', 'data')
+
+
+def bundled_rows():
+    with open(os.path.join(BUNDLED_DATA_PATH, 'moviefile.csv'), encoding='utf-8-sig') as infile:
+        reader = csv.reader(infile)
+        headers = next(reader)
+        return headers, list(reader)
+
+
+def synthetic_rows(size: int):
+    headers, rows = bundled_rows()
+    for i in range(size):
+        row = list(rows[i % len(rows)])
+        copy = i // len(rows)
+        if copy > 0:
+            row[1] = f'{row[1]} {copy}'
+            row[4] = f'{row[4]} {copy}'
+            row[5] = ','.join(f'{actor.strip()} {copy}' for actor in row[5].split(','))
+        row[0] = str(i + 1)
+        yield row
+
+
+def write_synthetic_catalog(data_path: str, size: int):
+    # Writes a moviefile.csv of size rows to data_path, along with a copy of the bundled users.csv.
+    os.makedirs(data_path, exist_ok=True)
+    headers, rows = bundled_rows()
+    with open(os.path.join(data_path, 'moviefile.csv'), 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(headers)
+        writer.writerows(synthetic_rows(size))
+    shutil.copy(os.path.join(BUNDLED_DATA_PATH, 'users.csv'), data_path)
+
+
+def build_synthetic_repository(size: int) -> MemoryRepository:
+    # Builds a repository holding size synthetic movies, without going through a CSV file.
+    repo = MemoryRepository()
+    parsed_rows = [memory_repository.parse_movie_row(row) for row in synthetic_rows(size)]
+    memory_repository.add_parsed_movies(parsed_rows, repo)
+    return repo
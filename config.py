@@ -15,3 +15,18 @@ class Config:
 
     SECRET_KEY = environ.get('SECRET_KEY')
 
+    # Catalog ingestion: worker processes used to parse moviefile.csv (1 parses in-process), and the size in bytes
+    # of the chunks handed to each worker.
+    INGEST_WORKERS = int(environ.get('INGEST_WORKERS', 1))
+    INGEST_CHUNK_SIZE = int(environ.get('INGEST_CHUNK_SIZE', 4 * 1024 * 1024))
+
+    # Catalog snapshot written by 'flask snapshot'; defaults to catalog.snapshot in the data directory.
+    CATALOG_SNAPSHOT = environ.get('CATALOG_SNAPSHOT')
+
+    # Template fragment cache: FRAGMENT_CACHE=0 turns it off, and FRAGMENT_CACHE_SIZE bounds the number of fragments.
+    FRAGMENT_CACHE = environ.get('FRAGMENT_CACHE', '1') != '0'
+    FRAGMENT_CACHE_SIZE = int(environ.get('FRAGMENT_CACHE_SIZE', 4096))
+
+    # Response compression: COMPRESS_RESPONSES=0 sends HTML and JSON uncompressed; COMPRESS_LEVEL is the gzip level.
+    COMPRESS_RESPONSES = environ.get('COMPRESS_RESPONSES', '1') != '0'
+    COMPRESS_LEVEL = int(environ.get('COMPRESS_LEVEL', 6))
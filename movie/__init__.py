@@ -2,10 +2,16 @@
 
 import os
 
+import click
 from flask import Flask
 
 import movie.adapters.repository as repo
-from movie.adapters.memory_repository import MemoryRepository, populate
+import movie.adapters.snapshot as snapshot
+from movie.adapters.memory_repository import MemoryRepository, populate, users_file_is_hashed, hash_users_file, \
+    DEFAULT_INGEST_CHUNK_SIZE
+from movie.utilities.compression import ResponseCompression
+from movie.utilities.fragment_cache import FragmentCache, FragmentCacheExtension, DEFAULT_FRAGMENT_CACHE_SIZE
+from movie.utilities.static_assets import StaticAssets, build_static_assets
 
 
 def create_app(test_config=None):
@@ -23,9 +29,56 @@ def create_app(test_config=None):
         app.config.from_mapping(test_config)
         data_path = app.config['TEST_DATA_PATH']
 
-    # Create the MemoryRepository implementation for a memory-based repository.
-    repo.repo_instance = MemoryRepository()
-    populate(data_path, repo.repo_instance)
+    # Create the MemoryRepository implementation for a memory-based repository. A catalog snapshot built from the
+    # current CSV files is loaded as is; otherwise the repository is populated from the CSV files.
+    snapshot_path = app.config.get('CATALOG_SNAPSHOT') or os.path.join(data_path, snapshot.SNAPSHOT_FILE_NAME)
+    repo.repo_instance = snapshot.read_snapshot(data_path, snapshot_path)
+
+    if repo.repo_instance is not None:
+        app.logger.info('Loaded catalog snapshot %s', snapshot_path)
+    else:
+        repo.repo_instance = MemoryRepository()
+        report = populate(data_path, repo.repo_instance,
+                          ingest_workers=app.config.get('INGEST_WORKERS', 1),
+                          ingest_chunk_size=app.config.get('INGEST_CHUNK_SIZE', DEFAULT_INGEST_CHUNK_SIZE))
+        app.logger.info('Loaded %(movies)d movies, %(actors)d actors, %(directors)d directors, %(genres)d genres and '
+                        '%(users)d users; resident memory %(rss_before)s -> %(rss_after)s bytes', report)
+
+    # Cache rendered template fragments, emptied whenever the catalog changes, unless FRAGMENT_CACHE is off.
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if app.config.get('FRAGMENT_CACHE', True):
+        app.jinja_env.fragment_cache = FragmentCache(
+            lambda: (id(repo.repo_instance), repo.repo_instance.get_catalog_version()),
+            app.config.get('FRAGMENT_CACHE_SIZE', DEFAULT_FRAGMENT_CACHE_SIZE))
+
+    # Serve static files under fingerprinted names, cached for good, and compress HTML and JSON responses unless
+    # COMPRESS_RESPONSES is off.
+    StaticAssets(app)
+    if app.config.get('COMPRESS_RESPONSES', True):
+        ResponseCompression(app)
+
+    @app.cli.command('hash-users')
+    @click.option('--workers', type=int, default=None, help='Number of hashing processes (default: CPU count).')
+    def hash_users_command(workers):
+        """Replace the plaintext passwords in users.csv with password hashes, so that starts don't hash them."""
+        file_name = os.path.join(data_path, 'users.csv')
+        if users_file_is_hashed(file_name):
+            click.echo(f'{file_name} already holds password hashes')
+            return
+        count = hash_users_file(file_name, file_name, workers)
+        click.echo(f'Hashed the passwords of {count} users in {file_name}')
+
+    @app.cli.command('snapshot')
+    def snapshot_command():
+        """Write the catalog to a snapshot file, which later starts load instead of parsing the CSV files."""
+        snapshot.write_snapshot(repo.repo_instance, data_path, snapshot_path)
+        click.echo(f'Wrote catalog snapshot {snapshot_path}')
+
+    @app.cli.command('build-static')
+    def build_static_command():
+        """Fingerprint the static files and gzip the text ones, so that starts read the manifest instead."""
+        manifest = build_static_assets(app.static_folder)
+        click.echo(f'Fingerprinted {len(manifest)} static files in {app.static_folder}')
 
     # Build the application - these steps require an application context.
     with app.app_context():
@@ -42,4 +95,10 @@ def create_app(test_config=None):
         from .utilities import utilities
         app.register_blueprint(utilities.utilities_blueprint)
 
+        from .search import search
+        app.register_blueprint(search.search_blueprint)
+
+        from .api import api
+        app.register_blueprint(api.api_blueprint)
+
     return app
@@ -0,0 +1,170 @@
+from array import array
+
+import numpy as np
+
+
+class CoStarGraph:
+    # Actors linked by the movies they appeared in together. Actors are numbered in the order they are first seen,
+    # and the graph is held in compressed sparse row form: the neighbours of actor i are
+    # neighbours[offsets[i]:offsets[i + 1]], sorted, with the id of one movie they share alongside in edge_movie_ids.
+    # Edges from movies added since the last build wait in flat arrays and are merged into the sorted arrays by the
+    # next build, which searches run first if needed.
+
+    def __init__(self):
+        self._names = list()
+        self._ids = dict()
+        self._sources = array('q')
+        self._targets = array('q')
+        self._movie_ids = array('q')
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._neighbours = np.empty(0, dtype=np.int64)
+        self._edge_movie_ids = np.empty(0, dtype=np.int64)
+        self._built = True
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name: str):
+        return name in self._ids
+
+    @property
+    def number_of_edges(self):
+        # The number of distinct pairs of co-stars, once built.
+        return len(self._neighbours) // 2
+
+    def _actor_id(self, name: str):
+        actor_id = self._ids.get(name)
+        if actor_id is None:
+            actor_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return actor_id
+
+    def add_movie(self, movie_id: int, actor_names):
+        actor_ids = list(dict.fromkeys(self._actor_id(name) for name in actor_names))
+        for i, source in enumerate(actor_ids):
+            for target in actor_ids[i + 1:]:
+                self._sources.append(source)
+                self._targets.append(target)
+                self._movie_ids.append(movie_id)
+        self._built = False
+
+    def build(self):
+        # Merges the edges added since the last build into the CSR arrays. Each pair of co-stars is kept once in each
+        # direction, with the lowest id of the movies they share. Only the new edges are sorted; they are then
+        # inserted into the existing arrays in one linear pass, so that adding a movie doesn't re-sort every edge.
+        if self._built:
+            return
+        sources = np.frombuffer(self._sources, dtype=np.int64)
+        targets = np.frombuffer(self._targets, dtype=np.int64)
+        movie_ids = np.frombuffer(self._movie_ids, dtype=np.int64)
+        sources, targets = np.concatenate((sources, targets)), np.concatenate((targets, sources))
+        movie_ids = np.concatenate((movie_ids, movie_ids))
+
+        order = np.lexsort((movie_ids, targets, sources))
+        sources, targets, movie_ids = sources[order], targets[order], movie_ids[order]
+        first = np.ones(len(sources), dtype=bool)
+        first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+        sources, targets, movie_ids = sources[first], targets[first], movie_ids[first]
+
+        # Edges are ordered by source, then target, so each is found in the existing arrays by a single key.
+        number_of_actors = len(self._names)
+        degrees = np.zeros(number_of_actors, dtype=np.int64)
+        degrees[:len(self._offsets) - 1] = np.diff(self._offsets)
+        keys = np.repeat(np.arange(len(self._offsets) - 1), degrees[:len(self._offsets) - 1]) * number_of_actors + \
+            self._neighbours
+        new_keys = sources * number_of_actors + targets
+        positions = np.searchsorted(keys, new_keys)
+        known = positions < len(keys)
+        known[known] = keys[positions[known]] == new_keys[known]
+
+        # Co-stars already linked keep the lowest id of the movies they share; the other edges are inserted in order.
+        self._edge_movie_ids[positions[known]] = np.minimum(self._edge_movie_ids[positions[known]], movie_ids[known])
+        new = ~known
+        if len(keys):
+            self._neighbours = np.insert(self._neighbours, positions[new], targets[new])
+            self._edge_movie_ids = np.insert(self._edge_movie_ids, positions[new], movie_ids[new])
+        else:
+            self._neighbours, self._edge_movie_ids = targets, movie_ids
+        degrees += np.bincount(sources[new], minlength=number_of_actors)
+        self._offsets = np.zeros(number_of_actors + 1, dtype=np.int64)
+        np.cumsum(degrees, out=self._offsets[1:])
+
+        self._sources = array('q')
+        self._targets = array('q')
+        self._movie_ids = array('q')
+        self._built = True
+
+    def costars(self, name: str):
+        # Returns the names of the actors who appeared in a movie with name.
+        self.build()
+        actor_id = self._ids.get(name)
+        if actor_id is None:
+            return []
+        neighbours = self._neighbours[self._offsets[actor_id]:self._offsets[actor_id + 1]]
+        return [self._names[neighbour] for neighbour in neighbours.tolist()]
+
+    def _expand(self, frontier, distances, reached_by):
+        # Visits the unvisited neighbours of every actor in frontier at once, recording for each the index of an edge
+        # that reached it, and returns them as the next frontier.
+        starts = self._offsets[frontier]
+        counts = self._offsets[frontier + 1] - starts
+        if counts.sum() == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # The edge indices of all the frontier's neighbours, built without a Python loop over the frontier.
+        edges = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts) + np.arange(counts.sum())
+        neighbours = self._neighbours[edges]
+        unvisited = distances[neighbours] < 0
+        neighbours, edges = neighbours[unvisited], edges[unvisited]
+
+        # Where several edges reach the same actor, one of the writes wins; keeping the edges whose write won gives
+        # each newly reached actor once, without sorting.
+        reached_by[neighbours] = edges
+        neighbours = neighbours[reached_by[neighbours] == edges]
+        distances[neighbours] = distances[frontier[0]] + 1
+        return neighbours
+
+    def shortest_path(self, name: str, other_name: str):
+        # Returns the shortest chain of co-stars linking two actors, as (actor, movie id, actor) steps, an empty list
+        # if they are the same actor, or None if either is unknown or they aren't linked. The search runs breadth
+        # first from both ends, a whole level at a time, always expanding the smaller frontier.
+        self.build()
+        source, target = self._ids.get(name), self._ids.get(other_name)
+        if source is None or target is None:
+            return None
+        if source == target:
+            return []
+
+        # Only distances need initialising: the edge that reached an actor is only read once it has been reached.
+        sides = list()
+        for start in (source, target):
+            distances = np.full(len(self._names), -1, dtype=np.int32)
+            distances[start] = 0
+            sides.append({'frontier': np.array([start], dtype=np.int64), 'distances': distances,
+                          'reached_by': np.empty(len(self._names), dtype=np.int64)})
+
+        while len(sides[0]['frontier']) and len(sides[1]['frontier']):
+            side, other = (sides[0], sides[1]) if len(sides[0]['frontier']) <= len(sides[1]['frontier']) else \
+                (sides[1], sides[0])
+            side['frontier'] = self._expand(side['frontier'], side['distances'], side['reached_by'])
+
+            # Every actor just reached is at the same distance from this side, so the shortest path goes through
+            # whichever of them the other side reached first.
+            meetings = side['frontier'][other['distances'][side['frontier']] >= 0]
+            if len(meetings):
+                meeting = int(meetings[np.argmin(other['distances'][meetings])])
+                return self._path(meeting, sides[0]) + [(b, movie_id, a) for a, movie_id, b in
+                                                        reversed(self._path(meeting, sides[1]))]
+        return None
+
+    def _path(self, actor_id: int, side):
+        # The steps from the start of side's search to actor_id. An edge's source is found from its index by
+        # bisecting the offsets.
+        steps = list()
+        while side['distances'][actor_id] > 0:
+            edge = int(side['reached_by'][actor_id])
+            parent = int(np.searchsorted(self._offsets, edge, side='right')) - 1
+            steps.append((parent, int(self._edge_movie_ids[edge]), actor_id))
+            actor_id = parent
+        steps.reverse()
+        return [(self._names[a], movie_id, self._names[b]) for a, movie_id, b in steps]
@@ -0,0 +1,188 @@
+import numpy as np
+
+from movie.adapters.movie_table import MISSING, MovieTable
+
+
+class Leaderboards:
+    # Movie ids ranked best first by each metric: the whole catalog, and the best size movies within each genre and
+    # release year. A metric's rankings are computed together, with one vectorised sort of the catalog and one
+    # partition per group; serving a leaderboard is then a slice. Movies without a value for a metric are left out of
+    # its rankings, and ties are broken by id.
+    #
+    # Built rankings are kept up to date rather than rebuilt: when a movie's metrics or reviews change, update takes
+    # it out of the overall ranking and inserts it back at its new place by bisection, which costs a copy of the
+    # ranking (O(n)) instead of a sort (O(n log n)), and re-ranks only the movie's own genres and year. New movies
+    # have no metrics yet, so adding one leaves the rankings as they are. A full build is only needed after bulk loads.
+    #
+    # 'weighted_rating' is a Bayesian average that pulls ratings backed by few votes towards the catalog mean:
+    # (v * R + m * C) / (v + m), where R is the mean of the movie's CSV rating (counted once per vote) and its users'
+    # review ratings, v is the number of those votes and reviews, C is the mean R of the catalog and m is
+    # minimum_votes (the median v by default). C and m are fixed when the ranking is built: a review or metric change
+    # only moves the movie it concerns, weighted with that prior, until the next build.
+
+    def __init__(self, size: int = 100, minimum_votes: int = None):
+        self._size = size
+        self._minimum_votes = minimum_votes
+        self._review_counts = np.zeros(0, dtype=np.int64)
+        self._review_totals = np.zeros(0, dtype=np.float64)
+        self._rankings = dict()
+
+    @property
+    def size(self):
+        return self._size
+
+    def is_built(self, metric: str):
+        return metric in self._rankings
+
+    def invalidate(self, metric: str = None):
+        if metric is None:
+            self._rankings.clear()
+        else:
+            self._rankings.pop(metric, None)
+
+    def add_review(self, movie_id: int, rating: int):
+        # Records a review rating; update then moves the movie in the built rankings.
+        row = movie_id - 1
+        if row >= len(self._review_counts):
+            capacity = max(row + 1, 2 * len(self._review_counts))
+            self._review_counts = np.concatenate(
+                (self._review_counts, np.zeros(capacity - len(self._review_counts), dtype=np.int64)))
+            self._review_totals = np.concatenate(
+                (self._review_totals, np.zeros(capacity - len(self._review_totals), dtype=np.float64)))
+        self._review_counts[row] += 1
+        self._review_totals[row] += rating
+
+    def _reviews(self, rows):
+        counts = np.zeros(len(rows), dtype=np.float64)
+        totals = np.zeros(len(rows), dtype=np.float64)
+        reviewed = rows < len(self._review_counts)
+        counts[reviewed] = self._review_counts[rows[reviewed]]
+        totals[reviewed] = self._review_totals[rows[reviewed]]
+        return counts, totals
+
+    def weighted_ratings(self, table: MovieTable, rows=None, prior=None):
+        # Returns the weighted ratings of rows of table (every row by default), NaN where a movie has neither votes
+        # nor reviews, and the (catalog mean, minimum votes) prior they were weighted with. The prior is computed from
+        # the rows unless given; it is None if none of them is rated.
+        rows = np.arange(len(table)) if rows is None else rows
+        ratings = table.column('rating')[rows]
+        votes = table.column('votes')[rows].astype(np.float64)
+        votes[(votes == MISSING) | np.isnan(ratings)] = 0
+        counts, totals = self._reviews(rows)
+
+        number_of_votes = votes + counts
+        rated = number_of_votes > 0
+        scores = np.full(len(rows), np.nan)
+        if not rated.any():
+            return scores, prior
+
+        means = (np.nan_to_num(ratings[rated]) * votes[rated] + totals[rated]) / number_of_votes[rated]
+        if prior is None:
+            minimum_votes = self._minimum_votes
+            if minimum_votes is None:
+                minimum_votes = float(np.median(number_of_votes[rated]))
+            prior = (means.mean(), minimum_votes)
+        catalog_mean, minimum_votes = prior
+        scores[rated] = (number_of_votes[rated] * means + minimum_votes * catalog_mean) / \
+            (number_of_votes[rated] + minimum_votes)
+        return scores, prior
+
+    def _scores(self, metric: str, table: MovieTable, rows=None, prior=None):
+        if metric == 'weighted_rating':
+            return self.weighted_ratings(table, rows, prior)
+        values = table.column(metric)
+        scores = (values if rows is None else values[rows]).astype(np.float64)
+        scores[scores == MISSING] = np.nan
+        return scores, None
+
+    def build(self, metric: str, table: MovieTable, groups):
+        # Ranks the movies of table by metric, overall and within each (key, sorted movie ids) pair of groups.
+        scores, prior = self._scores(metric, table)
+        movie_ids = table.column('id')
+        valid = ~np.isnan(scores)
+        ranked = movie_ids[valid][np.lexsort((movie_ids[valid], -scores[valid]))]
+
+        # The position of every movie in the overall ranking, so that the best of a group are its lowest positions.
+        positions = np.full(len(table) + 1, len(ranked), dtype=np.int64)
+        positions[ranked - 1] = np.arange(len(ranked))
+
+        rankings = {None: ranked}
+        for key, group_movie_ids in groups:
+            group_positions = positions[np.asarray(group_movie_ids, dtype=np.int64) - 1]
+            group_positions = group_positions[group_positions < len(ranked)]
+            if len(group_positions) > self._size:
+                group_positions = np.partition(group_positions, self._size - 1)[:self._size]
+            rankings[key] = ranked[np.sort(group_positions)]
+        # The negated scores of the overall ranking, ascending, for bisecting in update.
+        self._rankings[metric] = {'scores': scores, 'rankings': rankings, 'prior': prior,
+                                  'keys': -scores[ranked - 1]}
+
+    def update(self, movie_id: int, table: MovieTable, groups, metrics=None):
+        # Moves a movie whose metrics or reviews changed to its new place in the built rankings of metrics (every
+        # metric by default). groups are the (key, sorted movie ids) pairs of the genres and year of the movie.
+        row = movie_id - 1
+        for metric in self._rankings if metrics is None else metrics:
+            built = self._rankings.get(metric)
+            if built is None:
+                continue
+            if metric == 'weighted_rating' and built['prior'] is None:
+                # Nothing was rated when the ranking was built, so there is no prior to weigh the movie with.
+                self.invalidate(metric)
+                continue
+
+            scores = built['scores']
+            if len(scores) < len(table):
+                scores = built['scores'] = np.concatenate((scores, np.full(len(table) - len(scores), np.nan)))
+            ranked, keys = built['rankings'][None], built['keys']
+            if not np.isnan(scores[row]):
+                index = self._position(ranked, keys, movie_id, -scores[row])
+                ranked, keys = np.delete(ranked, index), np.delete(keys, index)
+            scores[row] = self._scores(metric, table, np.array([row]), built['prior'])[0][0]
+            if not np.isnan(scores[row]):
+                index = self._position(ranked, keys, movie_id, -scores[row])
+                ranked, keys = np.insert(ranked, index, movie_id), np.insert(keys, index, -scores[row])
+            built['rankings'][None], built['keys'] = ranked, keys
+
+            for key, group_movie_ids in groups:
+                built['rankings'][key] = self._update_group(built['rankings'].get(key), scores, movie_id,
+                                                            group_movie_ids)
+
+    @staticmethod
+    def _position(ranked, keys, movie_id: int, key: float):
+        # The index of movie_id with negated score key in the overall ranking, or where it would be inserted.
+        start = np.searchsorted(keys, key, side='left')
+        end = np.searchsorted(keys, key, side='right')
+        return start + np.searchsorted(ranked[start:end], movie_id)
+
+    def _update_group(self, ranked, scores, movie_id: int, group_movie_ids):
+        # Moves movie_id within the best size movies of a group. Every movie left out of a full group ranks below its
+        # last one, so the group only needs ranking afresh when the movie drops to the end of a full group, where
+        # one of those might now outrank it.
+        if ranked is None:
+            return self._rank_group(scores, group_movie_ids)
+        full = len(ranked) == self._size
+        was_ranked = movie_id in ranked
+        ranked = ranked[ranked != movie_id]
+        if np.isnan(scores[movie_id - 1]):
+            return self._rank_group(scores, group_movie_ids) if full and was_ranked else ranked
+        index = self._position(ranked, -scores[ranked - 1], movie_id, -scores[movie_id - 1])
+        if full and index == len(ranked):
+            return self._rank_group(scores, group_movie_ids) if was_ranked else ranked
+        return np.insert(ranked, index, movie_id)[:self._size]
+
+    def _rank_group(self, scores, group_movie_ids):
+        movie_ids = np.asarray(group_movie_ids, dtype=np.int64)
+        group_scores = scores[movie_ids - 1]
+        valid = ~np.isnan(group_scores)
+        movie_ids, group_scores = movie_ids[valid], group_scores[valid]
+        return movie_ids[np.lexsort((movie_ids, -group_scores))[:self._size]]
+
+    def top(self, metric: str, key=None, offset: int = 0, limit: int = 10):
+        # Returns (movie id, score) pairs for up to limit movies of a built ranking, after the first offset. key is
+        # None for the whole catalog, or a group key; groups only hold their best size movies.
+        built = self._rankings[metric]
+        ranked = built['rankings'].get(key)
+        if ranked is None:
+            return []
+        movie_ids = ranked[offset:offset + limit]
+        return list(zip(movie_ids.tolist(), built['scores'][movie_ids - 1].tolist()))
@@ -1,19 +1,40 @@
 import csv
+import heapq
+import io
 import os
+import sys
+import time
 from abc import ABC
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from typing import List
 
 from bisect import bisect, bisect_left, insort_left
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
 from werkzeug.security import generate_password_hash
 
-from movie.adapters.repository import AbstractRepository, RepositoryException
+from movie.adapters.costar_graph import CoStarGraph
+from movie.adapters.leaderboards import Leaderboards
+from movie.adapters.movie_table import MovieTable
+from movie.adapters.prefix_index import PrefixIndex
+from movie.adapters.repository import AbstractRepository, RepositoryException, FILMOGRAPHY_KINDS, LEADERBOARD_METRICS, \
+    NAME_KINDS
+from movie.adapters.search_index import SearchIndex
+from movie.adapters.similarity_index import SimilarityIndex
+from movie.adapters.spelling_index import SpellingIndex
 from movie.domain.model import Movie, Director, User, Genre, Actor, WatchList, Review
 
 
+DEFAULT_INGEST_CHUNK_SIZE = 4 * 1024 * 1024
+USERS_HASH_COLUMN = 'password_hash'
+
+
+# Sorts movies of unknown release year after all others in filmographies.
+UNKNOWN_YEAR = sys.maxsize
+
 class MemoryRepository(AbstractRepository, ABC):
-    # Movies ordered by Title, not id. id is assumed unique.
+    # Movies ordered by id, which is assumed unique. _movies_title is a secondary index ordered by title.
 
     def __init__(self):
         self._movies = list()
@@ -25,48 +46,354 @@ class MemoryRepository(AbstractRepository, ABC):
         self._reviews = list()
         self._directors = list()
 
+        # Name indexes, so that lookups by name don't have to scan the entity lists.
+        self._users_index = dict()
+        self._actors_index = dict()
+        self._genres_index = dict()
+        self._directors_index = dict()
+
+        # Posting lists of movie ids, sorted by id, maintained as movies are added.
+        self._movie_ids_by_actor = dict()
+        self._movie_ids_by_genre = dict()
+        self._movie_ids_by_director = dict()
+
+        # Release year index: year -> sorted movie ids, plus the sorted list of years that have movies.
+        self._movie_ids_by_year = dict()
+        self._release_years = list()
+
+        # Title index: _movies_title is kept sorted by Movie ordering (title, then release year) and _titles holds
+        # the matching titles for bisection. Title-order neighbours are linked by id for previous/next navigation.
+        self._titles = list()
+        self._previous_by_title = dict()
+        self._next_by_title = dict()
+
+        # Columnar copy of the numeric movie attributes, for vectorised filtering.
+        self._movie_table = MovieTable()
+
+        # Full-text index over titles and descriptions.
+        self._search_index = SearchIndex()
+
+        # Prefix indexes over actor, director and genre names, ranked by number of movies, for autocompletion.
+        self._name_prefixes = {kind: PrefixIndex() for kind in NAME_KINDS}
+
+        # Spelling correction indexes over the same names.
+        self._name_spellings = {kind: SpellingIndex() for kind in NAME_KINDS}
+
+        # The movies of each actor and director in release year order, with counts summarising their careers.
+        self._filmographies = {kind: dict() for kind in FILMOGRAPHY_KINDS}
+
+        # Movies ranked by each leaderboard metric, overall and per genre and release year.
+        self._leaderboards = Leaderboards()
+
+        # Actors linked by the movies they appeared in together.
+        self._costar_graph = CoStarGraph()
+
+        # MinHash signatures of the genres, actors and director of each movie, for finding similar movies.
+        self._similarity_index = SimilarityIndex()
+
+        # Increased by every change to the catalog, with the time of the change and, for changes to a movie, the
+        # version of each movie's last change, held in id order; see get_catalog_version.
+        self._catalog_version = 0
+        self._catalog_modified = time.time()
+        self._movie_versions = list()
+
     def add_genre(self, genre: Genre):
         super().add_genre(genre)
         self._genres.append(genre)
+        self._genres_index.setdefault(genre.genre_name, genre)
+        self._catalog_changed()
 
     def get_genres(self):
         return self._genres
 
+    def get_genre(self, genre_name):
+        return self._genres_index.get(genre_name)
+
     def add_review(self, review: Review, movie, user1: User):
-        user = next((user for user in self._users if user == user1), None)
+        user = self._users_index.get(user1.username) if isinstance(user1, User) else None
         super().add_review(review, movie, user)
         self._reviews.append(review)
         movie.add_review(review)
+        if review.rating is not None and movie.id is not None:
+            self._leaderboards.add_review(movie.id, review.rating)
+            self._leaderboards.update(movie.id, self._movie_table, self._movie_leaderboard_groups(movie),
+                                      ('weighted_rating',))
+        self._catalog_changed(movie.id)
 
     def get_reviews(self):
         return self._reviews
 
     def add_user(self, user: User):
         self._users.append(user)
+        self._users_index.setdefault(user.username, user)
 
     def get_user(self, username) -> User:
-        return next((user for user in self._users if user.username == username), None)
+        return self._users_index.get(username)
+
+    def get_users(self):
+        return self._users
 
     def add_actor(self, actor: Actor):
         self._actors.append(actor)
+        self._actors_index.setdefault(actor.actor_full_name, actor)
+        self._catalog_changed()
 
     def get_actor(self, actor_full_name):
-        return next((actor for actor in self._actors if actor.actor_full_name == actor_full_name), None)
+        return self._actors_index.get(actor_full_name)
 
     def get_actors(self):
         return self._actors
 
     def add_director(self, director: Director):
         self._directors.append(director)
+        self._directors_index.setdefault(director.director_full_name, director)
+        self._catalog_changed()
 
     def get_director(self, director_full_name):
-        return next((director for director in self._directors if director.director_full_name == director_full_name),
-                    None)
+        return self._directors_index.get(director_full_name)
+
+    def get_directors(self):
+        return self._directors
 
     def add_movie(self, movie: Movie):
+        self._add_movie_without_title(movie)
+        self._search_index.add(movie.id, movie.title, movie.description)
+        self._index_movie_names(movie)
+        if movie.title is not None:
+            self._add_movie_title(movie)
+
+    def add_movies(self, movies: List[Movie]):
+        # Bulk version of add_movie for loading: the title index is sorted once instead of inserted into per movie,
+        # and the search and name indexes are built in one pass once every movie is in.
+        for movie in movies:
+            self._add_movie_without_title(movie)
+        # Loaders set the metrics of the new movies one at a time next; rather than move each of them in the built
+        # rankings, the rankings are dropped and built once when next needed.
+        self._leaderboards.invalidate()
+        self._search_index.add_many((movie.id, movie.title, movie.description) for movie in movies)
+        self._index_names()
+        self._movies_title.extend(movie for movie in movies if movie.title is not None)
+        self._rebuild_title_index()
+        self._costar_graph.build()
+        self._similarity_index.build()
+
+    def _add_movie_without_title(self, movie: Movie):
         movie.id = len(self._movies) + 1
         self._movies.append(movie)
-        self._movies_title.append(movie)
+        self._movie_table.append(movie.id, movie.release_year, movie.runtime_minutes)
+        self._movie_versions.append(0)
+        self._catalog_changed(movie.id)
+        self._costar_graph.add_movie(movie.id, [actor.actor_full_name for actor in movie.actors])
+        self._similarity_index.add(movie.id, movie_features(movie))
+
+        for actor in movie.actors:
+            insort_left(self._movie_ids_by_actor.setdefault(actor.actor_full_name, []), movie.id)
+        for genre in movie.genres:
+            insort_left(self._movie_ids_by_genre.setdefault(genre.genre_name, []), movie.id)
+        if movie.director is not None:
+            insort_left(self._movie_ids_by_director.setdefault(movie.director.director_full_name, []), movie.id)
+
+        for actor in movie.actors:
+            self._add_to_filmography('actor', actor.actor_full_name, movie)
+        if movie.director is not None:
+            self._add_to_filmography('director', movie.director.director_full_name, movie)
+
+        if movie.release_year is not None:
+            if movie.release_year not in self._movie_ids_by_year:
+                insort_left(self._release_years, movie.release_year)
+            insort_left(self._movie_ids_by_year.setdefault(movie.release_year, []), movie.id)
+
+    def _add_to_filmography(self, kind: str, name: str, movie: Movie):
+        filmography = self._filmographies[kind].get(name)
+        if filmography is None:
+            filmography = self._filmographies[kind][name] = {'years': [], 'movie_ids': [], 'genres': Counter()}
+
+        # Movies are added in id order, so inserting after any movies of the same year keeps ties in id order.
+        year = UNKNOWN_YEAR if movie.release_year is None else movie.release_year
+        index = bisect(filmography['years'], year)
+        filmography['years'].insert(index, year)
+        filmography['movie_ids'].insert(index, movie.id)
+        filmography['genres'].update(genre.genre_name for genre in movie.genres)
+
+    def _movie_ids_by_name(self, kind: str):
+        return {'actor': self._movie_ids_by_actor, 'director': self._movie_ids_by_director,
+                'genre': self._movie_ids_by_genre}[kind]
+
+    def _index_movie_names(self, movie: Movie):
+        # Indexes the names of a movie for suggestions and corrections, weighted by their number of movies.
+        names = [('actor', actor.actor_full_name) for actor in movie.actors]
+        names += [('genre', genre.genre_name) for genre in movie.genres]
+        if movie.director is not None:
+            names.append(('director', movie.director.director_full_name))
+        for kind, name in names:
+            self._name_prefixes[kind].set_weight(name, len(self._movie_ids_by_name(kind)[name]))
+            self._name_spellings[kind].add(name)
+
+    def _index_names(self):
+        # Bulk version of _index_movie_names for loading: every name with movies is indexed once, from the final
+        # posting lists, and the prefix caches are filled afterwards.
+        for kind in NAME_KINDS:
+            movie_ids_by_name = self._movie_ids_by_name(kind)
+            self._name_prefixes[kind].set_weights(
+                (name, len(movie_ids)) for name, movie_ids in movie_ids_by_name.items())
+            for name in movie_ids_by_name:
+                self._name_spellings[kind].add(name)
+
+    def _add_movie_title(self, movie: Movie):
+        index = bisect(self._movies_title, movie)
+        self._movies_title.insert(index, movie)
+        self._titles.insert(index, movie.title)
+
+        previous_id = self._movies_title[index - 1].id if index > 0 else None
+        next_id = self._movies_title[index + 1].id if index + 1 < len(self._movies_title) else None
+        self._previous_by_title[movie.id] = previous_id
+        self._next_by_title[movie.id] = next_id
+        if previous_id is not None:
+            self._next_by_title[previous_id] = movie.id
+        if next_id is not None:
+            self._previous_by_title[next_id] = movie.id
+
+    def _rebuild_title_index(self):
+        self._movies_title.sort()
+        self._titles = [movie.title for movie in self._movies_title]
+
+        ids = [movie.id for movie in self._movies_title]
+        self._previous_by_title = dict(zip(ids, [None] + ids[:-1]))
+        self._next_by_title = dict(zip(ids, ids[1:] + [None]))
+
+    def set_movie_metrics(self, movie_id: int, rating: float = None, votes: int = None, revenue: float = None,
+                          metascore: float = None):
+        self._movie_table.set_metrics(movie_id, rating, votes, revenue, metascore)
+        self._leaderboards.update(movie_id, self._movie_table, self._movie_leaderboard_groups(self.get_movie(movie_id)))
+        self._catalog_changed(movie_id)
+
+    def _leaderboard_groups(self):
+        for genre_name, movie_ids in self._movie_ids_by_genre.items():
+            yield ('genre', genre_name), movie_ids
+        for year, movie_ids in self._movie_ids_by_year.items():
+            yield ('year', year), movie_ids
+
+    def _movie_leaderboard_groups(self, movie: Movie):
+        groups = [(('genre', genre.genre_name), self._movie_ids_by_genre[genre.genre_name]) for genre in movie.genres]
+        if movie.release_year is not None:
+            groups.append((('year', movie.release_year), self._movie_ids_by_year[movie.release_year]))
+        return groups
+
+    def build_leaderboards(self):
+        # Ranks the movies by every leaderboard metric now, rather than on the first request for each.
+        for metric in LEADERBOARD_METRICS:
+            self._leaderboards.build(metric, self._movie_table, self._leaderboard_groups())
+
+    def get_leaderboard(self, metric: str, genre: str = None, year: int = None, offset: int = 0, limit: int = 10):
+        if metric not in LEADERBOARD_METRICS:
+            raise RepositoryException(f'Unknown leaderboard metric {metric}')
+        if not self._leaderboards.is_built(metric):
+            self._leaderboards.build(metric, self._movie_table, self._leaderboard_groups())
+
+        if genre is not None:
+            key = ('genre', genre)
+        elif year is not None:
+            key = ('year', year)
+        else:
+            key = None
+        return self._leaderboards.top(metric, key, offset, limit)
+
+    def get_movie_metric(self, movie_id: int, metric: str):
+        return self._movie_table.value(movie_id, metric)
+
+    def filter_movie_ids(self, conditions) -> List[int]:
+        return self._movie_table.filter(conditions).tolist()
+
+    def iter_filtered_movie_ids(self, conditions):
+        return self._movie_table.iter_filter(conditions)
+
+    @property
+    def movie_table(self):
+        return self._movie_table
+
+    def get_movie_ids_by_filters(self, genres=(), actors=(), director: str = None, year_range=None,
+                                 runtime_range=None) -> List[int]:
+        # The posting lists that matching movies must all appear in, smallest first.
+        postings = [self._movie_ids_by_genre.get(genre_name, []) for genre_name in genres]
+        postings += [self._movie_ids_by_actor.get(actor_name, []) for actor_name in actors]
+        if director is not None:
+            postings.append(self._movie_ids_by_director.get(director, []))
+        postings.sort(key=len)
+
+        conditions = list()
+        if year_range is not None:
+            year_range = _inclusive_bounds(year_range)
+            conditions.append(('year', 'between', year_range))
+        if runtime_range is not None:
+            conditions.append(('runtime', 'between', _inclusive_bounds(runtime_range)))
+
+        # Start from the smallest set of candidates: the shortest posting list, or the movies of the year range if
+        # there are fewer of those. Only without either does a filter have to look at the whole catalog.
+        year_range_is_smallest = year_range is not None and (
+                not postings or self.get_number_of_movies_by_release_year_range(*year_range) < len(postings[0]))
+        if year_range_is_smallest:
+            candidates = sorted(self.get_movie_ids_by_release_year_range(*year_range))
+        elif postings:
+            candidates = postings.pop(0)
+        else:
+            return self._movie_table.filter(conditions).tolist()
+
+        for movie_ids in postings:
+            if not candidates:
+                break
+            candidates = intersect_sorted(candidates, movie_ids)
+
+        if not conditions or not candidates:
+            return list(candidates)
+        return self._movie_table.select(candidates, conditions).tolist()
+
+    def get_number_of_movies_by_release_year_range(self, start_year, end_year):
+        first = bisect_left(self._release_years, start_year)
+        last = bisect(self._release_years, end_year)
+        return sum(len(self._movie_ids_by_year[year]) for year in self._release_years[first:last])
+
+    def get_facet_counts(self, movie_ids=None, limit: int = 10):
+        if movie_ids is None:
+            # The whole catalog: the counts are the lengths of the posting lists.
+            counts = {
+                'genre': {name: len(ids) for name, ids in self._movie_ids_by_genre.items()},
+                'actor': {name: len(ids) for name, ids in self._movie_ids_by_actor.items()},
+                'director': {name: len(ids) for name, ids in self._movie_ids_by_director.items()},
+                'year': {year: len(ids) for year, ids in self._movie_ids_by_year.items()}
+            }
+        else:
+            counts = {facet: Counter() for facet in ('genre', 'actor', 'director', 'year')}
+            for movie_id in movie_ids:
+                movie = self._movies[movie_id - 1]
+                counts['genre'].update(genre.genre_name for genre in movie.genres)
+                counts['actor'].update(actor.actor_full_name for actor in movie.actors)
+                if movie.director is not None:
+                    counts['director'][movie.director.director_full_name] += 1
+                if movie.release_year is not None:
+                    counts['year'][movie.release_year] += 1
+
+        return {facet: heapq.nsmallest(limit, facet_counts.items(), key=lambda item: (-item[1], item[0]))
+                for facet, facet_counts in counts.items()}
+
+    def search_movie_ids(self, query: str, offset: int = 0, limit: int = 10):
+        return self._search_index.search(query, offset, limit)
+
+    def get_name_suggestions(self, prefix: str, kinds=NAME_KINDS, limit: int = 10):
+        suggestions = [(kind, name, number_of_movies) for kind in kinds
+                       for name, number_of_movies in self._name_prefixes[kind].suggest(prefix, limit)]
+        suggestions.sort(key=lambda suggestion: (-suggestion[2], suggestion[1]))
+        return suggestions[:limit]
+
+    def get_name_corrections(self, name: str, kinds=NAME_KINDS, limit: int = 5):
+        corrections = [(kind, correction, distance) for kind in kinds
+                       for correction, distance in self._name_spellings[kind].lookup(name)]
+
+        def rank(correction):
+            kind, correction_name, distance = correction
+            return distance, -self._name_prefixes[kind].weight(correction_name), correction_name
+
+        corrections.sort(key=rank)
+        return corrections[:limit]
 
     def get_movie(self, id: int) -> Movie:
         movie = None
@@ -81,91 +408,133 @@ class MemoryRepository(AbstractRepository, ABC):
         return movie
 
     def get_movies_by_title(self, title: str) -> List[Movie]:
-        matching_movies = list()
-
-        try:
-            for movie in self._movies:
-                if movie.title == title:
-                    matching_movies.append(movie)
-        except ValueError:
-            # No movies for specified title. Simply return an empty list.
-            pass
-        return matching_movies
+        first = bisect_left(self._titles, title)
+        last = bisect(self._titles, title, first)
+        return self._movies_title[first:last]
+
+    def get_movies_by_title_prefix(self, prefix: str, limit: int = None) -> List[Movie]:
+        first = bisect_left(self._titles, prefix)
+        # Every title starting with prefix sorts before prefix followed by the highest code point.
+        last = bisect_left(self._titles, prefix + chr(0x10FFFF), first)
+        if limit is not None:
+            last = min(last, first + limit)
+        return self._movies_title[first:last]
 
     def add_movie_index(self, movie: Movie):
         self._movies_index[movie.id] = movie
 
     def get_movie_ids_for_title(self, title: str):
-        # Linear search, to find the first occurrence of a movie with the wanted title.
-        movie = next((movie for movie in self._movies if movie.title == title), None)
+        return [movie.id for movie in self.get_movies_by_title(title)]
 
-        # Retrieve the ids of movies associated with the title.
-        if movie is not None:
-            movie_ids = [movie.id for movie in movie.title]
-        else:
-            movie_ids = list()
+    def get_movie_ids_by_genre(self, genre_name: str):
+        # The stored posting list is returned as is; callers slice it rather than copy it.
+        return self._movie_ids_by_genre.get(genre_name, list())
 
-        return movie_ids
+    def get_movie_ids_by_actor(self, actor_name: str):
+        return self._movie_ids_by_actor.get(actor_name, list())
 
-    def get_movie_ids_by_genre(self, genre_name: str):
-        # Linear search, to find the first occurrence of the wanted genre.
-        genre = next((genre for genre in self._genres if genre.genre_name == genre_name), None)
+    def get_movie_ids_by_director(self, director_name: str):
+        return self._movie_ids_by_director.get(director_name, list())
 
-        # Retrieve the ids of movies with the Genre
-        if genre is not None:
-            movie_ids = [movie.id for movie in self._movies if genre in movie.genres]
-        else:
-            # No movies with this particular genre, so return an empty list.
-            movie_ids = list()
+    def get_filmography(self, kind: str, name: str, offset: int = 0, limit: int = 10) -> List[int]:
+        filmography = self._filmographies[kind].get(name)
+        if filmography is None:
+            return []
+        return filmography['movie_ids'][offset:offset + limit]
 
-        return movie_ids
+    def get_career_summary(self, kind: str, name: str, number_of_genres: int = 5):
+        filmography = self._filmographies[kind].get(name)
+        if filmography is None:
+            return None
 
-    def get_movie_ids_by_actor(self, actor_name: str):
-        # Linear search, to find the first occurrence of the wanted actor
-        actor = next((actor for actor in self._actors if actor.actor_full_name == actor_name), None)
+        known_years = filmography['years'][:bisect_left(filmography['years'], UNKNOWN_YEAR)]
+        return {
+            'number_of_movies': len(filmography['movie_ids']),
+            'first_year': known_years[0] if known_years else None,
+            'last_year': known_years[-1] if known_years else None,
+            'genres': filmography['genres'].most_common(number_of_genres)
+        }
 
-        # Retrieve the ids of movies starring the actor.
-        if actor is not None:
-            movie_ids = [movie.id for movie in self._movies if actor in movie.actors]
-        else:
-            # No movie starring this actor, so return an empty list.
-            movie_ids = list()
+    def get_similar_movies(self, movie_id: int, limit: int = 5):
+        return self._similarity_index.similar(movie_id, limit)
 
-        return movie_ids
+    def _catalog_changed(self, movie_id: int = None):
+        self._catalog_version += 1
+        self._catalog_modified = time.time()
+        if movie_id is not None and 0 < movie_id <= len(self._movie_versions):
+            self._movie_versions[movie_id - 1] = self._catalog_version
 
-    def get_movies_by_genre(self, target_genre: Genre) -> List[Movie]:
-        # Linear search, to find the first occurrence of the wanted genre.
-        genre = next((genre for genre in self._genres if genre.genre_name == target_genre), None)
+    def get_catalog_version(self) -> int:
+        return self._catalog_version
 
-        # Retrieve the ids of movies with the Genre
-        if genre is not None:
-            movies = [movie for movie in genre.genre_movies]
-        else:
-            # No movies with this particular genre, so return an empty list.
-            movies = list()
+    def get_catalog_last_modified(self) -> datetime:
+        return datetime.fromtimestamp(self._catalog_modified, timezone.utc)
 
-        return movies
+    def get_movie_version(self, movie_id: int):
+        if 0 < movie_id <= len(self._movie_versions):
+            return self._movie_versions[movie_id - 1]
+        return None
+
+    def get_costar_names(self, actor_name: str) -> List[str]:
+        return self._costar_graph.costars(actor_name)
+
+    def get_costar_path(self, actor_name: str, other_actor_name: str):
+        return self._costar_graph.shortest_path(actor_name, other_actor_name)
+
+    def _posting_list(self, kind: str, name: str):
+        postings = {'genre': self._movie_ids_by_genre, 'actor': self._movie_ids_by_actor,
+                    'director': self._movie_ids_by_director}[kind]
+        return postings.get(name, [])
+
+    def get_movie_ids_page(self, kind: str, name: str, after=None, before=None, limit: int = 10) -> List[int]:
+        movie_ids = self._posting_list(kind, name)
+        if before is not None:
+            end = bisect_left(movie_ids, before)
+            return movie_ids[max(0, end - limit):end]
+
+        start = 0 if after is None else bisect(movie_ids, after)
+        return movie_ids[start:start + limit]
+
+    def get_number_of_movies_by_name(self, kind: str, name: str) -> int:
+        return len(self._posting_list(kind, name))
+
+    def get_movies_by_genre(self, target_genre: Genre) -> List[Movie]:
+        return [self._movies[movie_id - 1] for movie_id in self._movie_ids_by_genre.get(target_genre, [])]
 
     def get_movies_by_release_year(self, target_year: int) -> List[Movie]:
-        matching_movies = list()
+        return [self._movies[movie_id - 1] for movie_id in self._movie_ids_by_year.get(target_year, [])]
 
-        for movie in self._movies:
-            if movie.release_year == target_year:
-                matching_movies.append(movie)
-            else:
-                continue
-        return matching_movies
+    def get_movie_ids_by_release_year_range(self, start_year: int, end_year: int) -> List[int]:
+        first = bisect_left(self._release_years, start_year)
+        last = bisect(self._release_years, end_year)
+
+        movie_ids = list()
+        for year in self._release_years[first:last]:
+            movie_ids.extend(self._movie_ids_by_year[year])
+        return movie_ids
+
+    def get_first_release_year(self):
+        return self._release_years[0] if self._release_years else None
+
+    def get_last_release_year(self):
+        return self._release_years[-1] if self._release_years else None
+
+    def get_previous_release_year(self, year: int):
+        index = bisect_left(self._release_years, year)
+        return self._release_years[index - 1] if index > 0 else None
+
+    def get_next_release_year(self, year: int):
+        index = bisect(self._release_years, year)
+        return self._release_years[index] if index < len(self._release_years) else None
 
     def get_number_of_movies(self):
         return len(self._movies)
 
     def get_first_movie(self):
-
-        return self._movies[0]
+        return self._movies[0] if self._movies else None
 
     def get_last_movie(self):
-        print(self._movies)
-        return self._movies[-1]
+        return self._movies[-1] if self._movies else None
 
     def get_movies_by_id(self, id_list):
         # Strip out any ids in id_list that don't represent Movie ids in the repository.
@@ -175,42 +544,20 @@ class MemoryRepository(AbstractRepository, ABC):
         movies = [self._movies_index[id] for id in existing_ids]
         return movies
 
-    # Helper method to return movie index.
+    # Helper method to return the position of movie in title order.
     def movie_index(self, movie: Movie):
-        index = bisect_left(self._movies, movie)
-        if index != len(self._movies) and self._movies[index].release_year == movie.release_year:
-            return index
+        index = bisect_left(self._movies_title, movie)
+        while index < len(self._movies_title) and self._movies_title[index] == movie:
+            if self._movies_title[index] is movie:
+                return index
+            index += 1
         raise ValueError
 
     def get_id_of_previous_movie(self, movie: Movie):
-        previous_id = None
-
-        try:
-            index = self.movie_index(movie)
-            for stored_movie in reversed(self._movies[0:index]):
-                if stored_movie.id < movie.id:
-                    previous_id = stored_movie.id
-                    break
-        except ValueError:
-            # No earlier movies, so return None.
-            pass
-
-        return previous_id
+        return self._previous_by_title.get(movie.id)
 
     def get_id_of_next_movie(self, movie: Movie):
-        next_id = None
-
-        try:
-            index = self.movie_index(movie)
-            for stored_movie in self._movies[index + 1:len(self._movies)]:
-                if stored_movie.id > movie.id:
-                    next_id = stored_movie.id
-                    break
-        except ValueError:
-            # No subsequent movies, so return None.
-            pass
-
-        return next_id
+        return self._next_by_title.get(movie.id)
 
     @property
     def movies_index(self):
@@ -221,6 +568,35 @@ class MemoryRepository(AbstractRepository, ABC):
         return self._movies
 
 
+def movie_features(movie: Movie) -> List[str]:
+    # The features that similar movies share, tagged with their kind so that e.g. a genre and a person can't match.
+    features = ['genre:' + genre.genre_name for genre in movie.genres]
+    features.extend('actor:' + actor.actor_full_name for actor in movie.actors)
+    if movie.director is not None:
+        features.append('director:' + movie.director.director_full_name)
+    return features
+
+
+def intersect_sorted(smaller: List[int], larger: List[int]) -> List[int]:
+    # Returns the ids in both sorted lists. Each id of smaller is looked up in larger by bisection, starting from where
+    # the previous lookup ended, so the cost grows with len(smaller) but only logarithmically with len(larger).
+    intersection = list()
+    start = 0
+    for movie_id in smaller:
+        start = bisect_left(larger, movie_id, start)
+        if start == len(larger):
+            break
+        if larger[start] == movie_id:
+            intersection.append(movie_id)
+    return intersection
+
+
+def _inclusive_bounds(bounds):
+    # A (low, high) range where either end may be None for unbounded.
+    low, high = bounds
+    return float('-inf') if low is None else low, float('inf') if high is None else high
+
+
 def read_csv_file(filename: str):
     with open(filename, encoding='utf-8-sig') as infile:
         reader = csv.reader(infile)
@@ -235,49 +611,213 @@ def read_csv_file(filename: str):
             yield row
 
 
-def load_movies_and_ids(data_path: str, repo: MemoryRepository):
-    ids = dict()
-    for row in read_csv_file(os.path.join(data_path, 'moviefile.csv')):
-        movie = Movie(row[1], int(row[6]))
-        movie.id = int(row[0])
-        movie.description = row[3]
-        movie.runtime_minutes = int(row[7])
-
-        director = Director(row[4])
+# The repository's name indexes act as the registry of canonical entities while loading: each actor, director and
+# genre is created once and then shared by every movie that refers to it.
+
+def intern_actor(actor_full_name: str, repo: MemoryRepository) -> Actor:
+    actor = repo.get_actor(actor_full_name.strip())
+    if actor is None:
+        actor = Actor(actor_full_name)
+        repo.add_actor(actor)
+    return actor
+
+
+def intern_director(director_full_name: str, repo: MemoryRepository) -> Director:
+    director = repo.get_director(director_full_name.strip())
+    if director is None:
+        director = Director(director_full_name)
         repo.add_director(director)
-        movie.director = director
-
-        parsed_genres = row[2].split(',')
-        for genre_string in parsed_genres:
-            genre = Genre(genre_string)
-            movie.add_genre(genre)
-            repo.add_genre(genre)
-
-            parsed_actors = row[5].split(',')
-            for actor_string in parsed_actors:
-                actor = Actor(actor_string)
-                repo.add_actor(actor)
-                movie.add_actor(actor)
-
-        # Add the Movie to the repository.
-        repo.add_movie(movie)
+    return director
+
+
+def intern_genre(genre_name: str, repo: MemoryRepository) -> Genre:
+    genre = repo.get_genre(genre_name.strip())
+    if genre is None:
+        genre = Genre(genre_name)
+        repo.add_genre(genre)
+    return genre
+
+
+def parse_movie_row(row):
+    # Validates a row of moviefile.csv and returns its fields as plain values, which can be passed between processes.
+    if len(row) < 8:
+        raise ValueError(f'Malformed movie row: {row}')
+
+    return (
+        int(row[0]),                                        # Rank, used as the movie id.
+        row[1].strip(),                                     # Title.
+        [genre.strip() for genre in row[2].split(',')],     # Genres.
+        row[3].strip(),                                     # Description.
+        row[4].strip(),                                     # Director.
+        [actor.strip() for actor in row[5].split(',')],     # Actors.
+        int(row[6]),                                        # Year.
+        int(row[7]),                                        # Runtime (Minutes).
+        (
+            _parse_optional(row, 8, float),                 # Rating.
+            _parse_optional(row, 9, int),                   # Votes.
+            _parse_optional(row, 10, float),                # Revenue (Millions).
+            _parse_optional(row, 11, float)                 # Metascore.
+        )
+    )
+
+
+def _parse_optional(row, index: int, convert):
+    # The metric columns are optional, and hold 'N/A' where the value is unknown.
+    if index >= len(row) or row[index].strip() in ('', 'N/A'):
+        return None
+    return convert(row[index])
+
+
+def movie_from_parsed_row(parsed_row, repo: MemoryRepository) -> Movie:
+    movie_id, title, genre_names, description, director_name, actor_names, release_year, runtime, metrics = parsed_row
+
+    movie = Movie(title, release_year)
+    movie.id = movie_id
+    movie.description = description
+    movie.runtime_minutes = runtime
+    movie.director = intern_director(director_name, repo)
+
+    for genre_name in genre_names:
+        movie.add_genre(intern_genre(genre_name, repo))
+
+    for actor_name in actor_names:
+        movie.add_actor(intern_actor(actor_name, repo))
+
+    return movie
+
+
+def add_parsed_movies(parsed_rows, repo: MemoryRepository):
+    # Add the Movies to the repository in one pass, with their metrics, and link their genres back to them.
+    movies = [movie_from_parsed_row(parsed_row, repo) for parsed_row in parsed_rows]
+    repo.add_movies(movies)
+    for movie, parsed_row in zip(movies, parsed_rows):
         repo.add_movie_index(movie)
+        repo.set_movie_metrics(movie.id, *parsed_row[8])
+        for genre in movie.genres:
+            genre.add_movie(movie)
+    repo.build_leaderboards()
+
+
+def load_movies_and_ids(data_path: str, repo: MemoryRepository):
+    parsed_rows = [parse_movie_row(row) for row in read_csv_file(os.path.join(data_path, 'moviefile.csv'))]
+    add_parsed_movies(parsed_rows, repo)
+
+
+def split_csv_file(file_name: str, chunk_size: int):
+    # Splits a CSV file into (start, end) byte ranges of roughly chunk_size bytes that hold whole records, skipping
+    # the header record. The file is read a line at a time, so only the current line is held in memory. Quoted
+    # fields may contain newlines; a newline only ends a record when an even number of quotes precede it.
+    chunks = list()
+    start = None
+    offset = 0
+    quotes = 0
+    with open(file_name, 'rb') as infile:
+        for line in infile:
+            offset += len(line)
+            quotes += line.count(b'"')
+            if quotes % 2:
+                continue
+            if start is None:
+                start = offset
+            elif offset - start >= chunk_size:
+                chunks.append((start, offset))
+                start = offset
+    if start is not None and start < offset:
+        chunks.append((start, offset))
+    return chunks
+
+
+def parse_movie_chunk(file_name: str, start: int, end: int):
+    # Parses the records of moviefile.csv between two record boundaries. Runs in a worker process.
+    with open(file_name, 'rb') as infile:
+        infile.seek(start)
+        text = infile.read(end - start).decode('utf-8')
+
+    return [parse_movie_row(row) for row in csv.reader(io.StringIO(text)) if row]
+
+
+def load_movies_and_ids_in_parallel(data_path: str, repo: MemoryRepository, workers: int, chunk_size: int):
+    file_name = os.path.join(data_path, 'moviefile.csv')
+    chunks = split_csv_file(file_name, chunk_size)
+
+    # Parse and validate the chunks in a process pool, then merge them into the repository in file order.
+    parsed_rows = list()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(parse_movie_chunk, file_name, start, end) for start, end in chunks]
+        for future in futures:
+            parsed_rows.extend(future.result())
+    add_parsed_movies(parsed_rows, repo)
+
+
+def users_file_is_hashed(file_name: str):
+    # users.csv holds either plaintext passwords (legacy) or password hashes, as written by hash_users_file.
+    with open(file_name, encoding='utf-8-sig') as infile:
+        headers = next(csv.reader(infile))
+    return USERS_HASH_COLUMN in [header.strip() for header in headers]
+
+
+def hash_users_file(file_name: str, output_file_name: str, workers: int = None):
+    # Rewrites a users.csv holding plaintext passwords as one holding password hashes. Deriving a hash is
+    # deliberately slow, so the passwords are hashed in a process pool.
+    rows = list(read_csv_file(file_name))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        password_hashes = list(executor.map(generate_password_hash, [row[2] for row in rows], chunksize=64))
+
+    # Write to a temporary file first, so that output_file_name can be the file being migrated.
+    temporary_file_name = output_file_name + '.tmp'
+    with open(temporary_file_name, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(['id', 'username', USERS_HASH_COLUMN])
+        for row, password_hash in zip(rows, password_hashes):
+            writer.writerow([row[0], row[1], password_hash])
+    os.replace(temporary_file_name, output_file_name)
+    return len(rows)
 
 
 def load_users_and_ids(data_path: str, repo: MemoryRepository):
     users = dict()
+    file_name = os.path.join(data_path, 'users.csv')
+
+    # Hashes are loaded verbatim; plaintext passwords have to be hashed here, at a high cost per user.
+    hashed = users_file_is_hashed(file_name)
 
-    for data_row in read_csv_file(os.path.join(data_path, 'users.csv')):
+    for data_row in read_csv_file(file_name):
         user = User(
             username=data_row[1],
-            password=generate_password_hash(data_row[2])
+            password=data_row[2] if hashed else generate_password_hash(data_row[2])
         )
         repo.add_user(user)
         users[data_row[0]] = user
     return users
 
 
-def populate(data_path: str, repo: MemoryRepository):
-    # Load movies and genres into the repository.
-    load_movies_and_ids(data_path, repo)
+def resident_memory():
+    # Returns the resident set size of this process in bytes, or None where /proc is not available.
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def populate(data_path: str, repo: MemoryRepository, ingest_workers: int = 1,
+             ingest_chunk_size: int = DEFAULT_INGEST_CHUNK_SIZE):
+    rss_before = resident_memory()
+
+    # Load movies and genres into the repository, parsing in worker processes when more than one is configured.
+    if ingest_workers > 1:
+        load_movies_and_ids_in_parallel(data_path, repo, ingest_workers, ingest_chunk_size)
+    else:
+        load_movies_and_ids(data_path, repo)
     load_users_and_ids(data_path, repo)
+
+    # Report what was loaded, and what it cost in memory.
+    return {
+        'movies': repo.get_number_of_movies(),
+        'actors': len(repo.get_actors()),
+        'directors': len(repo.get_directors()),
+        'genres': len(repo.get_genres()),
+        'users': len(repo.get_users()),
+        'rss_before': rss_before,
+        'rss_after': resident_memory()
+    }
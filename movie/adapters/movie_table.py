@@ -0,0 +1,141 @@
+import operator
+
+import numpy as np
+
+
+# Sentinel for missing values in integer columns; float columns use NaN.
+MISSING = -1
+
+COLUMN_TYPES = {
+    'id': np.int64,
+    'year': np.int32,
+    'runtime': np.int32,
+    'rating': np.float64,
+    'votes': np.int64,
+    'revenue': np.float64,
+    'metascore': np.float32
+}
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+# Rows masked at a time when filtered ids are produced lazily.
+FILTER_CHUNK_SIZE = 4096
+
+
+class MovieTable:
+    # Columnar copy of the numeric attributes of the movies in a repository, one contiguous typed array per column.
+    # Row i holds the movie whose id is i + 1. Filters are evaluated as vectorised masks over whole columns.
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._columns = {name: self._empty_column(dtype, capacity) for name, dtype in COLUMN_TYPES.items()}
+
+    @staticmethod
+    def _empty_column(dtype, capacity: int):
+        if np.issubdtype(dtype, np.floating):
+            return np.full(capacity, np.nan, dtype=dtype)
+        return np.full(capacity, MISSING, dtype=dtype)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def columns(self):
+        return list(COLUMN_TYPES)
+
+    def column(self, name: str):
+        # Returns a read-only view of the filled part of a column.
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def _grow(self, capacity: int):
+        for name, values in self._columns.items():
+            grown = self._empty_column(values.dtype, capacity)
+            grown[:self._size] = values[:self._size]
+            self._columns[name] = grown
+
+    def append(self, movie_id: int, year: int = None, runtime: int = None):
+        row = movie_id - 1
+        if row >= len(self._columns['id']):
+            self._grow(max(row + 1, 2 * len(self._columns['id'])))
+
+        self._columns['id'][row] = movie_id
+        self._columns['year'][row] = MISSING if year is None else year
+        self._columns['runtime'][row] = MISSING if runtime is None else runtime
+        self._size = max(self._size, row + 1)
+
+    def set_metrics(self, movie_id: int, rating: float = None, votes: int = None, revenue: float = None,
+                    metascore: float = None):
+        row = movie_id - 1
+        self._columns['rating'][row] = np.nan if rating is None else rating
+        self._columns['votes'][row] = MISSING if votes is None else votes
+        self._columns['revenue'][row] = np.nan if revenue is None else revenue
+        self._columns['metascore'][row] = np.nan if metascore is None else metascore
+
+    def value(self, movie_id: int, name: str):
+        # Returns a single value as a Python number, or None if it is missing.
+        row = movie_id - 1
+        if not 0 <= row < self._size:
+            return None
+        value = self._columns[name][row].item()
+        if value != value or (value == MISSING and not isinstance(value, float)):
+            return None
+        return value
+
+    def _mask(self, name: str, op: str, value, rows=None):
+        values = self._columns[name][:self._size] if rows is None else self._columns[name][rows]
+        if op == 'between':
+            low, high = value
+            mask = (values >= low) & (values <= high)
+        else:
+            mask = OPERATORS[op](values, value)
+
+        # Comparisons with NaN are already False, except for '!='; integer columns need their sentinel excluded.
+        if np.issubdtype(values.dtype, np.floating):
+            return mask & ~np.isnan(values)
+        return mask & (values != MISSING)
+
+    def mask(self, conditions):
+        # conditions is a sequence of (column, operator, value) tuples, where operator is one of '<', '<=', '>',
+        # '>=', '==', '!=' or 'between' (value is then an inclusive (low, high) pair). Rows with a missing value in
+        # a filtered column never match.
+        mask = np.ones(self._size, dtype=bool)
+        for name, op, value in conditions:
+            mask &= self._mask(name, op, value)
+        return mask
+
+    def filter(self, conditions):
+        # Returns the ids of the movies that satisfy all conditions, in id order.
+        return self._columns['id'][:self._size][self.mask(conditions)]
+
+    def iter_filter(self, conditions, chunk_size: int = FILTER_CHUNK_SIZE):
+        # Yields the ids of the movies that satisfy all conditions, in id order, masking chunk_size rows at a time, so
+        # that a consumer that stops early doesn't pay for the rest of the table.
+        size = self._size
+        for start in range(0, size, chunk_size):
+            rows = slice(start, min(start + chunk_size, size))
+            mask = np.ones(rows.stop - start, dtype=bool)
+            for name, op, value in conditions:
+                mask &= self._mask(name, op, value, rows)
+            yield from self._columns['id'][rows][mask].tolist()
+
+    def select(self, movie_ids, conditions):
+        # Returns the ids among movie_ids of the movies that satisfy all conditions, in the order given. Only the
+        # rows of those movies are read, so the cost depends on len(movie_ids) rather than on the size of the table.
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        rows = movie_ids - 1
+        mask = np.ones(len(rows), dtype=bool)
+        for name, op, value in conditions:
+            mask &= self._mask(name, op, value, rows)
+        return movie_ids[mask]
+
+    def count(self, conditions):
+        return int(np.count_nonzero(self.mask(conditions)))
@@ -0,0 +1,187 @@
+import re
+from array import array
+from bisect import bisect_left, insort
+
+import numpy as np
+
+
+# Sorts after any character that can follow a prefix, so that bisecting for prefix + MAX_CHARACTER finds the end of the
+# range of keys starting with prefix.
+MAX_CHARACTER = chr(0x10FFFF)
+
+# The pending buffer is merged into the sorted keys once it holds this many keys, or a quarter of the sorted keys if
+# that is more, which keeps the cost of merging linear overall.
+MIN_PENDING_MERGE = 1024
+
+
+def name_keys(name: str):
+    # The keys a name can be found by: the case-folded name from each of its words on, so that 'pra' finds
+    # 'Chris Pratt' as well as 'chr' does.
+    words = name.casefold().split()
+    return list(dict.fromkeys(' '.join(words[i:]) for i in range(len(words))))
+
+
+class PrefixIndex:
+    # Names ranked by weight (the number of movies they have), looked up by prefix. Keys are held in a sorted list for
+    # bisection, with the id of the name each belongs to alongside in a numpy array; names added since the last merge
+    # sit in a small pending buffer, also sorted. The best suggestions for every prefix of up to cached_prefix_length characters
+    # are cached and kept up to date as names are added and weights grow, so that the short prefixes typed on every
+    # keystroke are answered without touching the keys.
+
+    def __init__(self, suggestions_per_prefix: int = 10, cached_prefix_length: int = 3):
+        self._suggestions_per_prefix = suggestions_per_prefix
+        self._cached_prefix_length = cached_prefix_length
+        self._names = list()
+        self._ids = dict()
+        self._weights = array('q')
+        self._keys = list()
+        self._key_ids = np.empty(0, dtype=np.int64)
+        self._pending = list()
+        self._top = dict()
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name: str):
+        return name in self._ids
+
+    def weight(self, name: str):
+        name_id = self._ids.get(name)
+        return self._weights[name_id] if name_id is not None else None
+
+    def _rank(self, name_id: int):
+        return -self._weights[name_id], self._names[name_id]
+
+    def _cached_prefixes(self, name: str):
+        if not self._top:
+            # Nothing is cached yet, e.g. while a catalog is being loaded.
+            return
+        for key in name_keys(name):
+            for length in range(1, min(len(key), self._cached_prefix_length) + 1):
+                yield key[:length]
+
+    def add(self, name: str, weight: int = 0):
+        # Adds a name, unless it is already present.
+        if name in self._ids:
+            return
+
+        name_id = len(self._names)
+        self._names.append(name)
+        self._ids[name] = name_id
+        self._weights.append(weight)
+        for key in name_keys(name):
+            insort(self._pending, (key, name_id))
+        if len(self._pending) >= max(MIN_PENDING_MERGE, len(self._keys) // 4):
+            self._merge()
+
+        for prefix in self._cached_prefixes(name):
+            self._update_top(prefix, name_id)
+
+    def set_weight(self, name: str, weight: int):
+        # Sets the weight of a name, adding the name if it isn't present yet.
+        name_id = self._ids.get(name)
+        if name_id is None:
+            self.add(name, weight)
+            return
+
+        previous_weight = self._weights[name_id]
+        self._weights[name_id] = weight
+        for prefix in self._cached_prefixes(name):
+            if weight < previous_weight:
+                # A name can only drop out of a cached list by losing weight; recompute that list when next needed.
+                self._top.pop(prefix, None)
+            else:
+                self._update_top(prefix, name_id)
+
+    def set_weights(self, weights):
+        # Bulk version of set_weight for loading, over (name, weight) pairs: the keys of new names are merged in one
+        # sort, and the cached suggestions are recomputed once at the end.
+        for name, weight in weights:
+            name_id = self._ids.get(name)
+            if name_id is None:
+                name_id = len(self._names)
+                self._names.append(name)
+                self._ids[name] = name_id
+                self._weights.append(weight)
+                self._pending.extend((key, name_id) for key in name_keys(name))
+            else:
+                self._weights[name_id] = weight
+        self.precompute()
+
+    def _update_top(self, prefix: str, name_id: int):
+        top = self._top.get(prefix)
+        if top is None:
+            return
+
+        if name_id in top:
+            top.sort(key=self._rank)
+        elif len(top) < self._suggestions_per_prefix or self._rank(name_id) < self._rank(top[-1]):
+            top.append(name_id)
+            top.sort(key=self._rank)
+            del top[self._suggestions_per_prefix:]
+
+    def _merge(self):
+        # set_weights appends to the pending buffer and merges at once; sort it here for that case. Both runs are then
+        # sorted, so this sort is a linear merge.
+        self._pending.sort()
+        pairs = list(zip(self._keys, self._key_ids.tolist())) + self._pending
+        pairs.sort()
+        self._keys = [key for key, _ in pairs]
+        self._key_ids = np.array([name_id for _, name_id in pairs], dtype=np.int64)
+        self._pending = list()
+
+    def _best(self, prefix: str, limit: int):
+        # Returns the ids of the limit best names with a key starting with prefix, best first.
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + MAX_CHARACTER, start)
+        name_ids = self._key_ids[start:end]
+
+        # The pending keys with the prefix are found by bisection too.
+        pending_start = bisect_left(self._pending, (prefix,))
+        pending_end = bisect_left(self._pending, (prefix + MAX_CHARACTER,), pending_start)
+        pending_ids = [name_id for _, name_id in self._pending[pending_start:pending_end]]
+        if pending_ids:
+            name_ids = np.concatenate((name_ids, np.array(pending_ids, dtype=np.int64)))
+
+        # A name can have several keys in the range, so keep twice as many candidates as needed. The partition ranks
+        # by weight, then by key order, so that ties are settled the same way every time.
+        candidates = 2 * limit
+        if len(name_ids) > candidates:
+            weights = np.frombuffer(self._weights, dtype=np.int64)[name_ids]
+            order = -weights * (len(name_ids) + 1) + np.arange(len(name_ids))
+            name_ids = name_ids[np.argpartition(order, candidates - 1)[:candidates]]
+
+        return sorted(dict.fromkeys(name_ids.tolist()), key=self._rank)[:limit]
+
+    def precompute(self):
+        # Fills the cache of suggestions for every prefix of up to cached_prefix_length characters, so that no
+        # keystroke pays for a first lookup. Each prefix is found by bisecting past the range of the one before.
+        self._merge()
+        self._top = dict()
+        for length in range(1, self._cached_prefix_length + 1):
+            index = 0
+            while index < len(self._keys):
+                prefix = self._keys[index][:length]
+                if len(prefix) < length:
+                    index += 1
+                    continue
+                self._top[prefix] = self._best(prefix, self._suggestions_per_prefix)
+                index = bisect_left(self._keys, prefix + MAX_CHARACTER, index)
+
+    def suggest(self, prefix: str, limit: int = None):
+        # Returns up to limit (name, weight) pairs for names with a word starting with prefix, most weight first and
+        # then by name. Matching ignores case.
+        limit = self._suggestions_per_prefix if limit is None else limit
+        prefix = re.sub(r'\s+', ' ', prefix.casefold().lstrip())
+        if not prefix or limit <= 0:
+            return []
+
+        if len(prefix) <= self._cached_prefix_length and limit <= self._suggestions_per_prefix:
+            top = self._top.get(prefix)
+            if top is None:
+                top = self._top[prefix] = self._best(prefix, self._suggestions_per_prefix)
+            name_ids = top[:limit]
+        else:
+            name_ids = self._best(prefix, limit)
+
+        return [(self._names[name_id], self._weights[name_id]) for name_id in name_ids]
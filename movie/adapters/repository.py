@@ -1,12 +1,21 @@
 import abc
 from typing import List
-from datetime import date
+from datetime import date, datetime
 
 from movie.domain.model import User, Director, Genre, Actor, Movie, Review, WatchList
 
 
 repo_instance = None
 
+# The kinds of names that get_name_suggestions completes.
+NAME_KINDS = ('actor', 'director', 'genre')
+
+# The kinds of people that get_filmography lists the movies of.
+FILMOGRAPHY_KINDS = ('actor', 'director')
+
+# The metrics that get_leaderboard ranks movies by.
+LEADERBOARD_METRICS = ('rating', 'votes', 'revenue', 'metascore', 'weighted_rating')
+
 
 class RepositoryException(Exception):
 
@@ -61,17 +70,109 @@ class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
     def get_movie_ids_by_genre(self, genre_name: str) -> List[int]:
-        """ Returns a list of Movie IDs that have a particular genre.
+        """ Returns a list of Movie IDs that have a particular genre, sorted by id.
 
-        If there are no Movies with the given genre, this method returns an empty list.
+        If there are no Movies with the given genre, this method returns an empty list. The list may be the
+        repository's own index, so callers must not modify it.
         """
         raise NotImplementedError
 
     @abc.abstractmethod
     def get_movie_ids_by_actor(self, actor_name: str) -> List[int]:
-        """ Returns a list of Movies that stars a particular actor.
+        """ Returns a list of ids of Movies that star a particular actor, sorted by id.
+
+        If there are no Movies with the given actor, this method returns an empty list. The list may be the
+        repository's own index, so callers must not modify it.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_by_director(self, director_name: str) -> List[int]:
+        """ Returns a list of ids of Movies directed by a particular director, sorted by id.
+
+        If there are no Movies with the given director, this method returns an empty list. The list may be the
+        repository's own index, so callers must not modify it.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_page(self, kind: str, name: str, after=None, before=None, limit: int = 10) -> List[int]:
+        """ Returns up to limit ids, in id order, of the Movies of the genre, actor or director name (kind is one of
+        'genre', 'actor' and 'director').
+
+        With after, the page holds the first ids greater than after; with before, the last ids less than before;
+        with neither, the first ids. If there are no such Movies, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_movies_by_name(self, kind: str, name: str) -> int:
+        """ Returns the number of Movies of the genre, actor or director name (kind is one of 'genre', 'actor' and
+        'director'). """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_filmography(self, kind: str, name: str, offset: int = 0, limit: int = 10) -> List[int]:
+        """ Returns up to limit ids of the Movies of an actor or director (kind is 'actor' or 'director'), in release
+        year order and then id order, after the first offset. Movies of unknown release year come last.
+
+        If there is no such person, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_career_summary(self, kind: str, name: str, number_of_genres: int = 5):
+        """ Returns a dict summarising the Movies of an actor or director (kind is 'actor' or 'director'): their
+        'number_of_movies', 'first_year' and 'last_year' of release, and their most common 'genres' as
+        (genre name, number of movies) pairs, at most number_of_genres of them.
 
-        If there are no Movies with the given actor, this method returns an empty list.
+        If there is no such person, this method returns None.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_similar_movies(self, movie_id: int, limit: int = 5):
+        """ Returns (movie id, similarity) pairs for up to limit Movies that share genres, actors or the director with
+        the Movie with this id, most similar first. Similarity is the Jaccard similarity of those features.
+
+        The Movies are found approximately, without comparing every Movie, so a weakly similar Movie may be missed.
+        Returns an empty list if there is no such Movie.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_catalog_version(self) -> int:
+        """ Returns the version of the catalog, which increases whenever a Movie, Review, genre or actor is added or
+        a Movie's metrics change, so that what is derived from the catalog can tell whether it is out of date.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_catalog_last_modified(self) -> datetime:
+        """ Returns the time, in UTC, of the latest change to the catalog, or of its creation if it hasn't changed. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_version(self, movie_id: int):
+        """ Returns the catalog version of the latest change to the Movie with this id: its addition, a Review of it
+        or a change to its metrics.
+
+        If there is no Movie with the given id, this method returns None.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_costar_names(self, actor_name: str) -> List[str]:
+        """ Returns the names of the Actors who appeared in a Movie with the named Actor. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_costar_path(self, actor_name: str, other_actor_name: str):
+        """ Returns the shortest chain of co-stars linking two Actors, as (actor name, movie id, actor name) steps:
+        each pair of actors appeared in the Movie with that id.
+
+        Returns an empty list if the names are the same Actor, and None if either Actor is unknown or no chain links
+        them.
         """
         raise NotImplementedError
 
@@ -80,6 +181,22 @@ class AbstractRepository(abc.ABC):
         """ Returns the actors stored in the repository. """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_movies_by_title(self, title: str) -> List[Movie]:
+        """ Returns the Movies with exactly this title, ordered by release year.
+
+        If there are no Movies with this title, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movies_by_title_prefix(self, prefix: str, limit: int = None) -> List[Movie]:
+        """ Returns the Movies whose titles start with prefix, in title order, at most limit of them.
+
+        If there are no matching Movies, this method returns an empty list.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_movie_ids_for_title(self, title: str):
         """ Returns a list of ids representing Movie with a title.
@@ -96,6 +213,144 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_movie_ids_by_release_year_range(self, start_year: int, end_year: int) -> List[int]:
+        """ Returns the ids of Movies released from start_year to end_year inclusive, ordered by year then id.
+
+        If there are no Movies in the range, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_movies_by_release_year_range(self, start_year: int, end_year: int) -> int:
+        """ Returns the number of Movies released from start_year to end_year inclusive. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_first_release_year(self):
+        """ Returns the earliest release year of any Movie in the repository.
+
+        Returns None if the repository is empty.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_last_release_year(self):
+        """ Returns the latest release year of any Movie in the repository.
+
+        Returns None if the repository is empty.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_previous_release_year(self, year: int):
+        """ Returns the closest release year before year that has Movies.
+
+        If there are no Movies released before year, this method returns None.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_next_release_year(self, year: int):
+        """ Returns the closest release year after year that has Movies.
+
+        If there are no Movies released after year, this method returns None.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_movie_metrics(self, movie_id: int, rating: float = None, votes: int = None, revenue: float = None,
+                          metascore: float = None):
+        """ Stores the rating, votes, revenue (millions) and metascore of the Movie with this id. None is missing. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_metric(self, movie_id: int, metric: str):
+        """ Returns one of 'year', 'runtime', 'rating', 'votes', 'revenue' or 'metascore' for the Movie with this id.
+
+        Returns None if the value is missing.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_leaderboard(self, metric: str, genre: str = None, year: int = None, offset: int = 0, limit: int = 10):
+        """ Returns (movie id, score) pairs for the Movies with the highest values of metric, best first, after the
+        first offset and at most limit of them. metric is one of LEADERBOARD_METRICS; 'weighted_rating' combines the
+        CSV rating and votes with the ratings of user reviews.
+
+        With genre or year, only Movies of that genre or release year are ranked, and only the first 100 are kept.
+        Movies without a value for metric are left out. Raises RepositoryException for an unknown metric.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def filter_movie_ids(self, conditions) -> List[int]:
+        """ Returns the ids of Movies that satisfy every condition, in id order.
+
+        Each condition is a (column, operator, value) tuple. Columns are 'id', 'year', 'runtime', 'rating', 'votes',
+        'revenue' and 'metascore'; operators are '<', '<=', '>', '>=', '==', '!=' and 'between', whose value is an
+        inclusive (low, high) pair. Movies with a missing value in a filtered column never match.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def iter_filtered_movie_ids(self, conditions):
+        """ Yields the ids of Movies that satisfy every condition, in id order, as filter_movie_ids returns them.
+
+        The ids are produced as they are consumed, so a caller that stops early doesn't pay for the whole catalog.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def search_movie_ids(self, query: str, offset: int = 0, limit: int = 10):
+        """ Returns the ids of the Movies whose titles or descriptions match query, best match first, and the total
+        number of matches, as a (ids, total) pair.
+
+        Matches are ranked with BM25; words in titles weigh more than words in descriptions. Any word of the query may
+        match, but quoted phrases must appear exactly. At most limit ids are returned, skipping the first offset.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_name_suggestions(self, prefix: str, kinds=NAME_KINDS, limit: int = 10):
+        """ Returns up to limit (kind, name, number of movies) tuples for actor, director and genre names with a word
+        starting with prefix, ignoring case. Names with the most Movies come first, then in name order.
+
+        kinds restricts the suggestions to some of 'actor', 'director' and 'genre'. If no names match, this method
+        returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_name_corrections(self, name: str, kinds=NAME_KINDS, limit: int = 5):
+        """ Returns up to limit (kind, name, edit distance) tuples for the actor, director and genre names that are
+        within two edits of name, ignoring case. The closest names come first, then those with the most Movies.
+
+        kinds restricts the corrections to some of 'actor', 'director' and 'genre'. If no names are close enough,
+        this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_by_filters(self, genres=(), actors=(), director: str = None, year_range=None,
+                                 runtime_range=None) -> List[int]:
+        """ Returns the ids of Movies that have all of genres, star all of actors, are directed by director, and
+        whose release year and running time fall in year_range and runtime_range, sorted by id.
+
+        The ranges are inclusive (low, high) pairs, where either end may be None. Filters left as None or empty
+        don't apply. If no Movies match, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_facet_counts(self, movie_ids=None, limit: int = 10):
+        """ Returns how many of the Movies with ids in movie_ids have each genre, actor, director and release year.
+
+        The result maps 'genre', 'actor', 'director' and 'year' to lists of up to limit (value, count) pairs, most
+        frequent first. If movie_ids is None, the counts cover every Movie in the repository.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_number_of_movies(self):
         """ Returns the number of Movies in the repository. """
@@ -140,7 +395,7 @@ class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
     def get_id_of_previous_movie(self, movie: Movie):
-        """ Returns the id of an Movie that immediately precedes movie.
+        """ Returns the id of the Movie that immediately precedes movie in title order.
 
         If movie is the first Movie in the repository, this method returns None because there are no previous Movies.
         """
@@ -148,7 +403,7 @@ class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
     def get_id_of_next_movie(self, movie: Movie):
-        """ Returns the date of an Movie that immediately follows movie.
+        """ Returns the id of the Movie that immediately follows movie in title order.
 
         If movie is the last Movie in the repository, this method returns None because there are no next Movie.
         """
@@ -0,0 +1,241 @@
+import math
+import re
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r'\w+')
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+# Upper bound on the number of tokens in a movie, used to pack (movie id, position) pairs into one integer.
+POSITION_STRIDE = 1 << 20
+
+
+def tokenise(text: str):
+    # Splits text into case-folded word tokens.
+    if not text:
+        return []
+    return [token.casefold() for token in TOKEN_PATTERN.findall(text)]
+
+
+class Postings:
+    # The postings of one term: sorted movie ids with their weighted term frequencies, and the positions of the
+    # term in each movie, stored flat with per-movie offsets. Arrays keep millions of postings compact.
+    __slots__ = ('movie_ids', 'frequencies', 'offsets', 'positions')
+
+    def __init__(self):
+        self.movie_ids = array('q')
+        self.frequencies = array('d')
+        self.offsets = array('q', [0])
+        self.positions = array('q')
+
+    def add(self, movie_id: int, frequency: float, positions):
+        index = len(self.movie_ids)
+        if index and self.movie_ids[-1] > movie_id:
+            # Movies are normally indexed in id order; keep the arrays sorted if one arrives late.
+            index = bisect_left(self.movie_ids, movie_id)
+            start = self.offsets[index]
+            self.positions[start:start] = array('q', positions)
+            for later in range(index + 1, len(self.offsets)):
+                self.offsets[later] += len(positions)
+            self.offsets.insert(index + 1, start + len(positions))
+        else:
+            self.positions.extend(positions)
+            self.offsets.append(len(self.positions))
+        self.movie_ids.insert(index, movie_id)
+        self.frequencies.insert(index, frequency)
+
+    def extend(self, movie_ids, frequencies, offsets, positions):
+        # Appends the postings of movies with ids above those already held, as arrays in the layout of this class
+        # with offsets starting at 0.
+        self.movie_ids.frombytes(movie_ids.tobytes())
+        self.frequencies.frombytes(frequencies.tobytes())
+        self.offsets.frombytes((offsets[1:] + len(self.positions)).tobytes())
+        self.positions.frombytes(positions.tobytes())
+
+    def positions_of(self, movie_id: int):
+        index = bisect_left(self.movie_ids, movie_id)
+        if index == len(self.movie_ids) or self.movie_ids[index] != movie_id:
+            return []
+        return self.positions[self.offsets[index]:self.offsets[index + 1]]
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+
+class SearchIndex:
+    # Positional inverted index over movie titles and descriptions, ranked with BM25. A movie's title and
+    # description form one token stream; title tokens count title_weight times towards term frequencies, and a gap
+    # separates the title from the description so that phrases don't span them.
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, title_weight: int = 2):
+        self._k1 = k1
+        self._b = b
+        self._title_weight = title_weight
+        self._postings = dict()
+        self._lengths = array('d')
+        self._number_of_movies = 0
+        self._total_length = 0.0
+
+    def add(self, movie_id: int, title: str, description: str):
+        title_tokens = tokenise(title)
+        tokens = title_tokens + [None] + tokenise(description)
+
+        term_positions = dict()
+        for position, token in enumerate(tokens):
+            if token is not None:
+                term_positions.setdefault(token, []).append(position)
+
+        for term, positions in term_positions.items():
+            title_occurrences = sum(1 for position in positions if position < len(title_tokens))
+            frequency = len(positions) + (self._title_weight - 1) * title_occurrences
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = Postings()
+            postings.add(movie_id, frequency, positions)
+
+        self._add_length(movie_id, len(tokens) - 1 + (self._title_weight - 1) * len(title_tokens))
+
+    def add_many(self, documents):
+        # Bulk version of add for loading, over (movie_id, title, description) triples in id order. Every token of
+        # every document is gathered into flat columns, which one sort groups by term and movie, and each term's
+        # postings are then appended as whole arrays instead of movie by movie.
+        documents = list(documents)
+        if documents and documents[0][0] < len(self._lengths):
+            # Postings are appended, so movies that don't follow those already indexed are added one at a time.
+            for movie_id, title, description in documents:
+                self.add(movie_id, title, description)
+            return
+
+        term_ids = dict()
+        term_column = array('q')
+        movie_column = array('q')
+        position_column = array('q')
+        weight_column = array('d')
+        for movie_id, title, description in documents:
+            title_tokens = tokenise(title)
+            description_tokens = tokenise(description)
+            tokens = title_tokens + description_tokens
+            term_column.extend([term_ids.setdefault(token, len(term_ids)) for token in tokens])
+            movie_column.extend([movie_id] * len(tokens))
+            # As in add, a gap of one position separates the title from the description.
+            position_column.extend(range(len(title_tokens)))
+            position_column.extend(range(len(title_tokens) + 1, len(tokens) + 1))
+            weight_column.extend([float(self._title_weight)] * len(title_tokens))
+            weight_column.extend([1.0] * len(description_tokens))
+            self._add_length(movie_id, len(tokens) + (self._title_weight - 1) * len(title_tokens))
+        if not term_ids:
+            return
+
+        terms = np.frombuffer(term_column, dtype=np.int64)
+        movie_ids = np.frombuffer(movie_column, dtype=np.int64)
+        positions = np.frombuffer(position_column, dtype=np.int64)
+        order = np.lexsort((positions, movie_ids, terms))
+        terms, movie_ids, positions = terms[order], movie_ids[order], positions[order]
+
+        # One posting per (term, movie) pair: where each pair's positions start, and its weighted frequency.
+        is_pair_start = np.ones(len(terms), dtype=bool)
+        is_pair_start[1:] = (terms[1:] != terms[:-1]) | (movie_ids[1:] != movie_ids[:-1])
+        pair_starts = np.flatnonzero(is_pair_start)
+        frequencies = np.add.reduceat(np.frombuffer(weight_column, dtype=np.float64)[order], pair_starts)
+        pair_terms = terms[pair_starts]
+        pair_movie_ids = movie_ids[pair_starts]
+        offsets = np.append(pair_starts, len(terms))
+
+        term_starts = np.flatnonzero(np.diff(pair_terms, prepend=-1)).tolist() + [len(pair_starts)]
+        term_names = list(term_ids)
+        for start, end in zip(term_starts, term_starts[1:]):
+            term = term_names[pair_terms[start]]
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = Postings()
+            postings.extend(pair_movie_ids[start:end], frequencies[start:end], offsets[start:end + 1] - offsets[start],
+                            positions[offsets[start]:offsets[end]])
+
+    def _add_length(self, movie_id: int, length: int):
+        if movie_id >= len(self._lengths):
+            self._lengths.extend([0.0] * (movie_id + 1 - len(self._lengths)))
+        self._lengths[movie_id] = length
+        self._number_of_movies += 1
+        self._total_length += length
+
+    def document_frequency(self, term: str):
+        postings = self._postings.get(term.casefold())
+        return len(postings) if postings is not None else 0
+
+    def _phrase_movie_ids(self, phrase_terms):
+        # Returns the ids of movies holding the terms of the phrase at consecutive positions. Each occurrence of a
+        # term is encoded as movie_id * POSITION_STRIDE + position, so that the occurrences of the whole phrase are
+        # an intersection of sorted arrays once each term's positions are shifted back to where the phrase starts.
+        postings = [self._postings.get(term) for term in phrase_terms]
+        if any(posting is None for posting in postings):
+            return np.empty(0, dtype=np.int64)
+
+        candidates = np.frombuffer(postings[0].movie_ids, dtype=np.int64)
+        for posting in postings[1:]:
+            candidates = np.intersect1d(candidates, np.frombuffer(posting.movie_ids, dtype=np.int64),
+                                        assume_unique=True)
+
+        starts = None
+        for offset, posting in enumerate(postings):
+            if len(candidates) == 0:
+                break
+            movie_ids = np.repeat(np.frombuffer(posting.movie_ids, dtype=np.int64),
+                                  np.diff(np.frombuffer(posting.offsets, dtype=np.int64)))
+            positions = np.frombuffer(posting.positions, dtype=np.int64) - offset
+            in_candidates = np.isin(movie_ids, candidates)
+            occurrences = movie_ids[in_candidates] * POSITION_STRIDE + positions[in_candidates]
+            starts = occurrences if starts is None else np.intersect1d(starts, occurrences, assume_unique=True)
+            candidates = np.unique(starts // POSITION_STRIDE)
+        return candidates
+
+    def search(self, query: str, offset: int = 0, limit: int = 10):
+        # Returns the ids of the movies matching query, best first, from offset, at most limit of them, and the total
+        # number of matches. Any query term may match; quoted phrases must match exactly.
+        phrases = [tokenise(phrase) for phrase in PHRASE_PATTERN.findall(query)]
+        phrases = [phrase for phrase in phrases if phrase]
+        terms = list(dict.fromkeys(tokenise(PHRASE_PATTERN.sub(' ', query)) +
+                                   [term for phrase in phrases for term in phrase]))
+        postings = [(term, self._postings[term]) for term in terms if term in self._postings]
+        if not postings or self._number_of_movies == 0:
+            return [], 0
+
+        # Scores are summed over the postings of the query terms only, so that a query costs in proportion to the
+        # number of postings it touches rather than to the size of the catalog.
+        lengths = np.frombuffer(self._lengths, dtype=np.float64)
+        average_length = self._total_length / self._number_of_movies
+        matched_ids = list()
+        term_scores = list()
+        for term, posting in postings:
+            movie_ids = np.frombuffer(posting.movie_ids, dtype=np.int64)
+            frequencies = np.frombuffer(posting.frequencies, dtype=np.float64)
+            document_frequency = len(movie_ids)
+            idf = math.log(1 + (self._number_of_movies - document_frequency + 0.5) / (document_frequency + 0.5))
+            norms = self._k1 * (1 - self._b + self._b * lengths[movie_ids] / average_length)
+            matched_ids.append(movie_ids)
+            term_scores.append(idf * frequencies * (self._k1 + 1) / (frequencies + norms))
+
+        candidates, movie_indexes = np.unique(np.concatenate(matched_ids), return_inverse=True)
+        scores = np.bincount(movie_indexes, weights=np.concatenate(term_scores), minlength=len(candidates))
+
+        for phrase in phrases:
+            has_phrase = np.isin(candidates, self._phrase_movie_ids(phrase), assume_unique=True)
+            candidates, scores = candidates[has_phrase], scores[has_phrase]
+
+        total = len(candidates)
+        wanted = min(offset + limit, total)
+        if wanted <= offset:
+            return [], total
+
+        # Partially sort, so that only the best offset + limit matches are ordered. Ties are broken by id.
+        if wanted < total:
+            best = np.argpartition(-scores, wanted - 1)[:wanted]
+        else:
+            best = np.arange(total)
+        order = best[np.lexsort((candidates[best], -scores[best]))]
+        return candidates[order][offset:wanted].tolist(), total
+
+    def __len__(self):
+        return self._number_of_movies
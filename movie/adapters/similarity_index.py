@@ -0,0 +1,148 @@
+import hashlib
+from array import array
+
+import numpy as np
+
+
+# The pending buffer is merged into the sorted band keys once it holds this many movies, or a quarter of the indexed
+# movies if that is more, which keeps the cost of merging linear overall.
+MIN_PENDING_MERGE = 1024
+
+# Signatures are computed for this many movies at a time, which bounds the size of the intermediate hash table.
+SIGNATURE_CHUNK_SIZE = 4096
+
+# Odd multipliers that mix the values of a band into one 64-bit key.
+BAND_MIXERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                        0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9],
+                       dtype=np.uint64)
+
+
+def feature_hash(feature: str):
+    # A stable 64-bit hash; Python's own string hash changes from one process to the next.
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class SimilarityIndex:
+    # Finds the movies whose features (genres, actors and director) overlap most with a movie's, by Jaccard
+    # similarity, without comparing it against the whole catalog. Each movie gets a MinHash signature of
+    # bands * rows values; movies whose signatures agree on every value of some band share a bucket, which happens
+    # with probability 1 - (1 - J^rows)^bands for Jaccard similarity J, so only movies sharing a bucket are compared,
+    # exactly, with the movie asked about. The defaults find most movies that share people as well as genres.
+    #
+    # Each band's keys are held sorted, with the ids of their movies alongside, and looked up by bisection; movies
+    # added since the last merge sit in a small pending buffer that is scanned. Features are held as sorted hashes in
+    # compressed sparse row form, row i for the movie whose id is i + 1.
+
+    def __init__(self, bands: int = 32, rows: int = 3, seed: int = 235):
+        if rows > len(BAND_MIXERS):
+            raise ValueError(f'rows must be at most {len(BAND_MIXERS)}')
+        self._bands = bands
+        self._rows = rows
+        generator = np.random.default_rng(seed)
+        self._multipliers = generator.integers(1, 2 ** 63, bands * rows, dtype=np.uint64) | np.uint64(1)
+        self._increments = generator.integers(0, 2 ** 63, bands * rows, dtype=np.uint64)
+
+        self._features = array('q')
+        self._offsets = array('q', [0])
+        self._unsigned = list()
+        self._keys = np.empty((bands, 0), dtype=np.uint64)
+        self._key_ids = np.empty((bands, 0), dtype=np.int64)
+        self._pending_keys = np.empty((0, bands), dtype=np.uint64)
+        self._pending_ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def add(self, movie_id: int, features):
+        # Adds a movie, given the names of its features. Movies must be added in id order.
+        while len(self._offsets) < movie_id:
+            self._offsets.append(len(self._features))
+        hashes = sorted({feature_hash(feature) for feature in features})
+        self._features.extend(np.array(hashes, dtype=np.uint64).view(np.int64).tolist())
+        self._offsets.append(len(self._features))
+        if hashes:
+            self._unsigned.append(movie_id)
+
+    def _feature_hashes(self, movie_id: int):
+        start, end = self._offsets[movie_id - 1], self._offsets[movie_id]
+        return np.frombuffer(self._features, dtype=np.uint64)[start:end]
+
+    def _band_keys(self, movie_ids):
+        # Returns the band keys of the movies, one row per movie. The MinHash values of a movie are the minimum over
+        # its features of multiply-shift hashes, computed for all features of a chunk of movies at once.
+        offsets = np.frombuffer(self._offsets, dtype=np.int64)
+        features = np.frombuffer(self._features, dtype=np.uint64)
+        keys = list()
+        for chunk_start in range(0, len(movie_ids), SIGNATURE_CHUNK_SIZE):
+            chunk = np.asarray(movie_ids[chunk_start:chunk_start + SIGNATURE_CHUNK_SIZE], dtype=np.int64)
+            starts, ends = offsets[chunk - 1], offsets[chunk]
+            counts = ends - starts
+            rows = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts) + np.arange(counts.sum())
+            hashes = (np.outer(features[rows], self._multipliers) + self._increments) >> np.uint64(32)
+            signatures = np.minimum.reduceat(hashes, np.concatenate(([0], np.cumsum(counts)[:-1])), axis=0)
+
+            bands = signatures.reshape(len(chunk), self._bands, self._rows) * BAND_MIXERS[:self._rows]
+            keys.append(np.bitwise_xor.reduce(bands, axis=2))
+        if not keys:
+            return np.empty((0, self._bands), dtype=np.uint64)
+        return np.concatenate(keys)
+
+    def build(self, merge: bool = True):
+        # Signs the movies added since the last build, and merges the pending buffer into the sorted band keys if
+        # merge is set or the buffer has grown large.
+        if self._unsigned:
+            self._pending_keys = np.concatenate((self._pending_keys, self._band_keys(self._unsigned)))
+            self._pending_ids = np.concatenate((self._pending_ids, np.array(self._unsigned, dtype=np.int64)))
+            self._unsigned = list()
+
+        if len(self._pending_ids) == 0:
+            return
+        if merge or len(self._pending_ids) >= max(MIN_PENDING_MERGE, self._keys.shape[1] // 4):
+            keys = np.concatenate((self._keys, self._pending_keys.T), axis=1)
+            key_ids = np.concatenate((self._key_ids, np.broadcast_to(self._pending_ids, keys.shape[:1] +
+                                                                     self._pending_ids.shape)), axis=1)
+            order = np.argsort(keys, axis=1, kind='stable')
+            self._keys = np.take_along_axis(keys, order, axis=1)
+            self._key_ids = np.take_along_axis(key_ids, order, axis=1)
+            self._pending_keys = np.empty((0, self._bands), dtype=np.uint64)
+            self._pending_ids = np.empty(0, dtype=np.int64)
+
+    def candidates(self, movie_id: int):
+        # Returns the ids of the movies sharing a bucket with movie_id, not including it.
+        self.build(merge=False)
+        if movie_id < 1 or movie_id > len(self) or len(self._feature_hashes(movie_id)) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        band_keys = self._band_keys([movie_id])[0]
+        found = [self._pending_ids[(self._pending_keys == band_keys).any(axis=1)]]
+        for band, key in enumerate(band_keys):
+            start = np.searchsorted(self._keys[band], key, side='left')
+            end = np.searchsorted(self._keys[band], key, side='right')
+            found.append(self._key_ids[band, start:end])
+        candidates = np.unique(np.concatenate(found))
+        return candidates[candidates != movie_id]
+
+    def similarities(self, movie_id: int, movie_ids):
+        # Returns the exact Jaccard similarities of the features of movie_id and each of movie_ids.
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        offsets = np.frombuffer(self._offsets, dtype=np.int64)
+        starts, counts = offsets[movie_ids - 1], offsets[movie_ids] - offsets[movie_ids - 1]
+        rows = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts) + np.arange(counts.sum())
+
+        # The candidates' features repeat wherever candidates share one, so they aren't unique as a whole; only the
+        # features of movie_id are.
+        features = self._feature_hashes(movie_id)
+        shared = np.isin(np.frombuffer(self._features, dtype=np.uint64)[rows], features)
+        intersections = np.bincount(np.repeat(np.arange(len(movie_ids)), counts), weights=shared,
+                                     minlength=len(movie_ids))
+        return intersections / (counts + len(features) - intersections)
+
+    def similar(self, movie_id: int, limit: int = 5):
+        # Returns (movie id, similarity) pairs for up to limit of the most similar movies to movie_id, most similar
+        # first and then by id.
+        candidates = self.candidates(movie_id)
+        if len(candidates) == 0:
+            return []
+        similarities = self.similarities(movie_id, candidates)
+        order = np.lexsort((candidates, -similarities))[:limit]
+        return list(zip(candidates[order].tolist(), similarities[order].tolist()))
@@ -0,0 +1,101 @@
+import gc
+import hashlib
+import json
+import os
+import pickle
+import struct
+
+from movie.adapters.memory_repository import MemoryRepository
+
+
+# A snapshot file is the magic bytes, a format version, a length-prefixed JSON header holding the fingerprint of the
+# CSV files it was built from, then the pickled MemoryRepository. Bump SNAPSHOT_VERSION whenever the layout of the
+# repository or the domain classes changes, so that stale snapshots are rebuilt from CSV.
+SNAPSHOT_MAGIC = b'MOFLIXSNAP'
+SNAPSHOT_VERSION = 14
+SNAPSHOT_FILE_NAME = 'catalog.snapshot'
+SOURCE_FILE_NAMES = ('moviefile.csv', 'users.csv')
+
+_HEADER = struct.Struct('>HI')
+
+
+class SnapshotException(Exception):
+    pass
+
+
+def _file_hash(file_name: str):
+    digest = hashlib.sha256()
+    with open(file_name, 'rb') as infile:
+        for block in iter(lambda: infile.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(data_path: str):
+    fingerprint = dict()
+    for name in SOURCE_FILE_NAMES:
+        file_name = os.path.join(data_path, name)
+        if os.path.exists(file_name):
+            stat = os.stat(file_name)
+            fingerprint[name] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': _file_hash(file_name)}
+    return fingerprint
+
+
+def fingerprint_matches(fingerprint: dict, data_path: str):
+    # Sizes and modification times are checked first; a file is only hashed when its size matches but its
+    # modification time doesn't, e.g. after being copied.
+    names = [name for name in SOURCE_FILE_NAMES if os.path.exists(os.path.join(data_path, name))]
+    if sorted(names) != sorted(fingerprint):
+        return False
+
+    for name in names:
+        file_name = os.path.join(data_path, name)
+        stat = os.stat(file_name)
+        expected = fingerprint[name]
+        if stat.st_size != expected['size']:
+            return False
+        if stat.st_mtime_ns != expected['mtime'] and _file_hash(file_name) != expected['sha256']:
+            return False
+    return True
+
+
+def write_snapshot(repo: MemoryRepository, data_path: str, snapshot_path: str):
+    header = json.dumps({'fingerprint': source_fingerprint(data_path)}).encode('utf-8')
+
+    # Write to a temporary file first, so that a running application never sees a partly written snapshot.
+    temporary_path = snapshot_path + '.tmp'
+    with open(temporary_path, 'wb') as outfile:
+        outfile.write(SNAPSHOT_MAGIC)
+        outfile.write(_HEADER.pack(SNAPSHOT_VERSION, len(header)))
+        outfile.write(header)
+        pickle.dump(repo, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, snapshot_path)
+
+
+def read_snapshot(data_path: str, snapshot_path: str):
+    # Returns the MemoryRepository stored in the snapshot, or None if there is no snapshot or it is out of date.
+    # Snapshots are only ever written by this application, so unpickling them is safe.
+    if not os.path.exists(snapshot_path):
+        return None
+
+    with open(snapshot_path, 'rb') as infile:
+        if infile.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise SnapshotException(f'{snapshot_path} is not a catalog snapshot')
+
+        version, header_length = _HEADER.unpack(infile.read(_HEADER.size))
+        if version != SNAPSHOT_VERSION:
+            return None
+
+        header = json.loads(infile.read(header_length).decode('utf-8'))
+        if not fingerprint_matches(header['fingerprint'], data_path):
+            return None
+
+        # Unpickling allocates millions of objects and none of them are garbage, so collection passes during the
+        # load only cost time.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return pickle.load(infile)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
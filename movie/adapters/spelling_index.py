@@ -0,0 +1,88 @@
+def edit_distance(first: str, second: str, max_distance: int):
+    # Returns the Levenshtein distance between first and second, or max_distance + 1 if it is more than max_distance.
+    # Only the band of the table within max_distance of the diagonal is filled in, and the computation stops as soon
+    # as a whole row exceeds max_distance.
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+    if len(first) > len(second):
+        first, second = second, first
+
+    too_far = max_distance + 1
+    previous = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        current = [too_far] * (len(second) + 1)
+        if i <= max_distance:
+            current[0] = i
+        low = max(1, i - max_distance)
+        high = min(len(second), i + max_distance)
+        for j in range(low, high + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost, too_far)
+        if min(current[low - 1:high + 1]) > max_distance:
+            return too_far
+        previous = current
+    return min(previous[len(second)], too_far)
+
+
+def deletes(term: str, max_distance: int):
+    # Returns term and every string made by deleting up to max_distance of its characters.
+    found = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        frontier = {candidate[:i] + candidate[i + 1:] for candidate in frontier for i in range(len(candidate))}
+        found |= frontier
+    return found
+
+
+class SpellingIndex:
+    # Finds the names closest to a misspelt one (symmetric delete spelling correction). Every string made by deleting
+    # up to max_distance characters from the start of a name is precomputed, mapping back to the name. A query
+    # generates the same deletes from its own start, so that names within max_distance edits share at least one of
+    # them; only those candidates are compared with the query in full. Only the first prefix_length characters are
+    # used for deletes, which bounds the number kept per name and the number generated per query.
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        self._max_distance = max_distance
+        self._prefix_length = prefix_length
+        self._names = list()
+        self._ids = dict()
+        self._deletes = dict()
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name: str):
+        return name in self._ids
+
+    def add(self, name: str):
+        # Adds a name, unless it is already present.
+        if name in self._ids:
+            return
+
+        name_id = len(self._names)
+        self._names.append(name)
+        self._ids[name] = name_id
+        for delete in deletes(name.casefold()[:self._prefix_length], self._max_distance):
+            self._deletes.setdefault(delete, []).append(name_id)
+
+    def lookup(self, term: str, max_distance: int = None):
+        # Returns (name, distance) pairs for the names within max_distance edits of term, ignoring case, closest
+        # first and then by name.
+        max_distance = self._max_distance if max_distance is None else min(max_distance, self._max_distance)
+        term = term.casefold().strip()
+        if not term:
+            return []
+
+        candidates = set()
+        for delete in deletes(term[:self._prefix_length], max_distance):
+            candidates.update(self._deletes.get(delete, ()))
+
+        matches = list()
+        for name_id in candidates:
+            name = self._names[name_id]
+            distance = edit_distance(term, name.casefold(), max_distance)
+            if distance <= max_distance:
+                matches.append((name, distance))
+
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
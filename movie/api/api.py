@@ -0,0 +1,116 @@
+import json
+
+from flask import Blueprint, Response
+from flask import request, jsonify
+
+import movie.adapters.repository as repo
+import movie.api.services as services
+from movie.movies.movies import read_browse_filters
+from movie.movies.services import NonExistentMovieException
+
+# List responses are written this many items at a time.
+STREAM_CHUNK_SIZE = 100
+
+# Configure Blueprint.
+api_blueprint = Blueprint(
+    'api_bp', __name__, url_prefix='/api/v1')
+
+
+def stream_json(name: str, items, **header):
+    # Returns a response holding a JSON object with the header values and a list of items under name, written out
+    # as the items are produced rather than built in memory first.
+    def generate():
+        yield json.dumps(dict(header, **{name: []}))[:-2]
+        separator = ''
+        chunk = list()
+        for item in items:
+            chunk.append(json.dumps(item))
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield separator + ', '.join(chunk)
+                separator = ', '
+                chunk = list()
+        if chunk:
+            yield separator + ', '.join(chunk)
+        yield ']}'
+
+    return Response(generate(), mimetype='application/json')
+
+
+def error(message: str, status: int):
+    response = jsonify(error=message)
+    response.status_code = status
+    return response
+
+
+def read_page():
+    # Reads the offset and limit query parameters of list endpoints; without a limit, lists run to their end.
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get('limit', type=int)
+    return offset, None if limit is None else max(limit, 0)
+
+
+@api_blueprint.errorhandler(services.UnknownFieldException)
+def unknown_field(exception):
+    return error(str(exception), 400)
+
+
+@api_blueprint.errorhandler(NonExistentMovieException)
+def non_existent_movie(exception):
+    return error('There is no such movie', 404)
+
+
+@api_blueprint.route('/movies', methods=['GET'])
+def movies():
+    # Read query parameters: fields, offset and limit, and the filters of the /movies page.
+    fields = services.read_fields(request.args.get('fields'), services.MOVIE_FIELDS, services.DEFAULT_MOVIE_FIELDS)
+    offset, limit = read_page()
+    movie_ids = services.get_movie_ids(read_browse_filters(request.args), repo.repo_instance)
+
+    items = services.iter_movies(movie_ids, fields, offset, limit, repo.repo_instance)
+    return stream_json('movies', items, number_of_movies=len(movie_ids), fields=fields)
+
+
+@api_blueprint.route('/movies/<int:movie_id>', methods=['GET'])
+def movie(movie_id):
+    fields = services.read_fields(request.args.get('fields'), services.MOVIE_FIELDS, services.DEFAULT_MOVIE_FIELDS)
+    return jsonify(services.get_movie(movie_id, fields, repo.repo_instance))
+
+
+@api_blueprint.route('/movies/<int:movie_id>/reviews', methods=['GET'])
+def reviews_of_movie(movie_id):
+    fields = services.read_fields(request.args.get('fields'), services.REVIEW_FIELDS, services.DEFAULT_REVIEW_FIELDS)
+    offset, limit = read_page()
+
+    movie_reviews = services.get_reviews(movie_id, repo.repo_instance)
+    items = services.iter_reviews(movie_reviews, fields, offset, limit, repo.repo_instance)
+    return stream_json('reviews', items, number_of_reviews=len(movie_reviews), fields=fields)
+
+
+@api_blueprint.route('/reviews', methods=['GET'])
+def reviews():
+    fields = services.read_fields(request.args.get('fields'), services.REVIEW_FIELDS, services.DEFAULT_REVIEW_FIELDS)
+    offset, limit = read_page()
+    all_reviews = services.get_reviews(None, repo.repo_instance)
+    items = services.iter_reviews(all_reviews, fields, offset, limit, repo.repo_instance)
+    return stream_json('reviews', items, number_of_reviews=len(all_reviews), fields=fields)
+
+
+@api_blueprint.route('/genres', methods=['GET'])
+def genres():
+    fields = services.read_fields(request.args.get('fields'), services.NAME_FIELDS, services.DEFAULT_NAME_FIELDS)
+    offset, limit = read_page()
+    return stream_json('genres', services.iter_genres(fields, offset, limit, repo.repo_instance), fields=fields)
+
+
+@api_blueprint.route('/actors', methods=['GET'])
+def actors():
+    fields = services.read_fields(request.args.get('fields'), services.NAME_FIELDS, services.DEFAULT_NAME_FIELDS)
+    offset, limit = read_page()
+    return stream_json('actors', services.iter_actors(fields, offset, limit, repo.repo_instance), fields=fields)
+
+
+@api_blueprint.route('/years', methods=['GET'])
+def years():
+    fields = services.read_fields(request.args.get('fields'), services.YEAR_FIELDS, services.DEFAULT_YEAR_FIELDS)
+    offset, limit = read_page()
+    return stream_json('years', services.iter_years(fields, offset, limit, repo.repo_instance), fields=fields)
@@ -0,0 +1,160 @@
+from itertools import islice
+
+from movie.adapters.repository import AbstractRepository
+from movie.movies.services import NonExistentMovieException
+
+
+class UnknownFieldException(Exception):
+    pass
+
+
+# ============================================
+# Fields of the entities the API returns
+# ============================================
+
+# Each field is computed by a function of the entity and the repository, so that only the fields asked for are.
+
+MOVIE_FIELDS = {
+    'id': lambda movie, repo: movie.id,
+    'title': lambda movie, repo: movie.title,
+    'release_year': lambda movie, repo: movie.release_year,
+    'description': lambda movie, repo: movie.description,
+    'director': lambda movie, repo: None if movie.director is None else movie.director.director_full_name,
+    'actors': lambda movie, repo: [actor.actor_full_name for actor in movie.actors],
+    'genres': lambda movie, repo: [genre.genre_name for genre in movie.genres],
+    'runtime_minutes': lambda movie, repo: movie.runtime_minutes,
+    'rating': lambda movie, repo: repo.get_movie_metric(movie.id, 'rating'),
+    'votes': lambda movie, repo: repo.get_movie_metric(movie.id, 'votes'),
+    'revenue': lambda movie, repo: repo.get_movie_metric(movie.id, 'revenue'),
+    'metascore': lambda movie, repo: repo.get_movie_metric(movie.id, 'metascore'),
+    'number_of_reviews': lambda movie, repo: len(movie.reviews),
+    'reviews': lambda movie, repo: [review_to_dict(review, DEFAULT_REVIEW_FIELDS, repo) for review in movie.reviews],
+}
+DEFAULT_MOVIE_FIELDS = ('id', 'title', 'release_year', 'director', 'actors', 'genres', 'runtime_minutes')
+
+REVIEW_FIELDS = {
+    'movie_id': lambda review, repo: None if review.movie is None else review.movie.id,
+    'review_text': lambda review, repo: review.review_text,
+    'rating': lambda review, repo: review.rating,
+    'timestamp': lambda review, repo: None if review.timestamp is None else review.timestamp.isoformat(),
+    'user': lambda review, repo: None if review.user is None else review.user.username,
+}
+DEFAULT_REVIEW_FIELDS = tuple(REVIEW_FIELDS)
+
+# Genres, actors and years are passed around by name, or by year, with the ids of their movies, sorted by id.
+NAME_FIELDS = {
+    'name': lambda name_and_movie_ids, repo: name_and_movie_ids[0],
+    'number_of_movies': lambda name_and_movie_ids, repo: len(name_and_movie_ids[1]),
+    'movie_ids': lambda name_and_movie_ids, repo: list(name_and_movie_ids[1]),
+}
+DEFAULT_NAME_FIELDS = ('name', 'number_of_movies')
+
+YEAR_FIELDS = dict(NAME_FIELDS, year=NAME_FIELDS['name'])
+del YEAR_FIELDS['name']
+DEFAULT_YEAR_FIELDS = ('year', 'number_of_movies')
+
+
+def read_fields(fields: str, available: dict, default):
+    # Returns the names of the fields in a comma-separated fields parameter, or default if there is none. Raises
+    # UnknownFieldException if a name isn't one of the available fields.
+    if not fields:
+        return tuple(default)
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise UnknownFieldException(f'Unknown fields {", ".join(unknown)}; the fields are {", ".join(available)}')
+    return names
+
+
+def project(entity, fields, available: dict, repo: AbstractRepository):
+    return {name: available[name](entity, repo) for name in fields}
+
+
+def _page(items, offset: int, limit: int = None):
+    return islice(items, offset, None if limit is None else offset + limit)
+
+
+# ============================================
+# Movies
+# ============================================
+
+def _get_movie(movie_id: int, repo: AbstractRepository):
+    # Movie ids start at 1; the repository would otherwise wrap an id of 0 around to the last movie.
+    movie = repo.get_movie(movie_id) if movie_id >= 1 else None
+    if movie is None:
+        raise NonExistentMovieException
+    return movie
+
+
+def get_movie(movie_id: int, fields, repo: AbstractRepository):
+    return project(_get_movie(movie_id, repo), fields, MOVIE_FIELDS, repo)
+
+
+def get_movie_ids(filters: dict, repo: AbstractRepository):
+    # Returns the ids of the movies matching filters, as for the /movies page, in id order. Without filters, the ids
+    # of the whole catalog are a range rather than a list.
+    if not any(filters.get(name) for name in ('genres', 'actors', 'director', 'year_range', 'runtime_range')):
+        return range(1, repo.get_number_of_movies() + 1)
+    return repo.get_movie_ids_by_filters(
+        genres=filters.get('genres', ()),
+        actors=filters.get('actors', ()),
+        director=filters.get('director'),
+        year_range=filters.get('year_range'),
+        runtime_range=filters.get('runtime_range')
+    )
+
+
+def iter_movies(movie_ids, fields, offset: int, limit: int, repo: AbstractRepository):
+    # Yields the movies with the given ids, from the offset'th and up to limit of them, in dict form with the given
+    # fields. Movies are looked up one at a time as they are yielded.
+    for movie_id in _page(movie_ids, offset, limit):
+        yield project(repo.get_movie(movie_id), fields, MOVIE_FIELDS, repo)
+
+
+# ============================================
+# Reviews
+# ============================================
+
+def review_to_dict(review, fields, repo: AbstractRepository):
+    return project(review, fields, REVIEW_FIELDS, repo)
+
+
+def get_reviews(movie_id, repo: AbstractRepository):
+    # Returns the reviews of the movie with movie_id, or every review if movie_id is None, in the order they were
+    # added.
+    if movie_id is None:
+        return repo.get_reviews()
+    return _get_movie(movie_id, repo).reviews
+
+
+def iter_reviews(reviews, fields, offset: int, limit: int, repo: AbstractRepository):
+    for review in _page(reviews, offset, limit):
+        yield review_to_dict(review, fields, repo)
+
+
+# ============================================
+# Genres, actors and years
+# ============================================
+
+def iter_genres(fields, offset: int, limit: int, repo: AbstractRepository):
+    for genre in _page(repo.get_genres(), offset, limit):
+        name = genre.genre_name
+        yield project((name, repo.get_movie_ids_by_genre(name)), fields, NAME_FIELDS, repo)
+
+
+def iter_actors(fields, offset: int, limit: int, repo: AbstractRepository):
+    for actor in _page(repo.get_actors(), offset, limit):
+        name = actor.actor_full_name
+        yield project((name, repo.get_movie_ids_by_actor(name)), fields, NAME_FIELDS, repo)
+
+
+def _release_years(repo: AbstractRepository):
+    year = repo.get_first_release_year()
+    while year is not None:
+        yield year
+        year = repo.get_next_release_year(year)
+
+
+def iter_years(fields, offset: int, limit: int, repo: AbstractRepository):
+    for year in _page(_release_years(repo), offset, limit):
+        yield project((year, repo.get_movie_ids_by_release_year_range(year, year)), fields, YEAR_FIELDS, repo)
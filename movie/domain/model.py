@@ -3,7 +3,12 @@ from datetime import datetime
 from typing import List, Iterable
 
 
+# The entity classes use __slots__, and collections that are usually empty are only allocated on first use, to keep
+# catalogs of millions of entities compact. Properties return a new empty list for a collection that was never
+# allocated, so add to collections through the entity's methods.
+
 class Director:
+    __slots__ = ('__director_full_name',)
 
     def __init__(self, director_full_name: str):
         if director_full_name == "" or type(director_full_name) is not str:
@@ -31,6 +36,7 @@ class Director:
 
 
 class Actor:
+    __slots__ = ('__actor_full_name', '__actors_this_one_has_worked_with')
 
     def __init__(self, actor_full_name: str):
         if actor_full_name == "" or type(actor_full_name) is not str:
@@ -38,7 +44,7 @@ class Actor:
         else:
             self.__actor_full_name = actor_full_name.strip()
 
-        self.__actors_this_one_has_worked_with = set()
+        self.__actors_this_one_has_worked_with = None
 
     @property
     def actor_full_name(self) -> str:
@@ -46,10 +52,13 @@ class Actor:
 
     def add_actor_colleague(self, colleague):
         if isinstance(colleague, self.__class__):
+            if self.__actors_this_one_has_worked_with is None:
+                self.__actors_this_one_has_worked_with = set()
             self.__actors_this_one_has_worked_with.add(colleague)
 
     def check_if_this_actor_worked_with(self, colleague):
-        return colleague in self.__actors_this_one_has_worked_with
+        return self.__actors_this_one_has_worked_with is not None and \
+            colleague in self.__actors_this_one_has_worked_with
 
     def __repr__(self):
         return f'<Actor {self.__actor_full_name}>'
@@ -67,6 +76,8 @@ class Actor:
 
 
 class Movie:
+    __slots__ = ('__id', '__title', '__release_year', '__description', '__director', '__actors', '__genres',
+                 '__runtime_minutes', '__reviews')
 
     def __set_title_internal(self, title: str):
         if title.strip() == "" or type(title) is not str:
@@ -88,20 +99,20 @@ class Movie:
 
         self.__description = None
         self.__director = None
-        self.__actors = []
-        self.__genres = []
+        self.__actors = None
+        self.__genres = None
         self.__runtime_minutes = None
-        self.__reviews = []
+        self.__reviews = None
 
     # essential attributes
 
     @property
     def reviews(self) -> list:
-        return self.__reviews
+        return self.__reviews if self.__reviews is not None else []
 
     @property
     def number_of_reviews(self) -> int:
-        return len(self.__reviews)
+        return len(self.__reviews) if self.__reviews is not None else 0
 
     @property
     def id(self) -> int:
@@ -156,13 +167,16 @@ class Movie:
 
     @property
     def actors(self) -> list:
-        return self.__actors
+        return self.__actors if self.__actors is not None else []
 
     def add_actor(self, actor: Actor):
-        if not isinstance(actor, Actor) or actor in self.__actors:
+        if not isinstance(actor, Actor):
             return
 
-        self.__actors.append(actor)
+        if self.__actors is None:
+            self.__actors = [actor]
+        elif actor not in self.__actors:
+            self.__actors.append(actor)
 
     def remove_actor(self, actor: Actor):
         if not isinstance(actor, Actor):
@@ -170,22 +184,28 @@ class Movie:
 
         try:
             self.__actors.remove(actor)
-        except ValueError:
+        except (ValueError, AttributeError):
             # print(f"Movie.remove_actor: Could not find {actor} in list of actors.")
             pass
 
     def add_review(self, review: 'Review'):
-        self.__reviews.append(review)
+        if self.__reviews is None:
+            self.__reviews = [review]
+        else:
+            self.__reviews.append(review)
 
     @property
     def genres(self) -> list:
-        return self.__genres
+        return self.__genres if self.__genres is not None else []
 
     def add_genre(self, genre: 'Genre'):
-        if not isinstance(genre, Genre) or genre in self.__genres:
+        if not isinstance(genre, Genre):
             return
 
-        self.__genres.append(genre)
+        if self.__genres is None:
+            self.__genres = [genre]
+        elif genre not in self.__genres:
+            self.__genres.append(genre)
 
     def remove_genre(self, genre: 'Genre'):
         if not isinstance(genre, Genre):
@@ -193,13 +213,13 @@ class Movie:
 
         try:
             self.__genres.remove(genre)
-        except ValueError:
+        except (ValueError, AttributeError):
             # print(f"Movie.remove_genre: Could not find {genre} in list of genres.")
             pass
 
     @property
     def number_of_genres(self) -> int:
-        return len(self.__genres)
+        return len(self.__genres) if self.__genres is not None else 0
 
     @property
     def runtime_minutes(self) -> int:
@@ -233,6 +253,7 @@ class Movie:
 
 
 class Review:
+    __slots__ = ('__movie', '__review_text', '__rating', '__timestamp', '__user')
 
     def __init__(self, movie: Movie, review_text: str, rating: int, user: 'User'):
         if isinstance(movie, Movie):
@@ -283,9 +304,10 @@ class Review:
 
 
 class Genre:
+    __slots__ = ('_genre_movies', '__genre_name')
 
     def __init__(self, genre_name: str):
-        self._genre_movies: List[Movie] = list()
+        self._genre_movies: List[Movie] = None
         if genre_name == "" or type(genre_name) is not str:
             self.__genre_name = None
         else:
@@ -297,17 +319,20 @@ class Genre:
 
     @property
     def genre_movies(self) -> Iterable[Movie]:
-        return iter(self._genre_movies)
+        return iter(self._genre_movies if self._genre_movies is not None else ())
 
     @property
     def number_of_genre_movies(self) -> int:
-        return len(self._genre_movies)
+        return len(self._genre_movies) if self._genre_movies is not None else 0
 
     def is_applied_to(self, movie: Movie) -> bool:
-        return movie in self._genre_movies
+        return self._genre_movies is not None and movie in self._genre_movies
 
     def add_movie(self, movie: Movie):
-        self._genre_movies.append(movie)
+        if self._genre_movies is None:
+            self._genre_movies = [movie]
+        else:
+            self._genre_movies.append(movie)
 
     def __repr__(self):
         return f'<Genre {self.__genre_name}>'
@@ -325,6 +350,7 @@ class Genre:
 
 
 class User:
+    __slots__ = ('__username', '__password', '__watched_movies', '__reviews', '__time_spent_watching_movies_minutes')
 
     def __init__(self, username: str, password: str):
         if username == "" or type(username) is not str:
@@ -335,8 +361,8 @@ class User:
             self.__password = None
         else:
             self.__password = password
-        self.__watched_movies = list()
-        self.__reviews = list()
+        self.__watched_movies = None
+        self.__reviews = None
         self.__time_spent_watching_movies_minutes = 0
 
     @property
@@ -349,11 +375,11 @@ class User:
 
     @property
     def watched_movies(self) -> list:
-        return self.__watched_movies
+        return self.__watched_movies if self.__watched_movies is not None else []
 
     @property
     def reviews(self) -> list:
-        return self.__reviews
+        return self.__reviews if self.__reviews is not None else []
 
     @property
     def time_spent_watching_movies_minutes(self) -> int:
@@ -361,12 +387,18 @@ class User:
 
     def watch_movie(self, movie: Movie):
         if isinstance(movie, Movie):
-            self.__watched_movies.append(movie)
+            if self.__watched_movies is None:
+                self.__watched_movies = [movie]
+            else:
+                self.__watched_movies.append(movie)
             self.__time_spent_watching_movies_minutes += movie.runtime_minutes
 
     def add_review(self, review: Review):
         if isinstance(review, Review):
-            self.__reviews.append(review)
+            if self.__reviews is None:
+                self.__reviews = [review]
+            else:
+                self.__reviews.append(review)
 
     def __repr__(self):
         return f'<User {self.__username} {self.__password}>'
@@ -447,7 +479,7 @@ class MovieFileCSVReader:
             for row in movie_file_reader:
                 movie = Movie(row['Title'], int(row['Year']))
                 movie.description = row['Description']
-                movie.__id = int(row['Rank'])
+                movie.id = int(row['Rank'])
                 movie.runtime_minutes = int(row['Runtime (Minutes)'])
 
                 director = Director(row['Director'])
@@ -11,6 +11,7 @@ from wtforms.validators import DataRequired, Length, ValidationError
 import movie.adapters.repository as repo
 import movie.utilities.utilities as utilities
 import movie.movies.services as services
+import movie.search.services as search_services
 
 home_blueprint = Blueprint(
     'home_bp', __name__)
@@ -20,19 +21,23 @@ home_blueprint = Blueprint(
 def home():
     form = SearchForm(request.form)
     if request.method == 'POST':
+        if ':' in (form.actor.data or ''):
+            # Input such as genre:Sci-Fi actor:"Chris Pratt" is a query in the query language.
+            return redirect(url_for('search_bp.query', q=form.actor.data))
         return movies_by_actor(form)
     return render_template('home/home.html', form=form, selected_movies=utilities.get_selected_movies())
 
 
 @home_blueprint.route('/movies_by_actor', methods=['GET', 'POST'])
-def movies_by_actor(form):
-    actor_name = form.actor.data
-    print(actor_name)
-
-    movies_per_page = 3
+def movies_by_actor(form=None):
+    # The actor comes from the home page's form when posted there, and from the actor query parameter otherwise.
+    if form is None:
+        form = SearchForm(request.form)
+    actor_name = request.args.get('actor') or form.actor.data or ''
 
     # Read query parameters.
     cursor = request.args.get('cursor')
+    page_size = services.read_page_size(request.args)
     movie_to_show_reviews = request.args.get('view_reviews_for')
 
     if movie_to_show_reviews is None:
@@ -42,43 +47,49 @@ def movies_by_actor(form):
         # Convert movie_to_show_reviews from string to int.
         movie_to_show_reviews = int(movie_to_show_reviews)
 
-    if cursor is None:
-        # No cursor query parameter, so initialise cursor to start at the beginning.
-        cursor = 0
-    else:
-        # Convert cursor from string to int.
-        cursor = int(cursor)
-
-    # Retrieve movie ids for movie with genre_name.
-    movie_ids = services.get_movie_ids_by_actor(actor_name, repo.repo_instance)
+    # Retrieve the page of movie ids for movies starring actor_name that the cursor points at.
+    page = services.get_movie_ids_page('actor', actor_name, cursor, page_size, repo.repo_instance)
 
     # Retrieve the batch of movies to display on the Web page.
-    movies = services.get_movies_by_id(movie_ids[cursor:cursor + movies_per_page], repo.repo_instance)
+    movies = services.get_movies_by_id(page['movie_ids'], repo.repo_instance)
+
+    # If the actor has no movies, the name may be misspelt, so offer the closest actor names instead.
+    suggestions = list()
+    if page['number_of_movies'] == 0:
+        suggestions = search_services.get_name_corrections(actor_name, ('actor',), repo.repo_instance)
+        for suggestion in suggestions:
+            suggestion['url'] = utilities.get_name_url(suggestion['kind'], suggestion['name'])
 
     first_movie_url = None
     last_movie_url = None
     next_movie_url = None
     prev_movie_url = None
 
-    if cursor > 0:
+    if page['has_previous']:
         # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
-        prev_movie_url = url_for('home_bp.movies_by_actor', actor=actor_name, cursor=cursor - movies_per_page)
-        first_movie_url = url_for('home_bp.movies_by_actor', actor=actor_name)
+        prev_movie_url = url_for('home_bp.movies_by_actor', actor=actor_name, cursor=page['previous_cursor'],
+                                 page_size=page_size)
+        first_movie_url = url_for('home_bp.movies_by_actor', actor=actor_name, page_size=page_size)
 
-    if cursor + movies_per_page < len(movie_ids):
+    if page['next_cursor'] is not None:
         # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
-        next_movie_url = url_for('home_bp.movies_by_actor', actor=actor_name, cursor=cursor + movies_per_page)
-
-        last_cursor = movies_per_page * int(len(movie_ids) / movies_per_page)
-        if len(movie_ids) % movies_per_page == 0:
-            last_cursor -= movies_per_page
-        last_movie_url = url_for('home_bp.movies_by_actor', actor=actor_name, cursor=last_cursor)
-
-    # Construct urls for viewing movie reviews and adding reviews.
+        next_movie_url = url_for('home_bp.movies_by_actor', actor=actor_name, cursor=page['next_cursor'],
+                                 page_size=page_size)
+        last_movie_url = url_for('home_bp.movies_by_actor', actor=actor_name, cursor=page['last_cursor'],
+                                 page_size=page_size)
+
+    # Construct urls for viewing movie reviews and adding reviews, and find similar movies.
+    view_review_url = utilities.get_url_builder('home_bp.movies_by_actor', 'view_comments_for', actor=actor_name,
+                                                cursor=cursor, page_size=page_size)
+    add_review_url = utilities.get_url_builder('home_bp.movies_by_actor', 'movie')
     for movie in movies:
-        movie['view_review_url'] = url_for('home_bp.movies_by_actor', actor=actor_name, cursor=cursor,
-                                           view_comments_for=movie['id'])
-        movie['add_review_url'] = url_for('home_bp.movies_by_actor', movie=movie['id'])
+        movie['view_review_url'] = view_review_url(movie['id'])
+        movie['add_review_url'] = add_review_url(movie['id'])
+        movie['similar_movies'] = utilities.get_similar_movies(movie['id'])
+
+    # Construct urls for showing the same movies with each page size.
+    page_size_urls = {size: url_for('home_bp.movies_by_actor', actor=actor_name, cursor=cursor, page_size=size)
+                      for size in services.PAGE_SIZES}
 
     # Generate the webpage to display the movies.
     return render_template(
@@ -87,6 +98,9 @@ def movies_by_actor(form):
         movies=movies,
         form=form,
         movies_title='Movies starring actor: ' + actor_name,
+        number_of_movies=page['number_of_movies'],
+        page_size=page_size,
+        page_size_urls=page_size_urls,
         selected_movies=utilities.get_selected_movies(len(movies) * 2),
         handler_url=url_for('home_bp.movies_by_actor'),
         actor_urls=utilities.get_actors_and_urls(),
@@ -96,6 +110,54 @@ def movies_by_actor(form):
         prev_movie_url=prev_movie_url,
         next_movie_url=next_movie_url,
         show_reviews_for_movie=movie_to_show_reviews,
+        suggestions=suggestions
+    )
+
+
+@home_blueprint.route('/degrees_of_separation', methods=['GET'])
+def degrees_of_separation():
+    # Read query parameters.
+    actor_name = (request.args.get('actor') or '').strip()
+    other_actor_name = (request.args.get('other_actor') or '').strip()
+
+    path = None
+    unknown_actor = None
+    suggestions = list()
+    if actor_name and other_actor_name:
+        try:
+            path = services.get_costar_path(actor_name, other_actor_name, repo.repo_instance)
+        except services.UnknownActorException as exception:
+            # Offer the closest actor names to the one that wasn't found.
+            unknown_actor = exception.args[0]
+            suggestions = search_services.get_name_corrections(unknown_actor, ('actor',), repo.repo_instance)
+            for suggestion in suggestions:
+                if unknown_actor == actor_name:
+                    suggestion['url'] = url_for('home_bp.degrees_of_separation', actor=suggestion['name'],
+                                                other_actor=other_actor_name)
+                else:
+                    suggestion['url'] = url_for('home_bp.degrees_of_separation', actor=actor_name,
+                                                other_actor=suggestion['name'])
+
+    # Construct urls for the actors and movies along the path.
+    actor_urls = utilities.get_actors_and_urls()
+    add_review_url = utilities.get_url_builder('movies_bp.review_on_movie', 'movie')
+    for step in path or []:
+        # Actors only reach the graph through movies, so a costar may not be in the actor index.
+        step['costar_url'] = actor_urls.get(step['costar']) or utilities.get_name_url('actor', step['costar'])
+        step['movie']['add_review_url'] = add_review_url(step['movie']['id'])
+
+    return render_template(
+        'home/separation.html',
+        title='Degrees of separation',
+        actor_name=actor_name,
+        other_actor_name=other_actor_name,
+        searched=bool(actor_name and other_actor_name),
+        path=path,
+        unknown_actor=unknown_actor,
+        suggestions=suggestions,
+        actor_url=url_for('home_bp.movies_by_actor', actor=actor_name),
+        selected_movies=utilities.get_selected_movies(),
+        genre_urls=utilities.get_genres_and_urls()
     )
 
 
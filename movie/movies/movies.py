@@ -13,6 +13,7 @@ from wtforms.validators import DataRequired, Length, ValidationError
 import movie.adapters.repository as repo
 import movie.utilities.utilities as utilities
 import movie.movies.services as services
+import movie.search.services as search_services
 
 from movie.authentication.authentication import login_required
 
@@ -22,20 +23,18 @@ movies_blueprint = Blueprint(
 
 
 @movies_blueprint.route('/movies_by_year', methods=['GET'])
+@utilities.conditional_on_catalog
 def movies_by_year():
     # Read query parameters.
     target_year = request.args.get('release_year')
     movie_to_show_reviews = request.args.get('view_reviews_for')
 
-    # Fetch the first and last movies in the series.
-    first_movie = services.get_first_movie(repo.repo_instance)
-    last_movie = services.get_last_movie(repo.repo_instance)
-
     if target_year is None:
-        # No date query parameter, so return movies of first year of the series.
-        target_year = first_movie['release_year']
-    else:
-        target_year = target_year
+        # No year query parameter, so return movies of the first year of the series.
+        target_year = services.get_first_release_year(repo.repo_instance)
+        if target_year is None:
+            # The repository is empty, so return the homepage.
+            return redirect(url_for('home_bp.home'))
 
     if movie_to_show_reviews is None:
         # No view-reviews query parameter, so set to a non-existent movie id.
@@ -44,12 +43,11 @@ def movies_by_year():
         # Convert movie_to_show_reviews from string to int.
         movie_to_show_reviews = int(movie_to_show_reviews)
 
-    # Fetch movie(s) for the target year. This call also returns the previous and next year for movies immediately
-    # before and after the target year.
+    # Fetch movie(s) for the target year, and the closest years either side of it that have movies.
     target_year = int(target_year)
     movies = services.get_movies_by_release_year(target_year, repo.repo_instance)
-    previous_year = target_year - 1
-    next_year = target_year + 1
+    years = services.get_release_year_navigation(target_year, repo.repo_instance)
+
     first_movie_url = None
     last_movie_url = None
     next_movie_url = None
@@ -57,21 +55,24 @@ def movies_by_year():
 
     if len(movies) > 0:
         # There's at least one movie for the target year.
-        if previous_year is not None:
+        if years['previous'] is not None:
             # There are movies on a previous year, so generate URLs for the 'previous' and 'first' navigation buttons.
-            prev_movie_url = url_for('movies_bp.movies_by_year', release_year=str(previous_year))
-            first_movie_url = url_for('movies_bp.movies_by_year', release_year=str(first_movie['release_year']))
+            prev_movie_url = url_for('movies_bp.movies_by_year', release_year=str(years['previous']))
+            first_movie_url = url_for('movies_bp.movies_by_year', release_year=str(years['first']))
 
         # There are movies on a subsequent year, so generate URLs for the 'next' and 'last' navigation buttons.
-        if next_year is not None:
-            next_movie_url = url_for('movies_bp.movies_by_year', release_year=str(next_year))
-            last_movie_url = url_for('movies_bp.movies_by_year', release_year=str(last_movie['release_year']))
-
-        # Construct urls for viewing movie reviews and adding reviews.
+        if years['next'] is not None:
+            next_movie_url = url_for('movies_bp.movies_by_year', release_year=str(years['next']))
+            last_movie_url = url_for('movies_bp.movies_by_year', release_year=str(years['last']))
+
+        # Construct urls for viewing movie reviews and adding reviews, and find similar movies.
+        view_review_url = utilities.get_url_builder('movies_bp.movies_by_year', 'view_comments_for',
+                                                    year=str(target_year))
+        add_review_url = utilities.get_url_builder('movies_bp.review_on_movie', 'movie')
         for movie in movies:
-            movie['view_review_url'] = url_for('movies_bp.movies_by_year', year=str(target_year),
-                                               view_comments_for=movie['id'])
-            movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=str(movie['id']))
+            movie['view_review_url'] = view_review_url(movie['id'])
+            movie['add_review_url'] = add_review_url(movie['id'])
+            movie['similar_movies'] = utilities.get_similar_movies(movie['id'])
 
         # Generate the webpage to display the reviews.
         return render_template(
@@ -93,12 +94,12 @@ def movies_by_year():
 
 
 @movies_blueprint.route('/movies_by_genre', methods=['GET'])
+@utilities.conditional_on_catalog
 def movies_by_genre():
-    movies_per_page = 3
-
     # Read query parameters.
     genre_name = request.args.get('genre')
     cursor = request.args.get('cursor')
+    page_size = services.read_page_size(request.args)
     movie_to_show_reviews = request.args.get('view_reviews_for')
 
     if movie_to_show_reviews is None:
@@ -108,43 +109,42 @@ def movies_by_genre():
         # Convert movie_to_show_reviews from string to int.
         movie_to_show_reviews = int(movie_to_show_reviews)
 
-    if cursor is None:
-        # No cursor query parameter, so initialise cursor to start at the beginning.
-        cursor = 0
-    else:
-        # Convert cursor from string to int.
-        cursor = int(cursor)
-
-    # Retrieve movie ids for movie with genre_name.
-    movie_ids = services.get_movie_ids_by_genre(genre_name, repo.repo_instance)
+    # Retrieve the page of movie ids for movies with genre_name that the cursor points at.
+    page = services.get_movie_ids_page('genre', genre_name, cursor, page_size, repo.repo_instance)
 
     # Retrieve the batch of movies to display on the Web page.
-    movies = services.get_movies_by_id(movie_ids[cursor:cursor + movies_per_page], repo.repo_instance)
+    movies = services.get_movies_by_id(page['movie_ids'], repo.repo_instance)
 
     first_movie_url = None
     last_movie_url = None
     next_movie_url = None
     prev_movie_url = None
 
-    if cursor > 0:
+    if page['has_previous']:
         # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
-        prev_movie_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor - movies_per_page)
-        first_movie_url = url_for('movies_bp.movies_by_genre', genre=genre_name)
+        prev_movie_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=page['previous_cursor'],
+                                 page_size=page_size)
+        first_movie_url = url_for('movies_bp.movies_by_genre', genre=genre_name, page_size=page_size)
 
-    if cursor + movies_per_page < len(movie_ids):
+    if page['next_cursor'] is not None:
         # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
-        next_movie_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor + movies_per_page)
-
-        last_cursor = movies_per_page * int(len(movie_ids) / movies_per_page)
-        if len(movie_ids) % movies_per_page == 0:
-            last_cursor -= movies_per_page
-        last_movie_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=last_cursor)
-
-    # Construct urls for viewing movie reviews and adding reviews.
+        next_movie_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=page['next_cursor'],
+                                 page_size=page_size)
+        last_movie_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=page['last_cursor'],
+                                 page_size=page_size)
+
+    # Construct urls for viewing movie reviews and adding reviews, and find similar movies.
+    view_review_url = utilities.get_url_builder('movies_bp.movies_by_genre', 'view_comments_for', genre=genre_name,
+                                                cursor=cursor, page_size=page_size)
+    add_review_url = utilities.get_url_builder('movies_bp.review_on_movie', 'movie')
     for movie in movies:
-        movie['view_review_url'] = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor,
-                                           view_comments_for=movie['id'])
-        movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['id'])
+        movie['view_review_url'] = view_review_url(movie['id'])
+        movie['add_review_url'] = add_review_url(movie['id'])
+        movie['similar_movies'] = utilities.get_similar_movies(movie['id'])
+
+    # Construct urls for showing the same movies with each page size.
+    page_size_urls = {size: url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor, page_size=size)
+                      for size in services.PAGE_SIZES}
 
     # Generate the webpage to display the movies.
     return render_template(
@@ -152,6 +152,9 @@ def movies_by_genre():
         title='Movies',
         movies_title='Movies by genre: ' + genre_name,
         movies=movies,
+        number_of_movies=page['number_of_movies'],
+        page_size=page_size,
+        page_size_urls=page_size_urls,
         selected_movies=utilities.get_selected_movies(len(movies) * 2),
         genre_urls=utilities.get_genres_and_urls(),
         first_movie_url=first_movie_url,
@@ -162,6 +165,210 @@ def movies_by_genre():
     )
 
 
+@movies_blueprint.route('/movies', methods=['GET'])
+def browse_movies():
+    movies_per_page = 10
+
+    # Read query parameters. genre and actor may be repeated; every filter given must match.
+    filters = read_browse_filters(request.args)
+    page = max(request.args.get('page', 1, type=int), 1)
+
+    movies, number_of_matches, facet_counts = services.get_movies_by_filters(
+        filters, page, movies_per_page, repo.repo_instance)
+
+    first_movie_url = None
+    last_movie_url = None
+    next_movie_url = None
+    prev_movie_url = None
+
+    if page > 1:
+        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+        prev_movie_url = browse_url(filters, page=page - 1)
+        first_movie_url = browse_url(filters)
+
+    last_page = (number_of_matches + movies_per_page - 1) // movies_per_page
+    if page < last_page:
+        # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
+        next_movie_url = browse_url(filters, page=page + 1)
+        last_movie_url = browse_url(filters, page=last_page)
+
+    # Construct urls that narrow the results down by one more facet value.
+    facets = dict()
+    for facet, counts in facet_counts.items():
+        facets[facet] = [{'value': value, 'count': count, 'url': browse_url(narrow_filters(filters, facet, value))}
+                         for value, count in counts]
+
+    # Construct urls for adding reviews.
+    add_review_url = utilities.get_url_builder('movies_bp.review_on_movie', 'movie')
+    for movie in movies:
+        movie['add_review_url'] = add_review_url(movie['id'])
+
+    return render_template(
+        'movies/browse.html',
+        title='Movies',
+        filters=filters,
+        clear_filters_url=url_for('movies_bp.browse_movies'),
+        number_of_matches=number_of_matches,
+        facets=facets,
+        movies=movies,
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls(),
+        first_movie_url=first_movie_url,
+        last_movie_url=last_movie_url,
+        prev_movie_url=prev_movie_url,
+        next_movie_url=next_movie_url
+    )
+
+
+@movies_blueprint.route('/top', methods=['GET'])
+def top_movies():
+    # Read query parameters. A leaderboard covers the whole catalog, one genre or one release year.
+    metric = request.args.get('metric', 'rating')
+    genre_name = request.args.get('genre') or None
+    release_year = request.args.get('release_year', type=int)
+    limit = request.args.get('limit', 10, type=int)
+    if genre_name is not None:
+        release_year = None
+
+    try:
+        movies = services.get_leaderboard(metric, genre_name, release_year, limit, repo.repo_instance)
+    except ValueError:
+        return redirect(url_for('movies_bp.top_movies'))
+
+    # Construct urls for the other leaderboards of the same movies, and for adding reviews.
+    metric_urls = {title: url_for('movies_bp.top_movies', metric=other_metric, genre=genre_name,
+                                  release_year=release_year, limit=limit)
+                   for other_metric, title in services.LEADERBOARD_TITLES.items() if other_metric != metric}
+    add_review_url = utilities.get_url_builder('movies_bp.review_on_movie', 'movie')
+    for movie in movies:
+        movie['add_review_url'] = add_review_url(movie['id'])
+
+    title = services.LEADERBOARD_TITLES[metric]
+    if genre_name is not None:
+        title += ' in ' + genre_name
+    elif release_year is not None:
+        title += ' of ' + str(release_year)
+
+    return render_template(
+        'movies/top.html',
+        title='Movies',
+        movies_title=title,
+        metric=metric,
+        movies=movies,
+        metric_urls=metric_urls,
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls()
+    )
+
+
+@movies_blueprint.route('/director/<name>', methods=['GET'])
+def director_filmography(name):
+    return filmography('director', name, 'movies_bp.director_filmography')
+
+
+@movies_blueprint.route('/actor/<name>', methods=['GET'])
+def actor_filmography(name):
+    return filmography('actor', name, 'movies_bp.actor_filmography')
+
+
+def filmography(kind: str, name: str, endpoint: str):
+    # Renders one page of the movies of an actor or director, or the closest names if there is no such person.
+    movies_per_page = 10
+    page = max(request.args.get('page', 1, type=int), 1)
+
+    try:
+        movies, summary = services.get_filmography(kind, name, page, movies_per_page, repo.repo_instance)
+    except services.UnknownPersonException:
+        suggestions = search_services.get_name_corrections(name, (kind,), repo.repo_instance)
+        for suggestion in suggestions:
+            suggestion['url'] = url_for(endpoint, name=suggestion['name'])
+        return render_template(
+            'movies/filmography.html',
+            title='Movies',
+            name=name,
+            kind=kind,
+            summary=None,
+            suggestions=suggestions,
+            movies=[],
+            selected_movies=utilities.get_selected_movies(),
+            genre_urls=utilities.get_genres_and_urls()
+        ), 404
+
+    first_movie_url = None
+    last_movie_url = None
+    next_movie_url = None
+    prev_movie_url = None
+
+    if page > 1:
+        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+        prev_movie_url = url_for(endpoint, name=name, page=page - 1)
+        first_movie_url = url_for(endpoint, name=name)
+
+    last_page = (summary['number_of_movies'] + movies_per_page - 1) // movies_per_page
+    if page < last_page:
+        # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
+        next_movie_url = url_for(endpoint, name=name, page=page + 1)
+        last_movie_url = url_for(endpoint, name=name, page=last_page)
+
+    # Construct urls for adding reviews.
+    add_review_url = utilities.get_url_builder('movies_bp.review_on_movie', 'movie')
+    for movie in movies:
+        movie['add_review_url'] = add_review_url(movie['id'])
+
+    return render_template(
+        'movies/filmography.html',
+        title='Movies',
+        name=name,
+        kind=kind,
+        summary=summary,
+        movies=movies,
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls(),
+        first_movie_url=first_movie_url,
+        last_movie_url=last_movie_url,
+        prev_movie_url=prev_movie_url,
+        next_movie_url=next_movie_url
+    )
+
+
+def read_browse_filters(args):
+    # Returns the filters of the /movies page from its query parameters. Ranges are (low, high) pairs, either end of
+    # which may be None, or None when neither end is given.
+    filters = {
+        'genres': [genre for genre in args.getlist('genre') if genre],
+        'actors': [actor for actor in args.getlist('actor') if actor],
+        'director': args.get('director') or None,
+        'year_range': (args.get('year_from', type=int), args.get('year_to', type=int)),
+        'runtime_range': (args.get('runtime_min', type=int), args.get('runtime_max', type=int))
+    }
+    for name in ('year_range', 'runtime_range'):
+        if filters[name] == (None, None):
+            filters[name] = None
+    return filters
+
+
+def narrow_filters(filters: dict, facet: str, value):
+    # Returns a copy of filters that also requires the given facet value.
+    narrowed = dict(filters, genres=list(filters['genres']), actors=list(filters['actors']))
+    if facet == 'genre' and value not in narrowed['genres']:
+        narrowed['genres'].append(value)
+    elif facet == 'actor' and value not in narrowed['actors']:
+        narrowed['actors'].append(value)
+    elif facet == 'director':
+        narrowed['director'] = value
+    elif facet == 'year':
+        narrowed['year_range'] = (value, value)
+    return narrowed
+
+
+def browse_url(filters: dict, page: int = None):
+    year_from, year_to = filters['year_range'] or (None, None)
+    runtime_min, runtime_max = filters['runtime_range'] or (None, None)
+    return url_for('movies_bp.browse_movies', genre=filters['genres'], actor=filters['actors'],
+                   director=filters['director'], year_from=year_from, year_to=year_to, runtime_min=runtime_min,
+                   runtime_max=runtime_max, page=page)
+
+
 @movies_blueprint.route('/review', methods=['GET', 'POST'])
 @login_required
 def review_on_movie():
@@ -203,12 +410,25 @@ def review_on_movie():
     # For a GET or an unsuccessful POST, retrieve the movie to review in dict form, and return a Web page that allows
     # the user to enter a review. The generated Web page includes a form object.
     movie = services.get_movie(movie_id, repo.repo_instance)
+
+    # Link to the movies either side of this one in title order.
+    neighbours = services.get_ids_of_neighbouring_movies(movie_id, repo.repo_instance)
+    prev_movie_url = None
+    next_movie_url = None
+    if neighbours['previous'] is not None:
+        prev_movie_url = url_for('movies_bp.review_on_movie', movie=neighbours['previous'])
+    if neighbours['next'] is not None:
+        next_movie_url = url_for('movies_bp.review_on_movie', movie=neighbours['next'])
+
     return render_template(
         'movies/review_on_movie.html',
         title='Review movie',
         movie=movie,
         form=form,
         handler_url=url_for('movies_bp.review_on_movie'),
+        prev_movie_url=prev_movie_url,
+        next_movie_url=next_movie_url,
+        similar_movies=utilities.get_similar_movies(movie_id, 5),
         selected_movies=utilities.get_selected_movies(),
         genre_urls=utilities.get_genres_and_urls(),
         username=username
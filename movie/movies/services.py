@@ -1,3 +1,7 @@
+import base64
+import binascii
+import json
+import math
 from typing import List, Iterable
 
 from movie.adapters.repository import AbstractRepository
@@ -12,6 +16,14 @@ class UnknownUserException(Exception):
     pass
 
 
+class UnknownActorException(Exception):
+    pass
+
+
+class UnknownPersonException(Exception):
+    pass
+
+
 def get_genre_names(repo: AbstractRepository):
     genres = repo.get_genres()
     genre_names = [genre.genre_name for genre in genres]
@@ -72,6 +84,19 @@ def get_movie(movie_id: int, repo: AbstractRepository):
     return movie_to_dict(movie)
 
 
+def get_ids_of_neighbouring_movies(movie_id: int, repo: AbstractRepository):
+    # Returns the ids of the movies either side of movie_id in title order (either might be None).
+    movie = repo.get_movie(movie_id)
+
+    if movie is None:
+        raise NonExistentMovieException
+
+    return {
+        'previous': repo.get_id_of_previous_movie(movie),
+        'next': repo.get_id_of_next_movie(movie)
+    }
+
+
 def get_first_movie(repo: AbstractRepository):
     movie = repo.get_first_movie()
 
@@ -96,6 +121,151 @@ def get_movies_by_release_year(target_year, repo: AbstractRepository):
     return movies_dto
 
 
+def get_first_release_year(repo: AbstractRepository):
+    return repo.get_first_release_year()
+
+
+def get_release_year_navigation(target_year, repo: AbstractRepository):
+    # Returns the populated release years to link to from the page for target_year. Any of them may be None.
+    return {
+        'first': repo.get_first_release_year(),
+        'previous': repo.get_previous_release_year(target_year),
+        'next': repo.get_next_release_year(target_year),
+        'last': repo.get_last_release_year()
+    }
+
+
+def get_movies_by_filters(filters: dict, page: int, movies_per_page: int, repo: AbstractRepository):
+    # Returns the page'th page (from 1) of the movies matching filters in dict form, the number of matching movies,
+    # and the facet counts of the matching movies. filters holds genres and actors lists, a director name, and
+    # year_range and runtime_range pairs; missing filters don't apply.
+    movie_ids = repo.get_movie_ids_by_filters(
+        genres=filters.get('genres', ()),
+        actors=filters.get('actors', ()),
+        director=filters.get('director'),
+        year_range=filters.get('year_range'),
+        runtime_range=filters.get('runtime_range')
+    )
+
+    start = (page - 1) * movies_per_page
+    movies = repo.get_movies_by_id(movie_ids[start:start + movies_per_page])
+
+    # Unfiltered counts come straight from the repository's indexes.
+    filtered = any(filters.get(name) for name in ('genres', 'actors', 'director', 'year_range', 'runtime_range'))
+    facet_counts = repo.get_facet_counts(movie_ids if filtered else None)
+
+    return movies_to_dict(movies), len(movie_ids), facet_counts
+
+
+# Page sizes offered by the genre and actor listings; any size up to MAX_PAGE_SIZE can be asked for.
+PAGE_SIZES = (3, 10, 25)
+MAX_PAGE_SIZE = 100
+
+
+def read_page_size(args):
+    # Returns the page_size query parameter, limited to 1..MAX_PAGE_SIZE, or the smallest of PAGE_SIZES by default.
+    page_size = args.get('page_size', PAGE_SIZES[0], type=int)
+    return min(max(page_size, 1), MAX_PAGE_SIZE)
+
+
+def encode_cursor(**position):
+    # Returns an opaque, URL-safe cursor for a position in a listing: after=id, before=id or last=True.
+    data = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    # Returns the position encoded in a cursor, or an empty dict (the first page) if it isn't a valid cursor.
+    if not cursor:
+        return dict()
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return dict()
+    if not isinstance(position, dict):
+        return dict()
+    return position
+
+
+def get_movie_ids_page(kind: str, name: str, cursor: str, page_size: int, repo: AbstractRepository):
+    # Returns a page of the ids of the movies of a genre, actor or director (kind is 'genre', 'actor' or 'director'),
+    # resumed from cursor, with the cursors of the neighbouring pages and the number of movies. A cursor is None where
+    # there is no such page; the first page has no cursor at all.
+    position = decode_cursor(cursor)
+    if position.get('last'):
+        movie_ids = repo.get_movie_ids_page(kind, name, before=math.inf, limit=page_size)
+    elif isinstance(position.get('before'), int):
+        movie_ids = repo.get_movie_ids_page(kind, name, before=position['before'], limit=page_size)
+    elif isinstance(position.get('after'), int):
+        movie_ids = repo.get_movie_ids_page(kind, name, after=position['after'], limit=page_size)
+    else:
+        movie_ids = repo.get_movie_ids_page(kind, name, limit=page_size)
+
+    has_previous = len(movie_ids) > 0 and len(repo.get_movie_ids_page(kind, name, before=movie_ids[0], limit=1)) > 0
+    has_next = len(movie_ids) > 0 and len(repo.get_movie_ids_page(kind, name, after=movie_ids[-1], limit=1)) > 0
+
+    return {
+        'movie_ids': movie_ids,
+        'has_previous': has_previous,
+        'previous_cursor': encode_cursor(before=movie_ids[0]) if has_previous else None,
+        'next_cursor': encode_cursor(after=movie_ids[-1]) if has_next else None,
+        'last_cursor': encode_cursor(last=True) if has_next else None,
+        'number_of_movies': repo.get_number_of_movies_by_name(kind, name)
+    }
+
+
+# Titles of the leaderboards, keyed by the metric they rank movies by.
+LEADERBOARD_TITLES = {
+    'rating': 'Top rated',
+    'weighted_rating': 'Top rated, weighted by votes and reviews',
+    'votes': 'Most voted',
+    'revenue': 'Highest grossing',
+    'metascore': 'Best reviewed by critics'
+}
+MAX_LEADERBOARD_SIZE = 100
+
+
+def get_leaderboard(metric: str, genre: str, year: int, limit: int, repo: AbstractRepository):
+    # Returns the limit best movies by metric, overall or within genre or year, in dictionary form with their scores.
+    # Raises ValueError for a metric that has no leaderboard.
+    if metric not in LEADERBOARD_TITLES:
+        raise ValueError(f'Unknown leaderboard metric {metric}')
+    limit = min(max(limit, 1), MAX_LEADERBOARD_SIZE)
+
+    movies = list()
+    for movie_id, score in repo.get_leaderboard(metric, genre=genre, year=year, limit=limit):
+        movie = movie_to_dict(repo.get_movie(movie_id))
+        movie['score'] = score
+        movies.append(movie)
+    return movies
+
+
+def get_filmography(kind: str, name: str, page: int, movies_per_page: int, repo: AbstractRepository):
+    # Returns one page of the movies of an actor or director (kind is 'actor' or 'director'), in release year order and
+    # in dictionary form, with the summary of their career. Raises UnknownPersonException if there is no such person.
+    summary = repo.get_career_summary(kind, name)
+    if summary is None:
+        raise UnknownPersonException(name)
+
+    movie_ids = repo.get_filmography(kind, name, (page - 1) * movies_per_page, movies_per_page)
+    return movies_to_dict(repo.get_movie(movie_id) for movie_id in movie_ids), summary
+
+
+def get_costar_path(actor_name: str, other_actor_name: str, repo: AbstractRepository):
+    # Returns the chain of co-stars linking two actors, as a list of steps each holding two actors and the movie (in
+    # dictionary form) they appeared in together, or None if no chain links them. Raises UnknownActorException,
+    # holding the name, if either actor is unknown.
+    for name in (actor_name, other_actor_name):
+        if repo.get_actor(name) is None:
+            raise UnknownActorException(name)
+
+    path = repo.get_costar_path(actor_name, other_actor_name)
+    if path is None:
+        return None
+    return [{'actor': actor, 'movie': movie_to_dict(repo.get_movie(movie_id)), 'costar': costar}
+            for actor, movie_id, costar in path]
+
+
 def get_movies_by_id(id_list, repo: AbstractRepository):
     movies = repo.get_movies_by_id(id_list)
 
@@ -0,0 +1,276 @@
+import operator
+import re
+import time
+from bisect import bisect_left
+from itertools import islice
+
+from movie.adapters.repository import AbstractRepository
+
+
+# A query is a sequence of terms: field:value, field:"quoted value", "quoted words" or bare words. Bare and quoted
+# words are matched against titles and descriptions.
+TERM_PATTERN = re.compile(r'(?P<field>\w+):(?:"(?P<quoted_value>[^"]*)"|(?P<value>\S+))'
+                          r'|(?P<phrase>"[^"]*")'
+                          r'|(?P<word>\S+)')
+RANGE_PATTERN = re.compile(r'^(?P<low>[\d.]*)\.\.(?P<high>[\d.]*)$')
+COMPARISON_PATTERN = re.compile(r'^(?P<op><=|>=|<|>|=)?(?P<value>\d+(?:\.\d+)?)$')
+
+COMPARISONS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge, '==': operator.eq}
+
+NAME_FIELDS = ('genre', 'actor', 'director')
+NUMERIC_FIELDS = ('year', 'runtime', 'rating', 'votes', 'revenue', 'metascore')
+
+# Selectivities assumed for numeric conditions, whose cardinality isn't indexed: a third of the catalog for a
+# comparison and a tenth for an equality.
+COMPARISON_SELECTIVITY = 1 / 3
+EQUALITY_SELECTIVITY = 1 / 10
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class Predicate:
+    # One term of a query. A predicate estimates how many movies it matches, can produce their ids in id order to
+    # drive a query, and can test single movie ids when another predicate drives.
+
+    def estimate(self, repo: AbstractRepository) -> int:
+        raise NotImplementedError
+
+    def movie_ids(self, repo: AbstractRepository):
+        raise NotImplementedError
+
+    def matches(self, movie_id: int, repo: AbstractRepository) -> bool:
+        raise NotImplementedError
+
+
+class NamePredicate(Predicate):
+    # genre:, actor: or director:, answered from the repository's posting lists.
+
+    def __init__(self, field: str, name: str):
+        self.field = field
+        self.name = name
+
+    def __repr__(self):
+        return f'{self.field}:"{self.name}"'
+
+    def _posting_list(self, repo: AbstractRepository):
+        if self.field == 'genre':
+            return repo.get_movie_ids_by_genre(self.name)
+        if self.field == 'actor':
+            return repo.get_movie_ids_by_actor(self.name)
+        return repo.get_movie_ids_by_director(self.name)
+
+    def resolve(self, repo: AbstractRepository):
+        # Names are matched without regard to case, e.g. genre:sci-fi finds 'Sci-Fi'.
+        if not self._posting_list(repo):
+            for kind, name, distance in repo.get_name_corrections(self.name, (self.field,)):
+                if distance == 0:
+                    self.name = name
+                    break
+
+    def estimate(self, repo: AbstractRepository):
+        return len(self._posting_list(repo))
+
+    def movie_ids(self, repo: AbstractRepository):
+        return iter(self._posting_list(repo))
+
+    def matches(self, movie_id: int, repo: AbstractRepository):
+        movie_ids = self._posting_list(repo)
+        index = bisect_left(movie_ids, movie_id)
+        return index < len(movie_ids) and movie_ids[index] == movie_id
+
+
+class NumericPredicate(Predicate):
+    # year:, runtime:, rating:, votes:, revenue: or metascore:, as a (column, operator, value) condition on the
+    # repository's movie table.
+
+    def __init__(self, field: str, op: str, value):
+        self.field = field
+        self.op = op
+        self.value = value
+
+    def __repr__(self):
+        if self.op == 'between':
+            low, high = self.value
+            return f'{self.field}:{"" if low is None else low}..{"" if high is None else high}'
+        return f'{self.field}:{self.op}{self.value}'
+
+    @property
+    def condition(self):
+        if self.op == 'between':
+            low, high = self.value
+            low = float('-inf') if low is None else low
+            high = float('inf') if high is None else high
+            return self.field, 'between', (low, high)
+        return self.field, self.op, self.value
+
+    def estimate(self, repo: AbstractRepository):
+        if self.field == 'year' and self.op == 'between':
+            # Release years are indexed, so their counts are exact.
+            return repo.get_number_of_movies_by_release_year_range(*self.condition[2])
+        selectivity = EQUALITY_SELECTIVITY if self.op == '==' else COMPARISON_SELECTIVITY
+        return int(repo.get_number_of_movies() * selectivity)
+
+    def movie_ids(self, repo: AbstractRepository):
+        if self.field == 'year' and self.op == 'between':
+            return iter(sorted(repo.get_movie_ids_by_release_year_range(*self.condition[2])))
+        return repo.iter_filtered_movie_ids([self.condition])
+
+    def matches(self, movie_id: int, repo: AbstractRepository):
+        column, op, value = self.condition
+        movie_value = repo.get_movie_metric(movie_id, column)
+        if movie_value is None:
+            return False
+        if op == 'between':
+            return value[0] <= movie_value <= value[1]
+        return COMPARISONS[op](movie_value, value)
+
+
+class TextPredicate(Predicate):
+    # Bare words and quoted phrases, matched against titles and descriptions by the full-text index.
+
+    def __init__(self, text: str):
+        self.text = text
+        self._movie_ids = None
+
+    def __repr__(self):
+        return f'text:{self.text}'
+
+    def _matching_ids(self, repo: AbstractRepository):
+        if self._movie_ids is None:
+            _, number_of_matches = repo.search_movie_ids(self.text, 0, 0)
+            movie_ids, _ = repo.search_movie_ids(self.text, 0, number_of_matches)
+            self._movie_ids = sorted(movie_ids)
+        return self._movie_ids
+
+    def estimate(self, repo: AbstractRepository):
+        return repo.search_movie_ids(self.text, 0, 0)[1]
+
+    def movie_ids(self, repo: AbstractRepository):
+        return iter(self._matching_ids(repo))
+
+    def matches(self, movie_id: int, repo: AbstractRepository):
+        movie_ids = self._matching_ids(repo)
+        index = bisect_left(movie_ids, movie_id)
+        return index < len(movie_ids) and movie_ids[index] == movie_id
+
+
+def parse_number(text: str):
+    try:
+        return float(text) if '.' in text else int(text)
+    except ValueError:
+        raise QuerySyntaxError(f'{text} is not a number')
+
+
+def parse_numeric_term(field: str, value: str):
+    match = RANGE_PATTERN.match(value)
+    if match is not None and (match.group('low') or match.group('high')):
+        low = parse_number(match.group('low')) if match.group('low') else None
+        high = parse_number(match.group('high')) if match.group('high') else None
+        return NumericPredicate(field, 'between', (low, high))
+
+    match = COMPARISON_PATTERN.match(value)
+    if match is None:
+        raise QuerySyntaxError(f'{field}: expects a number, a range like 2010..2016, or a comparison like <120')
+    op = match.group('op') or '='
+    number = parse_number(match.group('value'))
+
+    # Whole-number fields use inclusive ranges, which the year index can answer.
+    if field == 'year':
+        low, high = {'<': (None, number - 1), '<=': (None, number), '>': (number + 1, None), '>=': (number, None),
+                     '=': (number, number)}[op]
+        return NumericPredicate(field, 'between', (low, high))
+    return NumericPredicate(field, '==' if op == '=' else op, number)
+
+
+def parse_query(text: str):
+    # Returns the predicates of a query. Raises QuerySyntaxError if a term can't be understood.
+    predicates = list()
+    words = list()
+    for match in TERM_PATTERN.finditer(text):
+        if match.group('field') is not None:
+            field = match.group('field').casefold()
+            value = match.group('quoted_value') if match.group('quoted_value') is not None else match.group('value')
+            if field in NAME_FIELDS:
+                predicates.append(NamePredicate(field, value.strip()))
+            elif field in NUMERIC_FIELDS:
+                predicates.append(parse_numeric_term(field, value))
+            else:
+                fields = ', '.join(NAME_FIELDS + NUMERIC_FIELDS)
+                raise QuerySyntaxError(f'Unknown field {field}: - use one of {fields}')
+        else:
+            words.append(match.group('phrase') or match.group('word'))
+
+    if words:
+        predicates.append(TextPredicate(' '.join(words)))
+    if not predicates:
+        raise QuerySyntaxError('The query is empty')
+    return predicates
+
+
+class QueryPlan:
+    # The predicates of a query in evaluation order: the one estimated to match fewest movies drives, producing
+    # candidate ids, and the others filter the candidates in order of increasing estimate, so that most candidates
+    # are rejected by the first filter they meet. Evaluation is a pipeline of generators, so it stops as soon as
+    # enough movies have been found.
+
+    def __init__(self, predicates, repo: AbstractRepository):
+        self._repo = repo
+        start = time.perf_counter()
+        for predicate in predicates:
+            if isinstance(predicate, NamePredicate):
+                predicate.resolve(repo)
+        estimates = [(predicate.estimate(repo), predicate) for predicate in predicates]
+        estimates.sort(key=lambda estimate: estimate[0])
+        self.planning_time = time.perf_counter() - start
+
+        self.steps = [{'predicate': predicate, 'estimate': estimate, 'role': 'filter', 'rows_in': 0, 'rows_out': 0,
+                       'time': 0.0} for estimate, predicate in estimates]
+        self.steps[0]['role'] = 'drive'
+        self.execution_time = 0.0
+
+    def _drive(self, step):
+        # Drivers may produce their ids lazily, so the time taken to produce each one counts towards the step.
+        start = time.perf_counter()
+        movie_ids = step['predicate'].movie_ids(self._repo)
+        movie_id = next(movie_ids, None)
+        step['time'] += time.perf_counter() - start
+        while movie_id is not None:
+            step['rows_out'] += 1
+            yield movie_id
+            start = time.perf_counter()
+            movie_id = next(movie_ids, None)
+            step['time'] += time.perf_counter() - start
+
+    def _filter(self, step, movie_ids):
+        predicate = step['predicate']
+        for movie_id in movie_ids:
+            step['rows_in'] += 1
+            start = time.perf_counter()
+            matches = predicate.matches(movie_id, self._repo)
+            step['time'] += time.perf_counter() - start
+            if matches:
+                step['rows_out'] += 1
+                yield movie_id
+
+    def execute(self, offset: int = 0, limit: int = 10):
+        # Returns the ids of up to limit matching movies after the first offset, in id order, and whether there are
+        # more. Only as many candidates are produced and tested as that takes.
+        start = time.perf_counter()
+        movie_ids = self._drive(self.steps[0])
+        for step in self.steps[1:]:
+            movie_ids = self._filter(step, movie_ids)
+        page = list(islice(movie_ids, offset, offset + limit + 1))
+        self.execution_time = time.perf_counter() - start
+        return page[:limit], len(page) > limit
+
+    def explain(self):
+        # Returns the plan and what executing it took, in dict form.
+        return {
+            'planning_ms': self.planning_time * 1e3,
+            'execution_ms': self.execution_time * 1e3,
+            'steps': [{'predicate': repr(step['predicate']), 'role': step['role'], 'estimate': step['estimate'],
+                       'rows_in': step['rows_in'], 'rows_out': step['rows_out'], 'ms': step['time'] * 1e3}
+                      for step in self.steps]
+        }
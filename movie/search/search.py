@@ -0,0 +1,139 @@
+from flask import Blueprint
+from flask import request, render_template, url_for, jsonify
+
+import movie.adapters.repository as repo
+import movie.utilities.utilities as utilities
+import movie.search.services as services
+from movie.search.query import QuerySyntaxError
+
+MAX_SUGGESTIONS = 20
+
+# Configure Blueprint.
+search_blueprint = Blueprint(
+    'search_bp', __name__)
+
+
+@search_blueprint.route('/search', methods=['GET'])
+def search():
+    movies_per_page = 10
+
+    # Read query parameters.
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    page = max(page, 1)
+
+    movies = list()
+    number_of_matches = 0
+    suggestions = list()
+    if query:
+        movies, number_of_matches = services.search_movies(query, page, movies_per_page, repo.repo_instance)
+
+        # Offer the actors, directors and genres whose names are close to the query, which may be a misspelt name.
+        corrections = services.get_name_corrections(query, repo.NAME_KINDS, repo.repo_instance)
+        suggestions = [correction for correction in corrections if correction['name'] != query]
+        for suggestion in suggestions:
+            suggestion['url'] = utilities.get_name_url(suggestion['kind'], suggestion['name'])
+
+    first_movie_url = None
+    last_movie_url = None
+    next_movie_url = None
+    prev_movie_url = None
+
+    if page > 1:
+        # There are preceding results, so generate URLs for the 'previous' and 'first' navigation buttons.
+        prev_movie_url = url_for('search_bp.search', q=query, page=page - 1)
+        first_movie_url = url_for('search_bp.search', q=query)
+
+    last_page = (number_of_matches + movies_per_page - 1) // movies_per_page
+    if page < last_page:
+        # There are further results, so generate URLs for the 'next' and 'last' navigation buttons.
+        next_movie_url = url_for('search_bp.search', q=query, page=page + 1)
+        last_movie_url = url_for('search_bp.search', q=query, page=last_page)
+
+    # Construct urls for adding reviews.
+    add_review_url = utilities.get_url_builder('movies_bp.review_on_movie', 'movie')
+    for movie in movies:
+        movie['add_review_url'] = add_review_url(movie['id'])
+
+    return render_template(
+        'search/search.html',
+        title='Search',
+        query=query,
+        page=page,
+        number_of_matches=number_of_matches,
+        movies=movies,
+        suggestions=suggestions,
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls(),
+        first_movie_url=first_movie_url,
+        last_movie_url=last_movie_url,
+        prev_movie_url=prev_movie_url,
+        next_movie_url=next_movie_url
+    )
+
+
+@search_blueprint.route('/query', methods=['GET'])
+def query():
+    movies_per_page = 10
+
+    # Read query parameters.
+    query_text = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    explain = request.args.get('explain') is not None
+
+    movies = list()
+    has_more = False
+    plan = None
+    error = None
+    if query_text:
+        try:
+            movies, has_more, plan = services.query_movies(query_text, page, movies_per_page, repo.repo_instance,
+                                                           explain)
+        except QuerySyntaxError as exception:
+            error = str(exception)
+
+    first_movie_url = None
+    next_movie_url = None
+    prev_movie_url = None
+    explain_argument = 1 if explain else None
+
+    if page > 1:
+        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+        prev_movie_url = url_for('search_bp.query', q=query_text, page=page - 1, explain=explain_argument)
+        first_movie_url = url_for('search_bp.query', q=query_text, explain=explain_argument)
+
+    if has_more:
+        # Queries stop once a page is full, so the last page isn't known; only link to the next one.
+        next_movie_url = url_for('search_bp.query', q=query_text, page=page + 1, explain=explain_argument)
+
+    # Construct urls for adding reviews.
+    add_review_url = utilities.get_url_builder('movies_bp.review_on_movie', 'movie')
+    for movie in movies:
+        movie['add_review_url'] = add_review_url(movie['id'])
+
+    return render_template(
+        'search/query.html',
+        title='Query',
+        query=query_text,
+        explain=explain,
+        plan=plan,
+        error=error,
+        movies=movies,
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls(),
+        first_movie_url=first_movie_url,
+        prev_movie_url=prev_movie_url,
+        next_movie_url=next_movie_url
+    )
+
+
+@search_blueprint.route('/autocomplete', methods=['GET'])
+def autocomplete():
+    # Read query parameters. kind may be repeated to restrict suggestions to actors, directors and/or genres.
+    prefix = request.args.get('q', '')
+    kinds = tuple(kind for kind in repo.NAME_KINDS if kind in request.args.getlist('kind')) or repo.NAME_KINDS
+    limit = min(max(request.args.get('limit', 10, type=int), 0), MAX_SUGGESTIONS)
+
+    suggestions = services.get_name_suggestions(prefix, kinds, limit, repo.repo_instance)
+
+    return jsonify(query=prefix, suggestions=suggestions)
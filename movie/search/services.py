@@ -0,0 +1,60 @@
+from movie.adapters.repository import AbstractRepository
+from movie.movies.services import movies_to_dict
+from movie.search.query import QueryPlan, parse_query
+
+
+def search_movies(query: str, page: int, movies_per_page: int, repo: AbstractRepository):
+    # Returns the page'th page of the movies matching query, best match first, in dict form, and the total number of
+    # matching movies. Pages are numbered from 1.
+    movie_ids, number_of_matches = repo.search_movie_ids(query, (page - 1) * movies_per_page, movies_per_page)
+    movies = repo.get_movies_by_id(movie_ids)
+
+    return movies_to_dict(movies), number_of_matches
+
+
+def query_movies(query: str, page: int, movies_per_page: int, repo: AbstractRepository, explain: bool = False):
+    # Returns the page'th page (from 1) of the movies matching a query in the query language, in id order and dict
+    # form, whether there are further pages, and the explanation of the query plan if explain is set (else None).
+    # Raises QuerySyntaxError if the query can't be parsed.
+    plan = QueryPlan(parse_query(query), repo)
+    movie_ids, has_more = plan.execute((page - 1) * movies_per_page, movies_per_page)
+    movies = repo.get_movies_by_id(movie_ids)
+
+    return movies_to_dict(movies), has_more, plan.explain() if explain else None
+
+
+def get_name_suggestions(prefix: str, kinds, limit: int, repo: AbstractRepository):
+    # Returns the actor, director and genre names that complete prefix, ranked by their number of movies, in dict
+    # form.
+    suggestions = repo.get_name_suggestions(prefix, kinds, limit)
+
+    return [suggestion_to_dict(kind, name, number_of_movies) for kind, name, number_of_movies in suggestions]
+
+
+def get_name_corrections(name: str, kinds, repo: AbstractRepository):
+    # Returns the actor, director and genre names closest to a possibly misspelt name, in dict form.
+    corrections = repo.get_name_corrections(name, kinds)
+
+    return [correction_to_dict(kind, correction, distance) for kind, correction, distance in corrections]
+
+
+# ============================================
+# Functions to convert model entities to dicts
+# ============================================
+
+def suggestion_to_dict(kind: str, name: str, number_of_movies: int):
+    suggestion_dict = {
+        'kind': kind,
+        'name': name,
+        'movies': number_of_movies
+    }
+    return suggestion_dict
+
+
+def correction_to_dict(kind: str, name: str, distance: int):
+    correction_dict = {
+        'kind': kind,
+        'name': name,
+        'distance': distance
+    }
+    return correction_dict
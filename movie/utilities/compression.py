@@ -0,0 +1,50 @@
+import gzip
+
+from flask import request
+
+
+# Media types of the responses that are compressed.
+COMPRESSIBLE_MIMETYPES = ('text/html', 'application/json')
+
+# Responses smaller than this many bytes are sent as is; compressing them saves less than it costs.
+DEFAULT_COMPRESS_MIN_SIZE = 500
+
+# gzip compression level of responses: 6 compresses pages nearly as well as 9 in a fraction of the time.
+DEFAULT_COMPRESS_LEVEL = 6
+
+
+class ResponseCompression:
+    # Compresses HTML and JSON responses with gzip for clients whose Accept-Encoding accepts it. Streamed responses,
+    # responses that are already encoded and those other than 200 OK are sent as is. Strong ETags are made weak, as
+    # the compressed body differs byte for byte from the one they were made for but is equivalent.
+
+    def __init__(self, app=None):
+        self._min_size = DEFAULT_COMPRESS_MIN_SIZE
+        self._level = DEFAULT_COMPRESS_LEVEL
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['response_compression'] = self
+        self._min_size = app.config.get('COMPRESS_MIN_SIZE', DEFAULT_COMPRESS_MIN_SIZE)
+        self._level = app.config.get('COMPRESS_LEVEL', DEFAULT_COMPRESS_LEVEL)
+        app.after_request(self.compress)
+
+    def compress(self, response):
+        if (response.status_code != 200 or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if not request.accept_encodings['gzip']:
+            return response
+        data = response.get_data()
+        if len(data) < self._min_size:
+            return response
+
+        response.set_data(gzip.compress(data, self._level))
+        response.headers['Content-Encoding'] = 'gzip'
+        etag, weak = response.get_etag()
+        if etag is not None and not weak:
+            response.set_etag(etag, weak=True)
+        return response
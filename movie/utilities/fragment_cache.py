@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from threading import Lock
+
+from flask import has_request_context, request
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+DEFAULT_FRAGMENT_CACHE_SIZE = 4096
+
+
+class FragmentCache:
+    # Rendered template fragments, keyed by the fragment's name and the values it depends on, holding at most
+    # capacity fragments and evicting the least recently used. Every fragment depends on the catalog, so the cache
+    # is emptied whenever version() returns a new value, which the repository ensures after movies or reviews are
+    # added.
+
+    def __init__(self, version, capacity: int = DEFAULT_FRAGMENT_CACHE_SIZE):
+        self._version = version
+        self._capacity = capacity
+        self._fragments = OrderedDict()
+        self._fragments_version = None
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._fragments)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'size': len(self._fragments),
+                'capacity': self._capacity, 'invalidations': self.invalidations}
+
+    def fragment(self, key, render):
+        # Returns the fragment cached under key, calling render to produce and cache it if there is none. A fragment
+        # rendered while the catalog changed isn't kept.
+        version = self._version()
+        with self._lock:
+            if version != self._fragments_version:
+                if self._fragments:
+                    self.invalidations += 1
+                self._fragments.clear()
+                self._fragments_version = version
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self.hits += 1
+                self._fragments.move_to_end(key)
+                return fragment
+            self.misses += 1
+
+        fragment = render()
+        with self._lock:
+            if version == self._fragments_version:
+                self._fragments[key] = fragment
+                if len(self._fragments) > self._capacity:
+                    self._fragments.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+
+def _hashable(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    return value
+
+
+class FragmentCacheExtension(Extension):
+    # Adds a cache tag to templates. The body of
+    #
+    #     {% cache 'movie', movie.id, movie.reviews|length %} ... {% endcache %}
+    #
+    # is rendered once per name and key values and then taken from the environment's fragment_cache, which is
+    # None to render every time. The key values must include everything the body depends on other than the catalog
+    # and the script root, which are part of every key.
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(key, lineno=lineno)]), [], [],
+                               body).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+
+        key = (request.script_root if has_request_context() else None,) + _hashable(key)
+        return cache.fragment(key, caller)
@@ -19,6 +19,18 @@ def get_random_movies(quantity, repo: AbstractRepository):
     return movies_to_dict(movies)
 
 
+def get_similar_movies(movie_id: int, quantity: int, repo: AbstractRepository):
+    # Returns up to quantity movies similar to the one with movie_id, most similar first, in dictionary form with
+    # their ids and similarities.
+    similar_movies = list()
+    for similar_id, similarity in repo.get_similar_movies(movie_id, quantity):
+        movie = movie_to_dict(repo.get_movie(similar_id))
+        movie['id'] = similar_id
+        movie['similarity'] = similarity
+        similar_movies.append(movie)
+    return similar_movies
+
+
 # ============================================
 # Functions to convert dicts to model entities
 # ============================================
@@ -37,6 +49,19 @@ def movies_to_dict(movies: Iterable[Movie]):
     return [movie_to_dict(movie) for movie in movies]
 
 
+def get_catalog_version(repo: AbstractRepository):
+    # Returns the catalog version and the time of its latest change.
+    return repo.get_catalog_version(), repo.get_catalog_last_modified()
+
+
+def get_genres(repo: AbstractRepository):
+    return repo.get_genres()
+
+
+def get_actors(repo: AbstractRepository):
+    return repo.get_actors()
+
+
 def get_genre_names(repo: AbstractRepository):
     genres = repo.get_genres()
     genre_names = [genre.genre_name for genre in genres]
@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+# Files with these extensions are worth compressing; images are compressed already.
+TEXT_ASSET_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.txt', '.html', '.xml')
+
+# Cache-Control of fingerprinted files: their names change whenever their content does, so they never go stale.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+IMMUTABLE_CACHE_CONTROL = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+
+
+def fingerprint(file_name: str):
+    # Returns the name of the file with a hash of its content before the extension, e.g. main.3f2a9c1e07b4.css.
+    with open(file_name, 'rb') as infile:
+        digest = hashlib.blake2b(infile.read(), digest_size=6).hexdigest()
+    root, extension = os.path.splitext(file_name)
+    return f'{root}.{digest}{extension}'
+
+
+def _asset_names(static_folder: str):
+    for directory, _, file_names in os.walk(static_folder):
+        for file_name in sorted(file_names):
+            if file_name == MANIFEST_FILE_NAME or file_name.endswith('.gz'):
+                continue
+            yield os.path.relpath(os.path.join(directory, file_name), static_folder).replace(os.sep, '/')
+
+
+def collect_static_assets(static_folder: str):
+    # Returns the manifest of the static files: their names, relative to static_folder with / separators, mapped to
+    # their fingerprinted names.
+    return {name: os.path.relpath(fingerprint(os.path.join(static_folder, name)), static_folder).replace(os.sep, '/')
+            for name in _asset_names(static_folder)}
+
+
+def build_static_assets(static_folder: str, compress_level: int = 9):
+    # The build step: writes the manifest of the static files, and a gzip-compressed copy of each text file next to
+    # it, to be sent as is to clients accepting gzip. Returns the manifest.
+    manifest = collect_static_assets(static_folder)
+    for name in manifest:
+        if name.endswith(TEXT_ASSET_EXTENSIONS):
+            file_name = os.path.join(static_folder, name)
+            with open(file_name, 'rb') as infile:
+                compressed = gzip.compress(infile.read(), compress_level, mtime=0)
+            if compressed and len(compressed) < os.path.getsize(file_name):
+                with open(file_name + '.gz', 'wb') as outfile:
+                    outfile.write(compressed)
+
+    with open(os.path.join(static_folder, MANIFEST_FILE_NAME), 'w') as outfile:
+        json.dump(manifest, outfile, indent=2, sort_keys=True)
+    return manifest
+
+
+class StaticAssets:
+    # Serves the application's static files under fingerprinted names with far-future caching. url_for('static',
+    # filename=...) gives the fingerprinted name of a file in the manifest. The manifest written by the build step is
+    # read if there is one; otherwise the files are fingerprinted when the application starts. Files changed or added
+    # since the build step are left out of a manifest that is read, with a warning, so that they and their stale
+    # compressed copies aren't served under immutable caching. Files are still served under their own names, with
+    # Flask's default caching.
+
+    def __init__(self, app=None):
+        self._manifest = dict()
+        self._files = dict()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['static_assets'] = self
+        stale_names = self.load(app.static_folder)
+        if stale_names:
+            app.logger.warning('Static files changed since the build step are served without fingerprints: %s; run '
+                               'flask build-static', ', '.join(stale_names))
+        app.url_defaults(self._fingerprinted_url)
+        app.view_functions['static'] = self.send_static_file
+
+    def load(self, static_folder: str):
+        # Reads or builds the manifest, and returns the names of the files left out of it for being newer than the
+        # manifest written by the build step.
+        stale_names = list()
+        manifest_name = os.path.join(static_folder, MANIFEST_FILE_NAME)
+        if os.path.exists(manifest_name):
+            with open(manifest_name) as infile:
+                manifest = json.load(infile)
+            built = os.path.getmtime(manifest_name)
+            self._manifest = dict()
+            for name in _asset_names(static_folder):
+                if name in manifest and os.path.getmtime(os.path.join(static_folder, name)) <= built:
+                    self._manifest[name] = manifest[name]
+                else:
+                    stale_names.append(name)
+        else:
+            self._manifest = collect_static_assets(static_folder)
+        self._files = {hashed_name: name for name, hashed_name in self._manifest.items()}
+        return stale_names
+
+    def _fingerprinted_url(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self._manifest:
+            values['filename'] = self._manifest[values['filename']]
+
+    def send_static_file(self, filename):
+        name = self._files.get(filename)
+        if name is None:
+            return current_app.send_static_file(filename)
+
+        static_folder = current_app.static_folder
+        compressed = name + '.gz'
+        if request.accept_encodings['gzip'] and os.path.exists(os.path.join(static_folder, compressed)):
+            response = send_from_directory(static_folder, compressed, cache_timeout=IMMUTABLE_MAX_AGE,
+                                           mimetype=mimetypes.guess_type(name)[0] or 'application/octet-stream')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = send_from_directory(static_folder, name, cache_timeout=IMMUTABLE_MAX_AGE)
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -1,4 +1,8 @@
-from flask import Blueprint, request, render_template, redirect, url_for, session
+import hashlib
+from functools import wraps
+
+from flask import Blueprint, request, render_template, redirect, url_for, session, current_app, make_response
+from werkzeug.http import is_resource_modified
 
 import movie.adapters.repository as repo
 import movie.utilities.services as services
@@ -8,26 +12,122 @@ utilities_blueprint = Blueprint(
     'utilities_bp', __name__)
 
 
+# Stands in for a value in URL templates. url_for never quotes letters or underscores, so it appears in its output
+# as is.
+URL_PLACEHOLDER = 'URL_PLACEHOLDER'
+
+
+class NameUrlMap:
+    # The URLs of the pages of every name of one kind, built with url_for once per application and extended as the
+    # repository gains names. The repository's lists of entities only ever grow, so only their new entries are
+    # visited; a request that adds nothing costs one length check.
+
+    def __init__(self, endpoint: str, parameter: str, name_of):
+        self._endpoint = endpoint
+        self._parameter = parameter
+        self._name_of = name_of
+        self._urls = dict()
+        self._number_seen = 0
+
+    def urls(self, entities):
+        if len(entities) > self._number_seen:
+            for entity in entities[self._number_seen:]:
+                name = self._name_of(entity)
+                if name not in self._urls:
+                    self._urls[name] = url_for(self._endpoint, **{self._parameter: name})
+            self._number_seen = len(entities)
+        return self._urls
+
+
+def _url_maps():
+    # The URL maps and builders of the current application, kept per script root since URLs start with it.
+    url_maps = current_app.extensions.setdefault('url_maps', dict())
+    maps = url_maps.get(request.script_root)
+    if maps is None:
+        maps = url_maps[request.script_root] = {
+            'genre': NameUrlMap('movies_bp.movies_by_genre', 'genre', lambda genre: genre.genre_name),
+            'actor': NameUrlMap('home_bp.movies_by_actor', 'actor', lambda actor: actor.actor_full_name),
+            'builders': dict()
+        }
+    return maps
+
+
+def get_url_builder(endpoint: str, parameter: str, **values):
+    # Returns a function giving url_for(endpoint, **values) with parameter set to its argument, for links built for
+    # every movie on a page. url_for is called once, with a placeholder that the argument replaces, so arguments must
+    # be values that url_for wouldn't quote, such as ids, years and cursors. Builders without values are kept for the
+    # life of the application.
+    builders = _url_maps()['builders']
+    builder = builders.get((endpoint, parameter)) if not values else None
+    if builder is None:
+        prefix, _, suffix = url_for(endpoint, **values, **{parameter: URL_PLACEHOLDER}).partition(URL_PLACEHOLDER)
+
+        def builder(value):
+            return f'{prefix}{value}{suffix}'
+
+        if not values:
+            builders[(endpoint, parameter)] = builder
+    return builder
+
+
+def conditional_on_catalog(view):
+    # Makes a GET view conditional: its responses carry an ETag derived from the catalog version, and a request whose
+    # If-None-Match shows that the client holds the current page is answered with 304 Not Modified before the view
+    # runs. Only for views whose pages change with nothing but the catalog, the request URL and the signed in user.
+    # No Last-Modified is sent: a date can't tell pages for different users apart, so If-Modified-Since would keep
+    # answering 304 across a sign in or out.
+    @wraps(view)
+    def wrapped_view(**kwargs):
+        version, last_modified = services.get_catalog_version(repo.repo_instance)
+        etag = hashlib.blake2b(repr((version, last_modified.timestamp(), request.full_path, session.get('username'),
+                                     session.get('user_name'))).encode('utf-8'), digest_size=12).hexdigest()
+
+        if not is_resource_modified(request.environ, etag=etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(**kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+        return response
+    return wrapped_view
+
+
 def get_selected_movies(quantity=3):
     movies = services.get_random_movies(quantity, repo.repo_instance)
 
+    year_url = get_url_builder('movies_bp.movies_by_year', 'year')
     for movie in movies:
-        movie['hyperlink'] = url_for('movies_bp.movies_by_year', year=movie['release_year'])
+        movie['hyperlink'] = year_url(movie['release_year'])
     return movies
 
 
-def get_genres_and_urls():
-    genre_names = services.get_genre_names(repo.repo_instance)
-    genre_urls = dict()
-    for genre_name in genre_names:
-        genre_urls[genre_name] = url_for('movies_bp.movies_by_genre', genre=genre_name)
+def get_similar_movies(movie_id: int, quantity=3):
+    movies = services.get_similar_movies(movie_id, quantity, repo.repo_instance)
+
+    review_url = get_url_builder('movies_bp.review_on_movie', 'movie')
+    for movie in movies:
+        movie['hyperlink'] = review_url(movie['id'])
+    return movies
+
 
-    return genre_urls
+def get_genres_and_urls():
+    # The returned dict is shared between requests, so it must not be changed.
+    return _url_maps()['genre'].urls(services.get_genres(repo.repo_instance))
 
 
 def get_actors_and_urls():
-    actor_names = services.get_actor_names(repo.repo_instance)
-    actor_urls = dict()
-    for actor_name in actor_names:
-        actor_urls[actor_name] = url_for('home_bp.movies_by_actor', actor=actor_name)
-    return actor_urls
+    # The returned dict is shared between requests, so it must not be changed.
+    return _url_maps()['actor'].urls(services.get_actors(repo.repo_instance))
+
+
+def get_name_url(kind: str, name: str):
+    # Returns the URL of the page listing the movies of an actor, director or genre.
+    if kind == 'actor':
+        return url_for('home_bp.movies_by_actor', actor=name)
+    if kind == 'genre':
+        return url_for('movies_bp.movies_by_genre', genre=name)
+    return url_for('movies_bp.director_filmography', name=name)
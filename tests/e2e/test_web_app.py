@@ -1,6 +1,22 @@
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+
 import pytest
 
-from flask import session
+from flask import session, url_for
+from werkzeug.http import http_date
+
+import movie.adapters.repository as repo
+import movie.movies.movies as movies
+import movie.utilities.utilities as utilities
+from movie import create_app
+from movie.domain.model import Actor, Genre, Movie, Review
+from movie.utilities.fragment_cache import FragmentCache
+from movie.utilities.static_assets import build_static_assets, IMMUTABLE_CACHE_CONTROL
 
 
 def test_register(client):
@@ -123,3 +139,388 @@ def test_movies_with_genre(client):
     assert b'Movies by genre: Action' in response.data
     assert b'Guardians of the Galaxy' in response.data
     assert b'A group of intergalactic criminals are forced to work together to stop a fanatical warrior from taking control of the universe.' in response.data
+
+    # Check that similar movies are linked from the listing.
+    assert b'Similar:' in response.data
+    assert b'Star Trek Beyond (2016)' in response.data
+
+
+def test_movies_with_genre_pages_with_cursors(client):
+    # Check that the page size can be chosen, and that the total comes with the first page.
+    response = client.get('/movies_by_genre?genre=Action&page_size=10')
+    assert response.status_code == 200
+    assert b'303 movies' in response.data
+
+    # Check that the next page can be followed with its opaque cursor, and leads back to the first page.
+    next_url = re.search(rb"location.href='([^']*)'\">Next", response.data).group(1).replace(b'&amp;', b'&')
+    assert b'cursor=' in next_url and b'page_size=10' in next_url
+    response = client.get(next_url.decode())
+    assert response.status_code == 200
+    assert b'<h2>Guardians of the Galaxy</h2>' not in response.data
+    previous_url = re.search(rb"location.href='([^']*)'\">Previous", response.data).group(1).replace(b'&amp;', b'&')
+    response = client.get(previous_url.decode())
+    assert b'<h2>Guardians of the Galaxy</h2>' in response.data
+
+
+def test_top_movies(client):
+    # Check that the top rated movies come first, and that other leaderboards are linked.
+    response = client.get('/top')
+    assert response.status_code == 200
+    assert b'1. The Dark Knight (2008)' in response.data
+    assert b'Highest grossing' in response.data
+
+    # Check a leaderboard of one release year.
+    response = client.get('/top?metric=revenue&release_year=2015&limit=1')
+    assert response.status_code == 200
+    assert b'Highest grossing of 2015' in response.data
+    assert b'Star Wars: Episode VII - The Force Awakens' in response.data
+
+
+def test_degrees_of_separation(client):
+    # Check that a chain of co-stars links two actors.
+    response = client.get('/degrees_of_separation?actor=Chris+Pratt&other_actor=Meryl+Streep')
+    assert response.status_code == 200
+    assert b'are 3 degrees of separation apart' in response.data
+
+    # Check that a misspelt actor is reported with corrections.
+    response = client.get('/degrees_of_separation?actor=Chris+Pratt&other_actor=Meryl+Strep')
+    assert response.status_code == 200
+    assert b'There is no actor called Meryl Strep' in response.data
+    assert b'/degrees_of_separation?actor=Chris+Pratt&amp;other_actor=Meryl+Streep' in response.data
+
+
+def test_degrees_of_separation_links_actors_known_only_from_a_movie_cast(client):
+    # Zqx Newcomer links the two actors, but only through the casts of added movies, not the actor index.
+    for costar in ('Chris Pratt', 'Meryl Streep'):
+        movie = Movie('Zoolander Returns', 2026)
+        movie.add_actor(Actor(costar))
+        movie.add_actor(Actor('Zqx Newcomer'))
+        repo.repo_instance.add_movie(movie)
+
+    response = client.get('/degrees_of_separation?actor=Chris+Pratt&other_actor=Meryl+Streep')
+    assert response.status_code == 200
+    assert b'are 2 degrees of separation apart' in response.data
+    assert b'/movies_by_actor?actor=Zqx+Newcomer' in response.data
+
+
+def test_filmographies(client):
+    # Check that a director's page summarises their career and pages through their movies.
+    response = client.get('/director/Ridley Scott')
+    assert response.status_code == 200
+    assert b'Director of 8 movies' in response.data
+    assert b'from 2006 to 2015' in response.data
+    assert b'<h2>Prometheus (2012)</h2>' in response.data
+    response = client.get('/director/Ridley Scott?page=2')
+    assert response.status_code == 200
+    assert b'<h2>Prometheus (2012)</h2>' not in response.data
+
+    response = client.get('/actor/Chris Pratt')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy (2014)' in response.data
+
+    # Check that an unknown person is reported with corrections.
+    response = client.get('/director/Ridley Scot')
+    assert response.status_code == 404
+    assert b'There is no director called Ridley Scot' in response.data
+    assert b'/director/Ridley%20Scott' in response.data
+
+
+def test_url_maps_match_url_for_and_follow_new_names(client):
+    with client.application.test_request_context():
+        genre_urls = utilities.get_genres_and_urls()
+        assert genre_urls['Sci-Fi'] == url_for('movies_bp.movies_by_genre', genre='Sci-Fi')
+        assert utilities.get_actors_and_urls()['Chris Pratt'] == url_for('home_bp.movies_by_actor', actor='Chris Pratt')
+
+        repo.repo_instance.add_genre(Genre('Frightening'))
+        assert utilities.get_genres_and_urls()['Frightening'] == url_for('movies_bp.movies_by_genre', genre='Frightening')
+
+        view_review_url = utilities.get_url_builder('movies_bp.movies_by_genre', 'view_comments_for', genre='Sci-Fi',
+                                                    page_size=10)
+        assert view_review_url(7) == url_for('movies_bp.movies_by_genre', genre='Sci-Fi', page_size=10,
+                                             view_comments_for=7)
+
+
+def test_fragment_cache_serves_repeat_pages_until_the_catalog_changes(client):
+    cache = client.application.jinja_env.fragment_cache
+    response = client.get('/movies_by_genre?genre=Sci-Fi')
+    assert b'1 reviews' not in response.data
+    hits = cache.hits
+
+    # Check that a repeated page takes its head, navigation and movie cards from the cache; the recommended movies
+    # in the sidebar are picked at random.
+    assert client.get('/movies_by_genre?genre=Sci-Fi').data.count(b'<movie id="movie">') == 3
+    assert cache.hits >= hits + 5
+
+    # Check that adding a review empties the cache, so the movie card shows it.
+    movie = repo.repo_instance.get_movie(repo.repo_instance.get_movie_ids_by_genre('Sci-Fi')[0])
+    repo.repo_instance.add_review(Review(movie, 'Who needs quarantine?', 8, None), movie, None)
+    response = client.get('/movies_by_genre?genre=Sci-Fi')
+    assert b'1 reviews' in response.data
+    assert cache.invalidations == 1
+
+
+def test_fragment_cache_is_bounded_and_can_be_turned_off(client):
+    cache = FragmentCache(lambda: 0, capacity=2)
+    for key in ('a', 'b', 'a', 'c'):
+        cache.fragment(key, lambda: key.upper())
+    assert len(cache) == 2
+    assert cache.fragment('a', lambda: 'rendered again') == 'A'
+    assert cache.fragment('b', lambda: 'rendered again') == 'rendered again'
+    assert cache.hit_rate == 2 / 6
+
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': client.application.config['TEST_DATA_PATH'],
+                      'FRAGMENT_CACHE': False})
+    assert app.jinja_env.fragment_cache is None
+    assert b'Sci-Fi' in app.test_client().get('/movies_by_genre?genre=Sci-Fi').data
+
+
+@pytest.mark.parametrize('url', ('/movies_by_year?release_year=2014', '/movies_by_genre?genre=Sci-Fi'))
+def test_listing_pages_answer_conditional_requests_without_rendering(client, auth, monkeypatch, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert 'Last-Modified' not in response.headers
+
+    # Check that a client holding the current page gets 304 without the view querying or rendering anything.
+    with monkeypatch.context() as patches:
+        patches.setattr(movies, 'services', None)
+        patches.setattr(movies, 'render_template', None)
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+    # Check that another page, another user or a change to the catalog makes the page modified.
+    assert client.get(url + '&page_size=3', headers={'If-None-Match': etag}).status_code == 200
+    auth.login()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    movie = repo.repo_instance.get_movie(1)
+    repo.repo_instance.add_review(Review(movie, 'Who needs quarantine?', 8, None), movie, None)
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_listing_pages_are_not_reused_by_date_across_a_login(client, auth):
+    url = '/movies_by_genre?genre=Sci-Fi'
+    etag = client.get(url).headers['ETag']
+
+    # Check that a client revalidating only by date gets the page rendered afresh for the user who has just logged in.
+    auth.login()
+    response = client.get(url, headers={'If-Modified-Since': http_date(time.time() + 60)})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_static_files_are_fingerprinted_and_cached_for_good(client, tmp_path):
+    with client.application.test_request_context():
+        css_url = url_for('static', filename='css/main.css')
+    assert re.fullmatch(r'/static/css/main\.[0-9a-f]{12}\.css', css_url)
+    assert css_url.encode() in client.get('/movies_by_genre?genre=Sci-Fi').data
+
+    response = client.get(css_url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert 'Content-Encoding' not in response.headers
+    css = response.data
+    response.close()
+    response = client.get('/static/css/main.css')
+    assert response.data == css and response.headers['Cache-Control'] != IMMUTABLE_CACHE_CONTROL
+    response.close()
+
+    # Check that after the build step, clients accepting gzip get the precompressed file.
+    static_folder = tmp_path / 'static'
+    shutil.copytree(os.path.join(client.application.static_folder, 'css'), static_folder / 'css')
+    manifest = build_static_assets(str(static_folder))
+    assert manifest['css/main.css'] == css_url[len('/static/'):]
+    assert (static_folder / 'css' / 'main.css.gz').exists()
+
+    client.application.static_folder = str(static_folder)
+    client.application.extensions['static_assets'].load(str(static_folder))
+    response = client.get(css_url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Content-Type'].startswith('text/css')
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert gzip.decompress(response.data) == css
+    response.close()
+
+
+def test_static_files_changed_after_the_build_step_are_not_served_from_the_manifest(client, tmp_path):
+    static_folder = tmp_path / 'static'
+    shutil.copytree(os.path.join(client.application.static_folder, 'css'), static_folder / 'css')
+    manifest = build_static_assets(str(static_folder))
+
+    # Change main.css after the build step; its manifest entry and compressed copy are stale now.
+    css_file = static_folder / 'css' / 'main.css'
+    css = css_file.read_bytes() + b'\nbody { margin: 0; }\n'
+    css_file.write_bytes(css)
+    built = os.path.getmtime(static_folder / 'manifest.json')
+    os.utime(css_file, (built + 10, built + 10))
+
+    client.application.static_folder = str(static_folder)
+    assert client.application.extensions['static_assets'].load(str(static_folder)) == ['css/main.css']
+    with client.application.test_request_context():
+        assert url_for('static', filename='css/main.css') == '/static/css/main.css'
+
+    response = client.get('/static/css/main.css', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers.get('Cache-Control') != IMMUTABLE_CACHE_CONTROL
+    assert response.data == css
+    response.close()
+    response = client.get('/static/' + manifest['css/main.css'], headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 404
+    response.close()
+
+
+def test_html_and_json_responses_are_compressed_for_clients_accepting_gzip(client):
+    page = client.get('/movies_by_genre?genre=Sci-Fi&page_size=25')
+    assert 'Content-Encoding' not in page.headers
+    assert 'Accept-Encoding' in page.headers['Vary']
+
+    response = client.get('/movies_by_genre?genre=Sci-Fi&page_size=25', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(response.data) < len(page.data) / 3
+    assert b'Guardians of the Galaxy' in gzip.decompress(response.data)
+    assert response.headers['ETag'].startswith('W/')
+
+    # Check that the weakened ETag still validates the page.
+    assert client.get('/movies_by_genre?genre=Sci-Fi&page_size=25', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    response = client.get('/autocomplete?q=c&limit=50', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Content-Type'] == 'application/json'
+    assert 'Content-Encoding' not in client.get('/movies_by_genre?genre=Sci-Fi', headers={
+        'Accept-Encoding': 'gzip;q=0, identity'}).headers
+
+
+def test_api_lists_movies_with_the_fields_asked_for(client):
+    response = client.get('/api/v1/movies?genre=Sci-Fi&fields=id,title,rating&limit=2')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    assert json.loads(response.data) == {
+        'number_of_movies': len(repo.repo_instance.get_movie_ids_by_genre('Sci-Fi')),
+        'fields': ['id', 'title', 'rating'],
+        'movies': [{'id': 1, 'title': 'Guardians of the Galaxy', 'rating': 8.1},
+                   {'id': 2, 'title': 'Prometheus', 'rating': 7.0}]
+    }
+
+    # Check that a catalog-sized list streams out in full.
+    movies = json.loads(client.get('/api/v1/movies?fields=id').data)['movies']
+    assert [movie['id'] for movie in movies] == list(range(1, repo.repo_instance.get_number_of_movies() + 1))
+
+    assert json.loads(client.get('/api/v1/movies/1?fields=director').data) == {'director': 'James Gunn'}
+    assert client.get('/api/v1/movies/5000').status_code == 404
+    assert client.get('/api/v1/movies/0').status_code == 404
+    response = client.get('/api/v1/movies?fields=title,budget')
+    assert response.status_code == 400
+    assert b'Unknown fields budget' in response.data
+
+
+def test_api_lists_genres_actors_years_and_reviews(client):
+    genres = json.loads(client.get('/api/v1/genres?fields=name,movie_ids').data)['genres']
+    assert {'name': 'Sci-Fi', 'movie_ids': repo.repo_instance.get_movie_ids_by_genre('Sci-Fi')} in genres
+
+    actors = json.loads(client.get('/api/v1/actors?offset=1&limit=1').data)['actors']
+    assert actors == [{'name': 'Vin Diesel', 'number_of_movies': 7}]
+
+    years = json.loads(client.get('/api/v1/years').data)['years']
+    assert [year['year'] for year in years] == sorted(year['year'] for year in years)
+    assert sum(year['number_of_movies'] for year in years) == repo.repo_instance.get_number_of_movies()
+
+    movie = repo.repo_instance.get_movie(2)
+    repo.repo_instance.add_review(Review(movie, 'Who needs quarantine?', 8, None), movie, None)
+    reviews = json.loads(client.get('/api/v1/movies/2/reviews?fields=movie_id,review_text,rating').data)
+    assert reviews['reviews'] == [{'movie_id': 2, 'review_text': 'Who needs quarantine?', 'rating': 8}]
+    assert json.loads(client.get('/api/v1/reviews?fields=movie_id').data)['reviews'] == [{'movie_id': 2}]
+    assert client.get('/api/v1/movies/5000/reviews').status_code == 404
+    assert client.get('/api/v1/movies/0/reviews').status_code == 404
+
+
+def test_snapshot_command_reports_the_file_it_wrote(client, tmp_path):
+    snapshot_path = tmp_path / 'catalog.snapshot'
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': client.application.config['TEST_DATA_PATH'],
+                      'CATALOG_SNAPSHOT': str(snapshot_path)})
+
+    result = app.test_cli_runner().invoke(args=['snapshot'])
+    assert result.exit_code == 0
+    assert result.output == f'Wrote catalog snapshot {snapshot_path}\n'
+    assert snapshot_path.exists()
+
+
+def test_search(client):
+    # Check that we can retrieve the search page, with and without a query.
+    response = client.get('/search')
+    assert response.status_code == 200
+
+    response = client.get('/search?q=intergalactic+criminals')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' in response.data
+
+    # Check that a page past the last result is empty rather than an error.
+    response = client.get('/search?q=galaxy&page=50')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' not in response.data
+
+
+def test_autocomplete(client):
+    # Check that suggestions come back as JSON, restricted to the requested kinds of names.
+    response = client.get('/autocomplete?q=pra&kind=actor&limit=3')
+    assert response.status_code == 200
+
+    suggestions = response.get_json()['suggestions']
+    assert 0 < len(suggestions) <= 3
+    assert all(suggestion['kind'] == 'actor' for suggestion in suggestions)
+    assert 'Chris Pratt' in [suggestion['name'] for suggestion in suggestions]
+
+
+def test_movies_by_actor_suggests_corrections(client):
+    # Check that actors can be looked up with a query parameter.
+    response = client.get('/movies_by_actor?actor=Chris+Pratt')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' in response.data
+
+    # Check that a misspelt actor name is offered the closest actor names.
+    response = client.get('/movies_by_actor?actor=Chirs+Pratt')
+    assert response.status_code == 200
+    assert b'Did you mean' in response.data
+    assert b'Chris Pratt' in response.data
+
+    response = client.get('/search?q=Chirs+Pratt')
+    assert b'Did you mean' in response.data
+    assert b'/movies_by_actor?actor=Chris+Pratt' in response.data
+
+
+def test_browse_movies_with_filters(client):
+    # Check that we can browse every movie, with facet counts.
+    response = client.get('/movies')
+    assert response.status_code == 200
+    assert b'1000 movies' in response.data
+    assert b'Drama (513)' in response.data
+
+    # Check that filters combine, and that facet links keep the filters already applied.
+    response = client.get('/movies?genre=Action&genre=Sci-Fi&actor=Chris+Pratt&year_from=2014&year_to=2014')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' in response.data
+    assert b'/movies?genre=Action&amp;genre=Sci-Fi&amp;actor=Chris+Pratt' in response.data
+
+
+def test_query(client):
+    # Check that a query in the query language finds movies, and explains its plan.
+    response = client.get('/query?q=genre%3ASci-Fi+actor%3A%22Chris+Pratt%22+year%3A2010..2016&explain=1')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' in response.data
+    assert b'drive' in response.data
+
+    # Check that a malformed query is reported rather than failing.
+    response = client.get('/query?q=colour%3Ared')
+    assert response.status_code == 200
+    assert b'Unknown field colour' in response.data
+
+    # Check that the home page's search box hands field-qualified input over to the query page.
+    response = client.post('/', data={'actor': 'genre:Sci-Fi'})
+    assert response.headers['Location'].startswith('http://localhost/query?q=genre')
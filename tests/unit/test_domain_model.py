@@ -1,6 +1,6 @@
 from datetime import date
 
-from movie.domain.model import Movie, Genre, User, Review, add_review, WatchList
+from movie.domain.model import Movie, Genre, Actor, User, Review, add_review, WatchList
 
 import pytest
 
@@ -45,6 +45,20 @@ def test_movie_construction(movie):
     assert repr(movie) == '<Movie Moana, 2016>'
 
 
+def test_movie_allocates_collections_on_first_use(movie):
+    assert movie.actors == [] and movie.genres == [] and movie.reviews == []
+
+    movie.add_genre(Genre('Animation'))
+    movie.add_genre(Genre('Animation'))
+    assert movie.genres == [Genre('Animation')]
+
+    movie.remove_actor(Actor('Auli\'i Cravalho'))
+    assert movie.actors == []
+
+    with pytest.raises(AttributeError):
+        movie.rating = 7.6
+
+
 def test_movie_less_than_operator():
     movie_1 = Movie('Moana', 2016)
 
@@ -2,9 +2,16 @@ from datetime import date, datetime
 from typing import List
 
 import pytest
+from werkzeug.security import check_password_hash
 
-from movie.domain.model import User, Movie, Genre, Review, add_review
+from movie.domain.model import User, Movie, Genre, Director, Review, Actor, add_review
+from movie.adapters import memory_repository, snapshot
+from movie.adapters.costar_graph import CoStarGraph
+from movie.adapters.memory_repository import MemoryRepository
+from movie.adapters.prefix_index import PrefixIndex
 from movie.adapters.repository import RepositoryException
+from movie.adapters.search_index import SearchIndex
+from movie.adapters.similarity_index import SimilarityIndex
 
 
 def test_repository_can_add_a_user(in_memory_repo):
@@ -26,6 +33,29 @@ def test_repository_does_not_retrieve_a_non_existent_user(in_memory_repo):
     assert user is None
 
 
+def test_repository_can_retrieve_an_actor_director_and_genre_by_name(in_memory_repo):
+    assert in_memory_repo.get_actor('Chris Pratt').actor_full_name == 'Chris Pratt'
+    assert in_memory_repo.get_director('James Gunn').director_full_name == 'James Gunn'
+    assert in_memory_repo.get_genre('Sci-Fi').genre_name == 'Sci-Fi'
+    assert in_memory_repo.get_actor('Nobody') is None
+
+
+def test_repository_loads_each_actor_director_and_genre_once(in_memory_repo):
+    actor_names = [actor.actor_full_name for actor in in_memory_repo.get_actors()]
+    genre_names = [genre.genre_name for genre in in_memory_repo.get_genres()]
+    assert len(actor_names) == len(set(actor_names))
+    assert len(genre_names) == len(set(genre_names))
+
+    movie = in_memory_repo.get_movie(1)
+    assert movie.actors[0] is in_memory_repo.get_actor('Chris Pratt')
+    assert movie.director is in_memory_repo.get_director('James Gunn')
+
+    genre = in_memory_repo.get_genre('Sci-Fi')
+    assert movie.genres[2] is genre
+    assert genre.is_applied_to(movie)
+    assert genre.number_of_genre_movies == len(in_memory_repo.get_movie_ids_by_genre('Sci-Fi'))
+
+
 def test_repository_can_retrieve_movie_count(in_memory_repo):
     number_of_movies = in_memory_repo.get_number_of_movies()
 
@@ -78,6 +108,223 @@ def test_repository_does_not_retrieve_a_movie_when_there_are_no_movies_for_a_giv
     assert len(movies) == 0
 
 
+def test_repository_can_retrieve_movie_ids_for_a_range_of_years(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_by_release_year_range(2015, 2016)
+
+    assert len(movie_ids) == len(in_memory_repo.get_movies_by_release_year(2015)) + 297
+    assert in_memory_repo.get_movie_ids_by_release_year_range(2017, 2020) == []
+
+
+def test_repository_returns_populated_neighbouring_years(in_memory_repo):
+    assert in_memory_repo.get_first_release_year() == 2006
+    assert in_memory_repo.get_last_release_year() == 2016
+    assert in_memory_repo.get_previous_release_year(2006) is None
+    assert in_memory_repo.get_next_release_year(2016) is None
+    assert in_memory_repo.get_next_release_year(2009) == 2010
+    assert in_memory_repo.get_previous_release_year(2030) == 2016
+
+
+def test_repository_can_retrieve_movies_by_title(in_memory_repo):
+    movies = in_memory_repo.get_movies_by_title('Prometheus')
+
+    assert [movie.id for movie in movies] == [2]
+    assert in_memory_repo.get_movie_ids_for_title('Prometheus') == [2]
+    assert in_memory_repo.get_movie_ids_for_title('Not a title') == []
+
+
+def test_repository_can_retrieve_movies_by_title_prefix(in_memory_repo):
+    movies = in_memory_repo.get_movies_by_title_prefix('Guardians')
+
+    assert 'Guardians of the Galaxy' in [movie.title for movie in movies]
+    assert all(movie.title.startswith('Guardians') for movie in movies)
+    assert len(in_memory_repo.get_movies_by_title_prefix('The', limit=5)) == 5
+
+
+def test_repository_navigates_movies_in_title_order(in_memory_repo):
+    movie = in_memory_repo.get_movie(2)
+    previous_movie = in_memory_repo.get_movie(in_memory_repo.get_id_of_previous_movie(movie))
+    next_movie = in_memory_repo.get_movie(in_memory_repo.get_id_of_next_movie(movie))
+
+    assert previous_movie < movie < next_movie
+    assert in_memory_repo.get_id_of_next_movie(previous_movie) == movie.id
+
+    moana = Movie('Moana', 2016)
+    in_memory_repo.add_movie(moana)
+    assert in_memory_repo.get_id_of_next_movie(in_memory_repo.get_movie(in_memory_repo.get_id_of_previous_movie(moana))) == moana.id
+
+
+def test_repository_keeps_the_metrics_of_movies(in_memory_repo):
+    assert in_memory_repo.get_movie_metric(1, 'rating') == 8.1
+    assert in_memory_repo.get_movie_metric(1, 'votes') == 757074
+    assert in_memory_repo.get_movie_metric(1, 'revenue') == 333.13
+    assert in_memory_repo.get_movie_metric(1, 'metascore') == 76
+
+    # Revenue of 'Mindhorn' is N/A in the CSV file.
+    assert in_memory_repo.get_movie_metric(8, 'revenue') is None
+
+
+def test_repository_can_filter_movie_ids_on_numeric_columns(in_memory_repo):
+    movie_ids = in_memory_repo.filter_movie_ids([('rating', '>=', 7), ('runtime', '<', 100),
+                                                 ('year', 'between', (2010, 2015))])
+
+    assert len(movie_ids) > 0
+    assert movie_ids == sorted(movie_ids)
+    for movie_id in movie_ids:
+        movie = in_memory_repo.get_movie(movie_id)
+        assert movie.runtime_minutes < 100 and 2010 <= movie.release_year <= 2015
+        assert in_memory_repo.get_movie_metric(movie_id, 'rating') >= 7
+
+    # Movies with a missing value never match a filter on that column.
+    assert 8 not in in_memory_repo.filter_movie_ids([('revenue', '!=', 0)])
+    assert len(in_memory_repo.filter_movie_ids([('revenue', '>=', 0)])) == 1000 - 128
+
+
+def test_repository_ranks_full_text_matches(in_memory_repo):
+    movie_ids, number_of_matches = in_memory_repo.search_movie_ids('galaxy')
+
+    # A word in a title outranks the same word in a description.
+    assert movie_ids[0] == 1
+    assert number_of_matches == len(movie_ids)
+
+    # Matching is case-insensitive, and pages of results don't overlap.
+    first_page, total = in_memory_repo.search_movie_ids('THE world', 0, 5)
+    second_page, _ = in_memory_repo.search_movie_ids('the world', 5, 5)
+    assert total > 10
+    assert len(first_page) == len(second_page) == 5
+    assert not set(first_page) & set(second_page)
+
+
+def test_repository_matches_quoted_phrases_exactly(in_memory_repo):
+    movie_ids, _ = in_memory_repo.search_movie_ids('"intergalactic criminals"')
+    assert movie_ids == [1]
+
+    movie_ids, number_of_matches = in_memory_repo.search_movie_ids('"criminals intergalactic"')
+    assert movie_ids == [] and number_of_matches == 0
+
+
+def test_repository_searches_movies_added_after_loading(in_memory_repo):
+    movie = Movie('Zoolander Returns', 2022)
+    movie.description = 'A spirited teenager sails out on a daring mission.'
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.search_movie_ids('zoolander returns')[0][0] == movie.id
+    assert in_memory_repo.search_movie_ids('"daring mission"') == ([movie.id], 1)
+    assert in_memory_repo.search_movie_ids('zzyzx') == ([], 0)
+
+
+def test_search_index_built_in_bulk_matches_one_built_movie_by_movie(in_memory_repo):
+    documents = [(movie.id, movie.title, movie.description) for movie in in_memory_repo.get_movies]
+    one_by_one = SearchIndex()
+    for document in documents:
+        one_by_one.add(*document)
+    in_bulk = SearchIndex()
+    in_bulk.add_many(documents[:600])
+    in_bulk.add_many(documents[600:])
+
+    for query in ('galaxy', 'the world', '"the dark" knight', 'love war', 'zzyzx'):
+        assert in_bulk.search(query, 0, 50) == one_by_one.search(query, 0, 50)
+    for term in ('the', 'galaxy', 'knight'):
+        assert list(in_bulk._postings[term].movie_ids) == list(one_by_one._postings[term].movie_ids)
+        assert list(in_bulk._postings[term].frequencies) == list(one_by_one._postings[term].frequencies)
+        assert list(in_bulk._postings[term].positions) == list(one_by_one._postings[term].positions)
+
+
+def test_repository_suggests_names_ranked_by_number_of_movies(in_memory_repo):
+    suggestions = in_memory_repo.get_name_suggestions('chr')
+
+    assert 0 < len(suggestions) <= 10
+    counts = [number_of_movies for _, _, number_of_movies in suggestions]
+    assert counts == sorted(counts, reverse=True)
+    for kind, name, number_of_movies in suggestions:
+        assert any(word.casefold().startswith('chr') for word in name.split())
+        if kind == 'actor':
+            assert number_of_movies == len(in_memory_repo.get_movie_ids_by_actor(name))
+
+    # Any word of a name matches, and suggestions can be restricted to some kinds of names.
+    assert ('actor', 'Chris Pratt', len(in_memory_repo.get_movie_ids_by_actor('Chris Pratt'))) in \
+        in_memory_repo.get_name_suggestions('PRATT', ('actor',))
+    assert in_memory_repo.get_name_suggestions('sci', ('genre',))[0][:2] == ('genre', 'Sci-Fi')
+    assert in_memory_repo.get_name_suggestions('', limit=5) == []
+
+
+def test_repository_keeps_name_suggestions_up_to_date_when_adding_a_movie(in_memory_repo):
+    assert in_memory_repo.get_name_suggestions('zq') == []
+
+    movie = Movie('Moana', 2016)
+    movie.director = Director('Zqx Clements')
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_name_suggestions('zq') == [('director', 'Zqx Clements', 1)]
+    assert in_memory_repo.get_movie_ids_by_director('Zqx Clements') == [movie.id]
+
+
+def test_prefix_index_finds_names_added_since_the_last_merge(in_memory_repo):
+    names = [actor.actor_full_name for actor in in_memory_repo.get_actors()]
+    incrementally = PrefixIndex()
+    incrementally.set_weights((name, len(name)) for name in names[:-50])
+    for name in names[-50:] + ['Chrisx Zed', 'Zed Chrisx']:
+        incrementally.add(name, len(name))
+    at_once = PrefixIndex()
+    at_once.set_weights((name, len(name)) for name in names + ['Chrisx Zed', 'Zed Chrisx'])
+
+    assert incrementally._pending
+    for prefix in ('chrisx', 'chris', 'zed c', 'ma', names[-1][:5], 'qqqq'):
+        assert incrementally.suggest(prefix) == at_once.suggest(prefix)
+    assert [name for name, _ in incrementally.suggest('chrisx')] == ['Chrisx Zed', 'Zed Chrisx']
+
+
+def test_repository_indexes_the_names_of_movies_added_in_bulk(in_memory_repo):
+    number_of_movies = len(in_memory_repo.get_movie_ids_by_actor('Chris Pratt'))
+    movies = [Movie('Moana', 2016), Movie('Frozen', 2013)]
+    for movie in movies:
+        movie.director = Director('Zqx Clements')
+        movie.add_actor(in_memory_repo.get_actor('Chris Pratt'))
+    in_memory_repo.add_movies(movies)
+
+    assert in_memory_repo.get_name_suggestions('zq') == [('director', 'Zqx Clements', 2)]
+    assert ('actor', 'Chris Pratt', number_of_movies + 2) in in_memory_repo.get_name_suggestions('chris pra')
+    assert in_memory_repo.get_name_corrections('Zqx Clemens')[0] == ('director', 'Zqx Clements', 1)
+
+
+def test_repository_corrects_misspelt_names(in_memory_repo):
+    assert in_memory_repo.get_name_corrections('Chirs Pratt')[0] == ('actor', 'Chris Pratt', 2)
+    assert in_memory_repo.get_name_corrections('chris pratt', ('actor',)) == [('actor', 'Chris Pratt', 0)]
+    assert in_memory_repo.get_name_corrections('Drma', ('genre',)) == [('genre', 'Drama', 1)]
+    assert in_memory_repo.get_name_corrections('Qwertyuiop') == []
+
+    corrections = in_memory_repo.get_name_corrections('Chris Pine', limit=3)
+    distances = [distance for _, _, distance in corrections]
+    assert len(corrections) <= 3
+    assert distances == sorted(distances)
+
+
+def test_repository_filters_movies_on_several_facets(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_by_filters(genres=['Action', 'Sci-Fi'], year_range=(2010, 2014),
+                                                        runtime_range=(None, 130))
+
+    expected = [movie.id for movie in in_memory_repo.get_movies
+                if {'Action', 'Sci-Fi'} <= {genre.genre_name for genre in movie.genres}
+                and 2010 <= movie.release_year <= 2014 and movie.runtime_minutes <= 130]
+    assert len(expected) > 0
+    assert movie_ids == expected
+
+    assert in_memory_repo.get_movie_ids_by_filters(actors=['Chris Pratt'], director='James Gunn') == [1]
+    assert in_memory_repo.get_movie_ids_by_filters(genres=['Action', 'Frightening']) == []
+    assert len(in_memory_repo.get_movie_ids_by_filters()) == 1000
+
+
+def test_repository_counts_facets_of_filtered_movies(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_by_filters(genres=['Sci-Fi'])
+    counts = in_memory_repo.get_facet_counts(movie_ids, limit=3)
+
+    assert counts['genre'][0] == ('Sci-Fi', len(movie_ids))
+    assert len(counts['actor']) == 3
+    assert sum(count for _, count in in_memory_repo.get_facet_counts(movie_ids, limit=100)['year']) == len(movie_ids)
+
+    # Without movie ids, the counts cover the whole catalog.
+    assert in_memory_repo.get_facet_counts(limit=1)['genre'] == [('Drama', 513)]
+
+
 def test_repository_can_get_first_movie(in_memory_repo):
     movie = in_memory_repo.get_first_movie()
     assert movie.title == 'Guardians of the Galaxy'
@@ -115,6 +362,155 @@ def test_repository_returns_movie_ids_by_genre(in_memory_repo):
     assert 949 in movie_ids
 
 
+def test_repository_returns_sorted_movie_ids_by_actor(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_by_actor('Chris Pratt')
+
+    assert 1 in movie_ids
+    assert movie_ids == sorted(movie_ids)
+
+
+def test_repository_returns_pages_of_movie_ids_by_name(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_by_genre('Action')
+
+    assert in_memory_repo.get_movie_ids_page('genre', 'Action', limit=3) == movie_ids[:3]
+    assert in_memory_repo.get_movie_ids_page('genre', 'Action', after=movie_ids[2], limit=3) == movie_ids[3:6]
+    assert in_memory_repo.get_movie_ids_page('genre', 'Action', before=movie_ids[3], limit=3) == movie_ids[:3]
+    assert in_memory_repo.get_movie_ids_page('genre', 'Action', before=movie_ids[1], limit=3) == movie_ids[:1]
+    assert in_memory_repo.get_movie_ids_page('genre', 'Action', after=movie_ids[-1], limit=3) == []
+    assert in_memory_repo.get_movie_ids_page('actor', 'Nobody At All', limit=3) == []
+    assert in_memory_repo.get_number_of_movies_by_name('genre', 'Action') == len(movie_ids)
+    assert in_memory_repo.get_number_of_movies_by_name('director', 'James Gunn') == \
+        len(in_memory_repo.get_movie_ids_by_director('James Gunn'))
+
+
+def test_repository_lists_filmographies_in_release_year_order(in_memory_repo):
+    movie_ids = in_memory_repo.get_filmography('director', 'Ridley Scott')
+    years = [in_memory_repo.get_movie(movie_id).release_year for movie_id in movie_ids]
+
+    assert sorted(movie_ids) == in_memory_repo.get_movie_ids_by_director('Ridley Scott')
+    assert years == sorted(years)
+    assert in_memory_repo.get_filmography('director', 'Ridley Scott', 2, 3) == movie_ids[2:5]
+    assert in_memory_repo.get_filmography('actor', 'Nobody At All') == []
+
+
+def test_repository_summarises_careers(in_memory_repo):
+    summary = in_memory_repo.get_career_summary('director', 'Ridley Scott')
+
+    assert summary['number_of_movies'] == 8
+    assert (summary['first_year'], summary['last_year']) == (2006, 2015)
+    assert summary['genres'][0] == ('Drama', 7)
+    assert in_memory_repo.get_career_summary('actor', 'Nobody At All') is None
+
+
+def test_repository_adds_a_movie_to_filmographies(in_memory_repo):
+    movie = Movie('Zoolander Returns', 2005)
+    movie.add_actor(Actor('Chris Pratt'))
+    movie.director = Director('Ridley Scott')
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_filmography('director', 'Ridley Scott', limit=1) == [movie.id]
+    assert in_memory_repo.get_career_summary('actor', 'Chris Pratt')['first_year'] == 2005
+
+
+def test_repository_finds_similar_movies(in_memory_repo):
+    similar_movies = in_memory_repo.get_similar_movies(1, 5)
+
+    assert len(similar_movies) == 5
+    assert 1 not in [movie_id for movie_id, _ in similar_movies]
+    assert [similarity for _, similarity in similar_movies] == sorted((similarity for _, similarity in similar_movies),
+                                                                      reverse=True)
+    # Star Trek Beyond shares Zoe Saldana and two genres with Guardians of the Galaxy.
+    assert 49 in [movie_id for movie_id, _ in similar_movies]
+    assert in_memory_repo.get_similar_movies(1001) == []
+
+
+def test_similarity_index_scores_candidates_that_share_features():
+    index = SimilarityIndex()
+    index.add(1, ['Action', 'Sci-Fi', 'Chris Pratt'])
+    index.add(2, ['Action', 'Sci-Fi', 'Zoe Saldana'])
+    index.add(3, ['Action', 'Drama', 'Chris Pratt', 'Vin Diesel'])
+    index.add(4, ['Drama'])
+    index.build()
+
+    assert index.similarities(1, [2, 3, 4]).tolist() == [2 / 4, 2 / 5, 0.0]
+    assert index.similarities(3, [4, 1, 2]).tolist() == [1 / 4, 2 / 5, 1 / 6]
+
+
+def test_repository_scores_similar_movies_by_exact_jaccard_similarity(in_memory_repo):
+    features = {movie.id: set(memory_repository.movie_features(movie)) for movie in in_memory_repo.get_movies}
+    for movie_id in (1, 2, 49):
+        for similar_id, similarity in in_memory_repo.get_similar_movies(movie_id, 20):
+            own, other = features[movie_id], features[similar_id]
+            assert similarity == pytest.approx(len(own & other) / len(own | other))
+
+
+def test_repository_finds_movies_similar_to_an_added_movie(in_memory_repo):
+    original = in_memory_repo.get_movie(1)
+    movie = Movie('Zoolander Returns', 2026)
+    for genre in original.genres:
+        movie.add_genre(genre)
+    for actor in original.actors:
+        movie.add_actor(actor)
+    movie.director = original.director
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_similar_movies(movie.id, 1) == [(1, 1.0)]
+    assert in_memory_repo.get_similar_movies(1, 1) == [(movie.id, 1.0)]
+
+
+def test_repository_links_actors_by_their_costars(in_memory_repo):
+    assert 'Zoe Saldana' in in_memory_repo.get_costar_names('Chris Pratt')
+
+    path = in_memory_repo.get_costar_path('Chris Pratt', 'Meryl Streep')
+    assert len(path) == 3
+    assert path[0][0] == 'Chris Pratt' and path[-1][2] == 'Meryl Streep'
+    for (actor, movie_id, costar), following in zip(path, path[1:] + [None]):
+        cast = [actor.actor_full_name for actor in in_memory_repo.get_movie(movie_id).actors]
+        assert actor in cast and costar in cast
+        assert following is None or following[0] == costar
+
+    assert in_memory_repo.get_costar_path('Chris Pratt', 'Chris Pratt') == []
+    assert in_memory_repo.get_costar_path('Chris Pratt', 'Nobody At All') is None
+
+
+def test_repository_links_the_cast_of_an_added_movie(in_memory_repo):
+    movie = Movie('Zoolander Returns', 2026)
+    movie.add_actor(Actor('Chris Pratt'))
+    movie.add_actor(Actor('Meryl Streep'))
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_costar_path('Chris Pratt', 'Meryl Streep') == [('Chris Pratt', movie.id, 'Meryl Streep')]
+
+
+def test_costar_graph_built_incrementally_matches_one_built_at_once(in_memory_repo):
+    casts = [(movie.id, [actor.actor_full_name for actor in movie.actors]) for movie in in_memory_repo.get_movies]
+    casts += [(1001, ['Chris Pratt', 'Meryl Streep', 'Zqx Clements']), (1002, ['Nobody Else'])]
+    at_once = CoStarGraph()
+    for movie_id, actor_names in casts:
+        at_once.add_movie(movie_id, actor_names)
+    at_once.build()
+    incrementally = CoStarGraph()
+    for movie_id, actor_names in casts:
+        incrementally.add_movie(movie_id, actor_names)
+        if movie_id == 600 or movie_id > 990:
+            incrementally.build()
+
+    assert incrementally.number_of_edges == at_once.number_of_edges
+    for name in ('Chris Pratt', 'Meryl Streep', 'Zqx Clements', 'Nobody Else'):
+        assert incrementally.costars(name) == at_once.costars(name)
+    assert incrementally.shortest_path('Zqx Clements', 'Zoe Saldana') == \
+        at_once.shortest_path('Zqx Clements', 'Zoe Saldana')
+
+
+def test_repository_keeps_posting_lists_up_to_date_when_adding_a_movie(in_memory_repo):
+    movie = Movie('Moana', 2016)
+    movie.add_genre(Genre('Animation'))
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_movie_ids_by_genre('Animation')[-1] == movie.id
+    assert movie in in_memory_repo.get_movies_by_genre('Animation')
+
+
 def test_repository_returns_an_empty_list_for_non_existent_genre(in_memory_repo):
     movie_ids = in_memory_repo.get_movie_ids_by_genre('Frightening')
 
@@ -138,8 +534,158 @@ def test_repository_can_add_a_review(in_memory_repo):
     assert review in in_memory_repo.get_reviews()
 
 
+def test_repository_ranks_movies_on_leaderboards(in_memory_repo):
+    top_rated = in_memory_repo.get_leaderboard('rating', limit=3)
+    assert [movie_id for movie_id, _ in top_rated] == [55, 81, 118]
+    assert top_rated[0][1] == 9.0
+
+    movie_ids = [movie_id for movie_id, _ in in_memory_repo.get_leaderboard('votes', genre='Horror', limit=100)]
+    votes = [in_memory_repo.get_movie_metric(movie_id, 'votes') for movie_id in movie_ids]
+    assert votes == sorted(votes, reverse=True)
+    assert set(movie_ids) <= set(in_memory_repo.get_movie_ids_by_genre('Horror'))
+
+    assert in_memory_repo.get_leaderboard('revenue', year=1066) == []
+    with pytest.raises(RepositoryException):
+        in_memory_repo.get_leaderboard('popularity')
+
+
+def test_repository_moves_changed_movies_on_built_leaderboards(in_memory_repo):
+    movie = Movie('Zoolander Returns', 2016)
+    movie.add_genre(in_memory_repo.get_genre('Horror'))
+    in_memory_repo.add_movie(movie)
+    in_memory_repo.set_movie_metrics(movie.id, rating=9.5, votes=10)
+
+    # Check that the rankings were kept up to date rather than dropped.
+    assert all(in_memory_repo._leaderboards.is_built(metric) for metric in ('rating', 'votes', 'weighted_rating'))
+    assert in_memory_repo.get_leaderboard('rating', limit=1) == [(movie.id, 9.5)]
+    assert in_memory_repo.get_leaderboard('rating', genre='Horror', limit=1) == [(movie.id, 9.5)]
+    assert in_memory_repo.get_leaderboard('rating', year=2016, limit=1) == [(movie.id, 9.5)]
+
+    in_memory_repo.set_movie_metrics(movie.id, rating=1.0, votes=10)
+    updated = [in_memory_repo.get_leaderboard('rating', limit=2000),
+               in_memory_repo.get_leaderboard('rating', genre='Horror', limit=100),
+               in_memory_repo.get_leaderboard('votes', year=2016, limit=100)]
+    assert updated[0][-1] == (movie.id, 1.0)
+    assert movie.id not in dict(updated[1])
+
+    # Check that the updated rankings are those a full build gives.
+    in_memory_repo.build_leaderboards()
+    assert updated == [in_memory_repo.get_leaderboard('rating', limit=2000),
+                       in_memory_repo.get_leaderboard('rating', genre='Horror', limit=100),
+                       in_memory_repo.get_leaderboard('votes', year=2016, limit=100)]
+
+
+def test_repository_weighs_user_reviews_into_weighted_ratings(in_memory_repo):
+    movie_id, score = in_memory_repo.get_leaderboard('weighted_rating', limit=1)[0]
+    movie = in_memory_repo.get_movie(movie_id)
+    user = User('thorke', '902fjsdf')
+    for _ in range(1000):
+        in_memory_repo.add_review(add_review('Overrated', user, movie, 1), movie, user)
+
+    assert dict(in_memory_repo.get_leaderboard('weighted_rating', limit=1000))[movie_id] < score
+
+
+def test_repository_increases_catalog_and_movie_versions_when_the_catalog_changes(in_memory_repo):
+    version = in_memory_repo.get_catalog_version()
+    movie = in_memory_repo.get_movie(2)
+    in_memory_repo.add_review(add_review('Highly recommended!', User('thorke', '902fjsdf'), movie, 8), movie, None)
+    assert in_memory_repo.get_catalog_version() > version
+
+    assert in_memory_repo.get_movie_version(2) == in_memory_repo.get_catalog_version()
+    assert in_memory_repo.get_movie_version(1) < in_memory_repo.get_movie_version(2)
+
+    version = in_memory_repo.get_catalog_version()
+    modified = in_memory_repo.get_catalog_last_modified()
+    movie = Movie('Frightening', 2021)
+    in_memory_repo.add_movie(movie)
+    assert in_memory_repo.get_catalog_version() > version
+    assert in_memory_repo.get_catalog_last_modified() >= modified
+    assert in_memory_repo.get_movie_version(movie.id) == in_memory_repo.get_catalog_version()
+    assert in_memory_repo.get_movie_version(movie.id + 1) is None
+
+    for add, entity in ((in_memory_repo.add_genre, Genre('Frightening')), (in_memory_repo.add_actor, Actor('Ada Lim')),
+                        (in_memory_repo.add_director, Director('Ada Lim'))):
+        version = in_memory_repo.get_catalog_version()
+        add(entity)
+        assert in_memory_repo.get_catalog_version() > version
+
+    version = in_memory_repo.get_catalog_version()
+    in_memory_repo.get_movie(1)
+    in_memory_repo.get_leaderboard('rating')
+    assert in_memory_repo.get_catalog_version() == version
+
+
 def test_repository_can_retrieve_reviews(in_memory_repo):
     assert len(in_memory_repo.get_reviews()) == 0
 
 
+def write_movie_file(data_path):
+    (data_path / 'moviefile.csv').write_text(
+        'Rank,Title,Genre,Description,Director,Actors,Year,Runtime (Minutes)\n'
+        '1,Moana,"Animation,Adventure","A quoted description,\nover two lines",Ron Clements,"Auli\'i Cravalho",2016,107\n'
+        '2,Frozen,Animation,"Sisters, ""and"" snow",Chris Buck,"Kristen Bell, Idina Menzel",2013,102\n',
+        encoding='utf-8')
+
+
+def test_parallel_ingestion_splits_the_movie_file_on_record_boundaries(tmp_path):
+    write_movie_file(tmp_path)
+
+    repo = MemoryRepository()
+    memory_repository.load_movies_and_ids_in_parallel(str(tmp_path), repo, workers=2, chunk_size=1)
+
+    assert [movie.title for movie in repo.get_movies] == ['Moana', 'Frozen']
+    assert repo.get_movie(1).description == 'A quoted description,\nover two lines'
+    assert repo.get_movie(2).description == 'Sisters, "and" snow'
+    assert repo.get_movie_ids_by_genre('Animation') == [1, 2]
+    assert repo.get_actor('Idina Menzel') in repo.get_movie(2).actors
+
+
+def test_movie_file_chunks_cover_the_records_after_the_header(tmp_path):
+    write_movie_file(tmp_path)
+    file_name = str(tmp_path / 'moviefile.csv')
+    data = (tmp_path / 'moviefile.csv').read_bytes()
+    header_end = data.index(b'\n') + 1
+    second_record = data.index(b'2,Frozen')
+
+    assert memory_repository.split_csv_file(file_name, 1) == [(header_end, second_record), (second_record, len(data))]
+    assert memory_repository.split_csv_file(file_name, len(data)) == [(header_end, len(data))]
+
+
+def test_repository_can_be_restored_from_a_snapshot(tmp_path):
+    write_movie_file(tmp_path)
+    repo = MemoryRepository()
+    memory_repository.load_movies_and_ids(str(tmp_path), repo)
+
+    snapshot_path = str(tmp_path / 'catalog.snapshot')
+    snapshot.write_snapshot(repo, str(tmp_path), snapshot_path)
+    restored = snapshot.read_snapshot(str(tmp_path), snapshot_path)
+
+    assert restored.get_movie(2).title == 'Frozen'
+    assert restored.get_movie_ids_by_genre('Animation') == [1, 2]
+    assert restored.get_movie(2).actors[0] is restored.get_actor('Kristen Bell')
+
+
+def test_snapshot_is_ignored_when_the_csv_files_change(tmp_path):
+    write_movie_file(tmp_path)
+    repo = MemoryRepository()
+    memory_repository.load_movies_and_ids(str(tmp_path), repo)
+
+    snapshot_path = str(tmp_path / 'catalog.snapshot')
+    snapshot.write_snapshot(repo, str(tmp_path), snapshot_path)
+    with open(tmp_path / 'moviefile.csv', 'a', encoding='utf-8') as movie_file:
+        movie_file.write('3,Sing,Animation,Singing,Garth Jennings,Reese Witherspoon,2016,108\n')
+
+    assert snapshot.read_snapshot(str(tmp_path), snapshot_path) is None
+
+
+def test_users_file_can_be_migrated_to_password_hashes(tmp_path):
+    users_file = tmp_path / 'users.csv'
+    users_file.write_text('id,username,password\n1,thorke,cLQ^C#oFXloS\n2,fmercury,mvNNbc1eLA$i\n', encoding='utf-8')
+
+    assert memory_repository.hash_users_file(str(users_file), str(users_file), workers=2) == 2
+    assert memory_repository.users_file_is_hashed(str(users_file))
 
+    repo = MemoryRepository()
+    memory_repository.load_users_and_ids(str(tmp_path), repo)
+    assert check_password_hash(repo.get_user('thorke').password, 'cLQ^C#oFXloS')
+    assert check_password_hash(repo.get_user('fmercury').password, 'mvNNbc1eLA$i')
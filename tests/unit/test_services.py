@@ -6,6 +6,9 @@ from movie.authentication.services import AuthenticationException
 from movie.domain.model import User
 from movie.movies import services as movies_services
 from movie.authentication import services as auth_services
+from movie.api import services as api_services
+from movie.search import services as search_services
+from movie.search.query import QueryPlan, QuerySyntaxError, parse_query
 from movie.movies.services import NonExistentMovieException
 
 
@@ -123,6 +126,12 @@ def test_get_movies_by_release_year_with_non_existent_year(in_memory_repo):
     assert len(movies_as_dict) == 0
 
 
+def test_get_release_year_navigation(in_memory_repo):
+    years = movies_services.get_release_year_navigation(2009, in_memory_repo)
+
+    assert years == {'first': 2006, 'previous': 2008, 'next': 2010, 'last': 2016}
+
+
 def test_get_movies_by_id(in_memory_repo):
     target_movie_ids = [5, 6, 7, 8]
     movies_as_dict = movies_services.get_movies_by_id(target_movie_ids, in_memory_repo)
@@ -162,3 +171,159 @@ def test_get_reviews_for_non_existent_movie(in_memory_repo):
 def test_get_reviews_for_movie_without_reviews(in_memory_repo):
     reviews_as_dict = movies_services.get_reviews_for_movie(2, in_memory_repo)
     assert len(reviews_as_dict) == 0
+
+
+def test_get_movie_ids_page_follows_cursors(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_by_genre('Action')
+
+    page = movies_services.get_movie_ids_page('genre', 'Action', None, 10, in_memory_repo)
+    assert page['movie_ids'] == movie_ids[:10]
+    assert page['has_previous'] is False
+    assert page['number_of_movies'] == len(movie_ids)
+
+    following = movies_services.get_movie_ids_page('genre', 'Action', page['next_cursor'], 10, in_memory_repo)
+    assert following['movie_ids'] == movie_ids[10:20]
+    assert following['has_previous'] is True
+
+    preceding = movies_services.get_movie_ids_page('genre', 'Action', following['previous_cursor'], 10,
+                                                   in_memory_repo)
+    assert preceding['movie_ids'] == movie_ids[:10]
+
+    last = movies_services.get_movie_ids_page('genre', 'Action', page['last_cursor'], 10, in_memory_repo)
+    assert last['movie_ids'] == movie_ids[-10:]
+    assert last['next_cursor'] is None
+
+
+def test_get_movie_ids_page_with_invalid_cursor_starts_at_the_first_page(in_memory_repo):
+    page = movies_services.get_movie_ids_page('genre', 'Action', 'not a cursor!', 3, in_memory_repo)
+
+    assert page['movie_ids'] == in_memory_repo.get_movie_ids_by_genre('Action')[:3]
+    assert movies_services.decode_cursor(movies_services.encode_cursor(after=42)) == {'after': 42}
+
+
+def test_get_leaderboard(in_memory_repo):
+    movies = movies_services.get_leaderboard('revenue', 'Animation', None, 5, in_memory_repo)
+
+    assert len(movies) == 5
+    assert all('Animation' in [genre.genre_name for genre in movie['genres']] for movie in movies)
+    assert [movie['score'] for movie in movies] == sorted((movie['score'] for movie in movies), reverse=True)
+    with pytest.raises(ValueError):
+        movies_services.get_leaderboard('popularity', None, None, 5, in_memory_repo)
+
+
+def test_get_filmography(in_memory_repo):
+    movies, summary = movies_services.get_filmography('actor', 'Chris Pratt', 2, 5, in_memory_repo)
+
+    assert summary['number_of_movies'] == 7
+    assert len(movies) == 2
+    assert movies[0]['release_year'] <= movies[1]['release_year']
+    with pytest.raises(movies_services.UnknownPersonException):
+        movies_services.get_filmography('director', 'Chris Pratt', 1, 5, in_memory_repo)
+
+
+def test_get_costar_path(in_memory_repo):
+    steps = movies_services.get_costar_path('Chris Pratt', 'Meryl Streep', in_memory_repo)
+
+    assert len(steps) == 3
+    assert steps[0]['actor'] == 'Chris Pratt' and steps[-1]['costar'] == 'Meryl Streep'
+    assert 'Chris Pratt' in [actor.actor_full_name for actor in steps[0]['movie']['actors']]
+    with pytest.raises(movies_services.UnknownActorException):
+        movies_services.get_costar_path('Chris Pratt', 'Chirs Pratt', in_memory_repo)
+
+
+def test_search_movies(in_memory_repo):
+    movies, number_of_matches = search_services.search_movies('galaxy', 1, 2, in_memory_repo)
+
+    assert movies[0]['title'] == 'Guardians of the Galaxy'
+    assert len(movies) <= 2
+    assert number_of_matches >= len(movies)
+
+
+def test_get_movies_by_filters(in_memory_repo):
+    filters = {'genres': ['Sci-Fi'], 'actors': ['Chris Pratt']}
+    movies, number_of_matches, facet_counts = movies_services.get_movies_by_filters(filters, 1, 2, in_memory_repo)
+
+    assert movies[0]['title'] == 'Guardians of the Galaxy'
+    assert len(movies) == min(2, number_of_matches)
+    assert ('Chris Pratt', number_of_matches) in facet_counts['actor']
+
+
+def test_parse_query():
+    predicates = parse_query('genre:Sci-Fi actor:"Chris Pratt" year:2010..2016 runtime:<120 rating:>=7.5 galaxy')
+
+    assert [repr(predicate) for predicate in predicates] == [
+        'genre:"Sci-Fi"', 'actor:"Chris Pratt"', 'year:2010..2016', 'runtime:<120', 'rating:>=7.5', 'text:galaxy']
+    assert repr(parse_query('year:>2010')[0]) == 'year:2011..'
+
+    with pytest.raises(QuerySyntaxError):
+        parse_query('colour:red')
+    with pytest.raises(QuerySyntaxError):
+        parse_query('runtime:long')
+
+
+def test_query_plan_drives_from_the_most_selective_predicate(in_memory_repo):
+    plan = QueryPlan(parse_query('year:2010..2016 genre:sci-fi actor:"Chris Pratt" runtime:<130'), in_memory_repo)
+    movie_ids, has_more = plan.execute()
+
+    assert movie_ids == in_memory_repo.get_movie_ids_by_filters(genres=['Sci-Fi'], actors=['Chris Pratt'],
+                                                                year_range=(2010, 2016), runtime_range=(None, 129))
+    assert not has_more
+
+    steps = plan.explain()['steps']
+    assert steps[0]['predicate'] == 'actor:"Chris Pratt"' and steps[0]['role'] == 'drive'
+    assert [step['estimate'] for step in steps] == sorted(step['estimate'] for step in steps)
+
+
+def test_query_plan_stops_once_a_page_is_full(in_memory_repo):
+    plan = QueryPlan(parse_query('genre:Drama'), in_memory_repo)
+    movie_ids, has_more = plan.execute(0, 5)
+
+    assert movie_ids == in_memory_repo.get_movie_ids_by_genre('Drama')[:5]
+    assert has_more
+    assert plan.explain()['steps'][0]['rows_out'] == 6
+
+
+def test_query_plan_reads_a_numeric_driver_lazily(in_memory_repo):
+    plan = QueryPlan(parse_query('runtime:<=100'), in_memory_repo)
+    movie_ids, has_more = plan.execute(0, 5)
+
+    assert movie_ids == in_memory_repo.filter_movie_ids([('runtime', '<=', 100)])[:5]
+    assert has_more
+    assert plan.explain()['steps'][0]['rows_out'] == 6
+
+    # Check that the ids produced a chunk of rows at a time are those filtered at once.
+    conditions = [('rating', '>=', 7), ('revenue', '!=', 0)]
+    assert list(in_memory_repo.movie_table.iter_filter(conditions, chunk_size=7)) == \
+        in_memory_repo.filter_movie_ids(conditions)
+
+
+def test_query_movies(in_memory_repo):
+    movies, has_more, plan = search_services.query_movies('"intergalactic criminals" genre:Action', 1, 10,
+                                                          in_memory_repo, explain=True)
+
+    assert [movie['title'] for movie in movies] == ['Guardians of the Galaxy']
+    assert not has_more
+    assert plan['steps'][0]['predicate'] == 'text:"intergalactic criminals"'
+
+
+def test_api_projects_only_the_fields_asked_for(in_memory_repo):
+    fields = api_services.read_fields('title, rating,title', api_services.MOVIE_FIELDS,
+                                      api_services.DEFAULT_MOVIE_FIELDS)
+    assert fields == ('title', 'rating')
+    assert api_services.get_movie(1, fields, in_memory_repo) == {'title': 'Guardians of the Galaxy', 'rating': 8.1}
+
+    assert api_services.read_fields(None, api_services.MOVIE_FIELDS, ('id',)) == ('id',)
+    with pytest.raises(api_services.UnknownFieldException):
+        api_services.read_fields('title,budget', api_services.MOVIE_FIELDS, ('id',))
+    with pytest.raises(NonExistentMovieException):
+        api_services.get_movie(5000, fields, in_memory_repo)
+
+
+def test_api_yields_movies_lazily(in_memory_repo):
+    movie_ids = api_services.get_movie_ids({'genres': ['Sci-Fi'], 'year_range': (2014, 2016)}, in_memory_repo)
+    movies = api_services.iter_movies(movie_ids, ('id',), 1, 2, in_memory_repo)
+    assert next(movies) == {'id': movie_ids[1]}
+    assert len(list(movies)) == 1
+
+    assert api_services.get_movie_ids({}, in_memory_repo) == range(1, 1001)
+